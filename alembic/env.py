@@ -27,8 +27,10 @@ config.set_main_option("sqlalchemy.url", db_url)
 fileConfig(config.config_file_name)
 
 # for 'autogenerate' support
-from hera_mc import mc  # noqa
+from hera_mc import _import_table_modules, mc  # noqa
 
+# make sure all the tables are registered on MCDeclarativeBase
+_import_table_modules()
 target_metadata = mc.MCDeclarativeBase.metadata
 
 
@@ -0,0 +1,90 @@
+"""store auto spectrum as float32 bytes
+
+Revision ID: 0c9a7d3e5f21
+Revises: 38fdb8a21fd2
+Create Date: 2026-10-17 12:00:00.000000+00:00
+
+"""
+
+import numpy as np
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0c9a7d3e5f21"
+down_revision = "38fdb8a21fd2"
+branch_labels = None
+depends_on = None
+
+DOWNGRADE_BATCH_SIZE = 1000
+
+
+def upgrade():
+    # convert the REAL[] values to little-endian float32 bytes on the server.
+    # float4send gives big-endian bytes so they are reversed for each element.
+    op.add_column(
+        "hera_auto_spectrum",
+        sa.Column("spectrum_bytes", sa.LargeBinary(), nullable=True),
+    )
+    conn = op.get_bind()
+    conn.execute(
+        text(
+            "UPDATE hera_auto_spectrum SET spectrum_bytes = COALESCE(("
+            "SELECT string_agg(substring(b from 4 for 1) || substring(b from 3 for 1) "
+            "|| substring(b from 2 for 1) || substring(b from 1 for 1), "
+            "''::bytea ORDER BY ord) "
+            "FROM unnest(spectrum) WITH ORDINALITY AS t(x, ord), "
+            "LATERAL float4send(x) AS b), ''::bytea);"
+        )
+    )
+    op.drop_column("hera_auto_spectrum", "spectrum")
+    op.alter_column(
+        "hera_auto_spectrum",
+        "spectrum_bytes",
+        new_column_name="spectrum",
+        nullable=False,
+    )
+
+
+def downgrade():
+    op.add_column(
+        "hera_auto_spectrum",
+        sa.Column(
+            "spectrum_array", postgresql.ARRAY(sa.REAL(), dimensions=1), nullable=True
+        ),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(
+        text(
+            "SELECT time, antenna_number, antenna_feed_pol, spectrum "
+            "FROM hera_auto_spectrum;"
+        )
+    ).fetchall()
+    update = text(
+        "UPDATE hera_auto_spectrum SET spectrum_array = :spectrum WHERE time = :time "
+        "AND antenna_number = :antenna_number AND antenna_feed_pol = :antenna_feed_pol;"
+    ).bindparams(
+        sa.bindparam("spectrum", type_=postgresql.ARRAY(sa.REAL(), dimensions=1))
+    )
+    for index in range(0, len(rows), DOWNGRADE_BATCH_SIZE):
+        conn.execute(
+            update,
+            [
+                {
+                    "time": row[0],
+                    "antenna_number": row[1],
+                    "antenna_feed_pol": row[2],
+                    "spectrum": np.frombuffer(row[3], dtype="<f4").tolist(),
+                }
+                for row in rows[index : index + DOWNGRADE_BATCH_SIZE]
+            ],
+        )
+    op.drop_column("hera_auto_spectrum", "spectrum")
+    op.alter_column(
+        "hera_auto_spectrum",
+        "spectrum_array",
+        new_column_name="spectrum",
+        nullable=False,
+    )
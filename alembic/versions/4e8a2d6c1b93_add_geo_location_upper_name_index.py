@@ -0,0 +1,29 @@
+"""add geo_location upper case station name index
+
+Revision ID: 4e8a2d6c1b93
+Revises: 9b3f1c8e2d47
+Create Date: 2026-10-17 18:00:00.000000+00:00
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4e8a2d6c1b93"
+down_revision = "9b3f1c8e2d47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_geo_location_upper_station_name",
+        "geo_location",
+        [sa.text("upper(station_name)")],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_geo_location_upper_station_name", table_name="geo_location")
@@ -0,0 +1,38 @@
+"""add monitoring rollup table
+
+Revision ID: 7d2e4b6a9c10
+Revises: 0c9a7d3e5f21
+Create Date: 2026-10-17 14:00:00.000000+00:00
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7d2e4b6a9c10"
+down_revision = "0c9a7d3e5f21"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "monitoring_rollup",
+        sa.Column("source", sa.String(length=64), nullable=False),
+        sa.Column("resolution", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("bucket_start", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("variable", sa.String(length=64), nullable=False),
+        sa.Column("entity", sa.String(length=64), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.Column("min_value", sa.Float(), nullable=False),
+        sa.Column("max_value", sa.Float(), nullable=False),
+        sa.Column("mean_value", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "source", "resolution", "bucket_start", "variable", "entity"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table("monitoring_rollup")
@@ -0,0 +1,33 @@
+"""add weather backfill table
+
+Revision ID: 9b3f1c8e2d47
+Revises: 7d2e4b6a9c10
+Create Date: 2026-10-17 16:00:00.000000+00:00
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9b3f1c8e2d47"
+down_revision = "7d2e4b6a9c10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "weather_backfill",
+        sa.Column("variable", sa.String(), nullable=False),
+        sa.Column("starttime", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("stoptime", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("resume_time", sa.BigInteger(), nullable=True),
+        sa.Column("n_records", sa.BigInteger(), nullable=False),
+        sa.Column("last_updated", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("variable", "starttime", "stoptime"),
+    )
+
+
+def downgrade():
+    op.drop_table("weather_backfill")
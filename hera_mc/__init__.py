@@ -8,35 +8,55 @@ Define package structure.
 isort:skip_file
 """
 
+import importlib
 from pathlib import Path
-import warnings
 
 import numpy as np
 from importlib.metadata import version, PackageNotFoundError
-from setuptools_scm import get_version
+from sqlalchemy.orm import declarative_base
+
+
+def get_version_str(dev=False):
+    """
+    Get the hera_mc version string.
 
-from .branch_scheme import branch_scheme
+    Parameters
+    ----------
+    dev : bool
+        Option to get the version from git with setuptools_scm (which includes the
+        commit and branch for developer installs). This can shell out to git so is
+        slower than reading the installed package metadata, which is done
+        otherwise or if the git lookup fails.
 
+    Returns
+    -------
+    str or None
+        The version, None if the package is not installed and the git lookup is
+        not done or fails.
 
-try:
-    # get accurate version for developer installs
-    version_str = get_version(Path(__file__).parent.parent, local_scheme=branch_scheme)
+    """
+    if dev:
+        try:
+            from setuptools_scm import get_version
 
-    __version__ = version_str
+            from .branch_scheme import branch_scheme
 
-except (LookupError, ImportError):
+            return get_version(Path(__file__).parent.parent, local_scheme=branch_scheme)
+        except (LookupError, ImportError):
+            pass
     try:
         # Set the version automatically from the package details.
-        __version__ = version("hera_mc")
+        return version("hera_mc")
     except PackageNotFoundError:  # pragma: nocover
         # package is not installed
-        pass
+        if not dev:
+            return get_version_str(dev=True)
+        return None
+
 
 # Before we can do anything else, we need to initialize some core, shared
 # variables.
 
-from sqlalchemy.orm import declarative_base
-
 # define some default tolerances for various units
 DEFAULT_DAY_TOL = {"atol": 1e-3 / (3600.0 * 24.0), "rtol": 0}  # ms
 DEFAULT_HOUR_TOL = {"atol": 1e-3 / (3600), "rtol": 0}  # ms
@@ -134,27 +154,86 @@ def NotNull(kind, **kwargs):
     return Column(kind, nullable=False, **kwargs)
 
 
-with warnings.catch_warnings():
-    # This filter can be removed when pyuvdata (and maybe other imported packages?)
-    # are updated to use importlib.metadata rather than pkg_resources
-    warnings.filterwarnings("ignore", "Implementing implicit namespace packages")
-    from . import autocorrelations  # noqa
-    from . import cm_transfer  # noqa this needs to come before several others
-    from . import cm_active  # noqa
-    from . import cm_dossier  # noqa
-    from . import cm_partconnect  # noqa
-    from . import cm_sysdef  # noqa
-    from . import cm_sysutils  # noqa
-    from . import cm_utils  # noqa
-    from . import correlator  # noqa
-    from . import daemon_status  # noqa
-    from . import geo_location  # noqa
-    from . import librarian  # noqa
-    from . import node  # noqa
-    from . import observations  # noqa
-    from . import qm  # noqa
-    from . import rtp  # noqa
-    from . import subsystem_error  # noqa
-    from . import server_status  # noqa
-    from . import weather  # noqa
-    from . import mc  # noqa keep this last.
+# Submodules are imported when they are first accessed (PEP 562) so that importing
+# hera_mc is fast, many of them pull in redis, astropy and other slow imports.
+_submodules = {
+    "autocorrelations",
+    "branch_scheme",
+    "cm_active",
+    "cm_dossier",
+    "cm_gen_sqlite",
+    "cm_handling",
+    "cm_hookup",
+    "cm_partconnect",
+    "cm_redis_corr",
+    "cm_revisions",
+    "cm_sysdef",
+    "cm_sysutils",
+    "cm_table_info",
+    "cm_transfer",
+    "cm_utils",
+    "collector_scheduler",
+    "correlator",
+    "daemon_status",
+    "db_check",
+    "geo_handling",
+    "geo_location",
+    "geo_sysdef",
+    "librarian",
+    "mc",
+    "mc_session",
+    "node",
+    "observations",
+    "qm",
+    "rollup",
+    "rtp",
+    "server_status",
+    "subsystem_error",
+    "utils",
+    "watch_dog",
+    "weather",
+}
+
+# Modules defining tables on MCDeclarativeBase. These must all be imported before
+# the table metadata is used (e.g. to create or check the tables).
+_table_modules = [
+    "autocorrelations",
+    "cm_partconnect",
+    "cm_transfer",
+    "correlator",
+    "daemon_status",
+    "geo_location",
+    "librarian",
+    "node",
+    "observations",
+    "qm",
+    "rollup",
+    "rtp",
+    "server_status",
+    "subsystem_error",
+    "weather",
+]
+
+
+def _import_table_modules():
+    """Import all the modules that define tables so they are registered."""
+    for name in _table_modules:
+        importlib.import_module("." + name, __name__)
+
+
+def __getattr__(name):
+    """Import submodules and get the version when they are first accessed."""
+    if name == "__version__":
+        version_str = get_version_str()
+        if version_str is None:  # pragma: nocover
+            raise AttributeError(name)
+        globals()["__version__"] = version_str
+        return version_str
+    if name in _submodules:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    """List the module attributes, including the lazily imported submodules."""
+    return sorted(set(globals()) | _submodules | {"__version__"})
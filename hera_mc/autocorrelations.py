@@ -13,56 +13,121 @@ import re
 from math import floor
 
 import numpy as np
-import redis
 from astropy.time import Time
-from sqlalchemy import BigInteger, Column, Float, Integer, String
-from sqlalchemy.dialects import postgresql
-from sqlalchemy.types import REAL
+from sqlalchemy import BigInteger, Column, Float, Integer, LargeBinary, String
+from sqlalchemy.orm import validates
+from sqlalchemy.types import TypeDecorator
 
 from . import MCDeclarativeBase
-from .correlator import DEFAULT_REDIS_ADDRESS
+from .correlator import DEFAULT_REDIS_ADDRESS, _get_redis_session
 
 allowed_measurement_types = ["median"]
 measurement_func_dict = {"median": np.median}
 
-# define a hybrid array type to handle postgres vs sqlite backend for array columns
-HybridArrayType = String()
-HybridArrayType = HybridArrayType.with_variant(
-    postgresql.ARRAY(REAL, dimensions=1), "postgresql"
-)
 
+class Float32ArrayType(TypeDecorator):
+    """
+    Column type storing a 1D float32 array as raw little-endian bytes.
+
+    This maps to ``bytea`` on postgres and ``BLOB`` on sqlite. Values are written
+    from anything that can be converted to a float32 numpy array and are read
+    back as read-only numpy arrays that share memory with the fetched bytes (no
+    per-element conversion in either direction).
+
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+    dtype = np.dtype("<f4")
+
+    def process_bind_param(self, value, dialect):
+        """Convert an array-like to bytes for the database."""
+        if value is None:
+            return None
+        return np.ascontiguousarray(value, dtype=self.dtype).tobytes()
+
+    def process_result_value(self, value, dialect):
+        """Convert bytes from the database to a numpy array without copying."""
+        if value is None:
+            return None
+        return np.frombuffer(value, dtype=self.dtype)
+
+    @property
+    def python_type(self):
+        """Python type of the values of this column type."""
+        return np.ndarray
+
+
+_AUTO_KEY_REGEX = re.compile(r"auto:(?P<ant>\d+)(?P<pol>e|n)")
+AUTO_SCAN_COUNT = 1000
+
+
+def _get_autos_from_redis(redishost=DEFAULT_REDIS_ADDRESS, antenna_numbers=None):
+    """
+    Get the current autocorrelation spectra from redis.
+
+    The keys are found with SCAN (or built from antenna_numbers) and all the
+    spectra and the timestamp are read with a single MGET. The spectra are
+    assembled into one 2D float32 array and the returned dict values are rows
+    of that array.
+
+    Parameters
+    ----------
+    redishost : str
+        Hostname of the redis server.
+    antenna_numbers : list of int, optional
+        Antenna numbers to get autocorrelations for (both polarizations). If
+        None, all the autocorrelation keys in redis are used.
+
+    Returns
+    -------
+    dict
+        Keyed by "timestamp" (the time in JD) and "<ant>:<pol>" for each
+        autocorrelation found, with the spectrum as a float32 array.
 
-def _get_autos_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
+    """
     # This is retained so that explicitly providing redishost=None has the desired behavior
     if redishost is None:
         redishost = DEFAULT_REDIS_ADDRESS
-    redis_pool = redis.ConnectionPool(host=redishost)
-    rsession = redis.Redis(connection_pool=redis_pool)
-
-    auto_time = Time(
-        np.frombuffer(rsession.get("auto:timestamp"), dtype=np.float64).item(),
-        format="jd",
+    rsession = _get_redis_session(redishost, decode_responses=False)
+
+    if antenna_numbers is None:
+        antpols = set()
+        for key in rsession.scan_iter(match="auto:*", count=AUTO_SCAN_COUNT):
+            match = _AUTO_KEY_REGEX.fullmatch(key.decode("utf-8"))
+            if match is not None:
+                antpols.add((int(match.group("ant")), match.group("pol")))
+        antpols = sorted(antpols)
+    else:
+        antpols = [(int(ant), pol) for ant in antenna_numbers for pol in ["e", "n"]]
+
+    values = rsession.mget(
+        ["auto:timestamp"]
+        + ["auto:{ant:d}{pol:s}".format(ant=ant, pol=pol) for ant, pol in antpols]
     )
+
+    auto_time = Time(np.frombuffer(values[0], dtype=np.float64).item(), format="jd")
     autos_dict = {"timestamp": auto_time.jd}
 
-    keys = [
-        k.decode("utf-8")
-        for k in rsession.keys()
-        if k.startswith(b"auto") and not k.endswith(b"timestamp")
+    found = [
+        (antpol, value)
+        for antpol, value in zip(antpols, values[1:])
+        if value is not None
     ]
-
-    for key in keys:
-        match = re.search(r"auto:(?P<ant>\d+)(?P<pol>e|n)", key)
-        if match is not None:
-            ant, pol = int(match.group("ant")), match.group("pol")
-
-            antpol = "{ant:d}:{pol:s}".format(ant=ant, pol=pol)
-            auto = rsession.get("auto:{ant:d}{pol:s}".format(ant=ant, pol=pol))
-            if auto is not None:
-                # copy the value because frombuffer returns immutable type
-                auto = np.frombuffer(auto, dtype=np.float32).copy()
-
-            autos_dict[antpol] = auto
+    if len(found) == 0:
+        return autos_dict
+
+    n_freq = len(found[0][1]) // np.dtype(np.float32).itemsize
+    autos = np.empty((len(found), n_freq), dtype=np.float32)
+    for index, ((ant, pol), value) in enumerate(found):
+        antpol = "{ant:d}:{pol:s}".format(ant=ant, pol=pol)
+        auto = np.frombuffer(value, dtype=np.float32)
+        if auto.size == n_freq:
+            autos[index] = auto
+            autos_dict[antpol] = autos[index]
+        else:
+            # copy the value because frombuffer returns immutable type
+            autos_dict[antpol] = auto.copy()
 
     return autos_dict
 
@@ -158,8 +223,9 @@ class HeraAutoSpectrum(MCDeclarativeBase):
         Antenna number. Part of primary_key.
     antenna_feed_pol : String Column
         Feed polarization, either 'e' or 'n'. Part of primary_key.
-    spectrum : Array of Reals Columnn
-        Auto spectrum (array in postgres). Cannot be None.
+    spectrum : Float32ArrayType Column
+        Auto spectrum, stored as float32 bytes and returned as a numpy array.
+        Cannot be None.
 
     """
 
@@ -168,7 +234,14 @@ class HeraAutoSpectrum(MCDeclarativeBase):
     time = Column(BigInteger, primary_key=True)
     antenna_number = Column(Integer, primary_key=True)
     antenna_feed_pol = Column(String, primary_key=True)
-    spectrum = Column(HybridArrayType, nullable=False)
+    spectrum = Column(Float32ArrayType, nullable=False)
+
+    @validates("spectrum")
+    def _validate_spectrum(self, key, spectrum):
+        """Store the spectrum as a float32 numpy array."""
+        if spectrum is None:
+            return spectrum
+        return np.asarray(spectrum, dtype=Float32ArrayType.dtype)
 
     @classmethod
     def create(cls, time, antenna_number, antenna_feed_pol, spectrum):
@@ -197,9 +270,7 @@ class HeraAutoSpectrum(MCDeclarativeBase):
         if antenna_feed_pol not in ["e", "n"]:
             raise ValueError("antenna_feed_pol must be 'e' or 'n'.")
 
-        if isinstance(spectrum, np.ndarray):
-            spectrum = spectrum.tolist()
-        elif not isinstance(spectrum, (list, tuple)):
+        if not isinstance(spectrum, (list, tuple, np.ndarray)):
             raise ValueError("spectrum must be a list, ndarray or tuple")
 
         return cls(
@@ -4,13 +4,68 @@
 # Licensed under the 2-clause BSD license.
 
 """Methods to load all active data for a given date."""
+import threading
 from copy import copy
 
+from sqlalchemy import func, select
+
 from . import cm_partconnect as partconn
 from . import cm_utils, mc
 
 IGNORE_DUPLICATE_ACTIVE_PART = False
 
+# Process-wide cache of the loaded active tables. It is off by default, long-running
+# processes (e.g. the monitoring daemons) can turn it on by setting USE_ACTIVE_CACHE.
+# Entries are keyed on the database, the table and the at_date bucket (of width
+# ACTIVE_CACHE_BUCKET_SEC seconds) and are dropped whenever the latest
+# CMVersion.update_time changes.  Only the ACTIVE_CACHE_MAX_BUCKETS most recently
+# stored buckets are kept for each table, so a process loading "now" every cycle
+# does not accumulate a copy per bucket.
+USE_ACTIVE_CACHE = False
+ACTIVE_CACHE_BUCKET_SEC = 60
+ACTIVE_CACHE_MAX_BUCKETS = 2
+_active_cache = {}
+_active_cache_cm_version = {}
+_active_cache_lock = threading.Lock()
+_active_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def get_active_cache_stats():
+    """
+    Return the process-wide active data cache counters.
+
+    Returns
+    -------
+    dict
+        Keys are "hits", "misses", "invalidations" and "entries".
+
+    """
+    with _active_cache_lock:
+        stats = dict(_active_cache_stats)
+        stats["entries"] = len(_active_cache)
+    return stats
+
+
+def clear_active_cache():
+    """Clear the process-wide active data cache and reset its counters."""
+    with _active_cache_lock:
+        _active_cache.clear()
+        _active_cache_cm_version.clear()
+        for key in _active_cache_stats:
+            _active_cache_stats[key] = 0
+
+
+def _copy_active_dict(table, data):
+    """Copy the containers (but not the row objects) of a loaded active dict."""
+    if table == "connections":
+        return {
+            direction: {key: dict(ports) for key, ports in conn_dict.items()}
+            for direction, conn_dict in data.items()
+        }
+    if table == "info":
+        return {key: list(info_list) for key, info_list in data.items()}
+    return dict(data)
+
 
 def get_active(
     at_date="now", at_time=None, float_format=None, loading=["apriori"], testing=False
@@ -59,7 +114,9 @@ class ActiveData:
 
     """
 
-    def __init__(self, session, at_date="now", at_time=None, float_format=None):
+    def __init__(
+        self, session, at_date="now", at_time=None, float_format=None, use_cache=None
+    ):
         """
         Initialize ActiveData class attributes for at_date.
 
@@ -78,15 +135,21 @@ class ActiveData:
             Time at which to initialize, ignored if at_date is a float or contains time information
         float_format : str
             Format if at_date is a number denoting gps or unix seconds or jd day.
+        use_cache : bool or None
+            Option to use the process-wide active data cache. If None, use the module
+            level USE_ACTIVE_CACHE setting.
         """
         self.session = session
         self.at_date = cm_utils.get_astropytime(at_date, at_time, float_format)
+        self.use_cache = use_cache
+        self._cache_checked = False
         self.reset_all()
         self.pytest_param = False
 
     def reset_all(self):
         """Reset all active attributes to None."""
         self.parts = None
+        self._part_index = None
         self.rosetta = None
         self.connections = None
         self.info = None
@@ -122,6 +185,73 @@ class ActiveData:
                 self.reset_all()
         return self.at_date.gps
 
+    def _cache_key(self, table, gps_time, *args):
+        """
+        Get the cache key for a table, or None if the cache is not in use.
+
+        The first time this is called on an object with the cache in use, the
+        latest CMVersion.update_time is checked and the cache entries for this
+        database are dropped if it has changed.
+
+        """
+        use_cache = USE_ACTIVE_CACHE if self.use_cache is None else self.use_cache
+        if not use_cache or self.pytest_param:
+            return None
+        from .cm_transfer import CMVersion
+
+        db_key = str(self.session.get_bind().engine.url)
+        if not self._cache_checked:
+            cm_version = self.session.query(func.max(CMVersion.update_time)).scalar()
+            with _active_cache_lock:
+                if _active_cache_cm_version.get(db_key, cm_version) != cm_version:
+                    for key in [x for x in _active_cache if x[0] == db_key]:
+                        del _active_cache[key]
+                    _active_cache_stats["invalidations"] += 1
+                _active_cache_cm_version[db_key] = cm_version
+            self._cache_checked = True
+        return (db_key, table, int(gps_time // ACTIVE_CACHE_BUCKET_SEC)) + args
+
+    def _get_cached(self, cache_key, table):
+        """Return a copy of the cached data for cache_key, or None if not cached."""
+        if cache_key is None:
+            return None
+        with _active_cache_lock:
+            data = _active_cache.get(cache_key)
+            if data is None:
+                _active_cache_stats["misses"] += 1
+                return None
+            _active_cache_stats["hits"] += 1
+        return _copy_active_dict(table, data)
+
+    def _set_cached(self, cache_key, table, data):
+        """Store a copy of the loaded data, dropping the oldest buckets of the table."""
+        if cache_key is None:
+            return
+        data = _copy_active_dict(table, data)
+        same_table = cache_key[:2] + cache_key[3:]
+        with _active_cache_lock:
+            _active_cache.pop(cache_key, None)
+            _active_cache[cache_key] = data
+            buckets = [x for x in _active_cache if x[:2] + x[3:] == same_table]
+            for key in buckets[: max(len(buckets) - ACTIVE_CACHE_MAX_BUCKETS, 0)]:
+                del _active_cache[key]
+
+    @property
+    def part_index(self):
+        """
+        Sorted index of the keys in self.parts (cm_utils.PartKeyIndex).
+
+        It is built once per load of the parts and rebuilt only if self.parts is
+        replaced or changes size.  Assumes that self.load_parts() has been run.
+        """
+        if (
+            self._part_index is None
+            or self._part_index[0] is not self.parts
+            or len(self._part_index[1]) != len(self.parts)
+        ):
+            self._part_index = (self.parts, cm_utils.PartKeyIndex(self.parts))
+        return self._part_index[1]
+
     def load_parts(self, at_date=None, at_time=None, float_format=None):
         """
         Retrieve all active parts for a given at_date.
@@ -143,6 +273,10 @@ class ActiveData:
 
         """
         gps_time = self.set_active_time(at_date, at_time, float_format)
+        cache_key = self._cache_key("parts", gps_time)
+        self.parts = self._get_cached(cache_key, "parts")
+        if self.parts is not None:
+            return
         self.parts = {}
         for prt in self.session.query(partconn.Parts).filter(
             (partconn.Parts.start_gpstime <= gps_time)
@@ -154,6 +288,7 @@ class ActiveData:
             key = cm_utils.make_part_key(prt.hpn, prt.hpn_rev)
             self.parts[key] = copy(prt)
             self.parts[key].logical_pn = None
+        self._set_cached(cache_key, "parts", self.parts)
 
     def load_connections(self, at_date=None, at_time=None, float_format=None):
         """
@@ -166,6 +301,7 @@ class ActiveData:
                 self.connections - has keys 'up' and 'down', each of which
                                    is a dictionary keyed on part:rev for
                                    upstream_part and downstream_part respectively.
+                                   The connections are ConnectionRecord objects.
 
         Parameters
         ----------
@@ -179,47 +315,64 @@ class ActiveData:
         Raises
         ------
         ValueError
-            If a duplicate is found.
+            If duplicates are found, listing all of them. If
+            IGNORE_DUPLICATE_ACTIVE_PART is set they are printed instead.
 
         """
         gps_time = self.set_active_time(at_date, at_time, float_format)
+        cache_key = self._cache_key("connections", gps_time)
+        self.connections = self._get_cached(cache_key, "connections")
+        if self.connections is not None:
+            return
         self.connections = {"up": {}, "down": {}}
-        check_keys = {"up": [], "down": []}
-        for cnn in self.session.query(partconn.Connections).filter(
-            (partconn.Connections.start_gpstime <= gps_time)
-            & (
-                (partconn.Connections.stop_gpstime > gps_time)
-                | (partconn.Connections.stop_gpstime == None)  # noqa
+        # ports already connected in each direction, to find duplicates
+        check_keys = {"up": set(), "down": set()}
+        duplicates = []
+        columns = [
+            getattr(partconn.Connections, col)
+            for col in partconn.ConnectionRecord.columns
+        ]
+        for row in self.session.execute(
+            select(*columns).where(
+                (partconn.Connections.start_gpstime <= gps_time)
+                & (
+                    (partconn.Connections.stop_gpstime > gps_time)
+                    | (partconn.Connections.stop_gpstime == None)  # noqa
+                )
             )
         ):
+            cnn = partconn.ConnectionRecord(*row)
             chk = cm_utils.make_part_key(
                 cnn.upstream_part, cnn.up_part_rev, cnn.upstream_output_port
             )
             if self.pytest_param:
-                check_keys[self.pytest_param].append(chk)
+                check_keys[self.pytest_param].add(chk)
             if chk in check_keys["up"]:
-                if IGNORE_DUPLICATE_ACTIVE_PART:
-                    print("Duplicate active port {}".format(chk))
-                    continue
-                else:
-                    raise ValueError("Duplicate active port {}".format(chk))
-            check_keys["up"].append(chk)
+                duplicates.append(chk)
+                continue
+            check_keys["up"].add(chk)
             chk = cm_utils.make_part_key(
                 cnn.downstream_part, cnn.down_part_rev, cnn.downstream_input_port
             )
             if chk in check_keys["down"]:
-                if IGNORE_DUPLICATE_ACTIVE_PART:
-                    print("Duplicate active port {}".format(chk))
-                    continue
-                else:
-                    raise ValueError("Duplicate active port {}".format(chk))
-            check_keys["down"].append(chk)
+                duplicates.append(chk)
+                continue
+            check_keys["down"].add(chk)
             key = cm_utils.make_part_key(cnn.upstream_part, cnn.up_part_rev)
             self.connections["up"].setdefault(key, {})
-            self.connections["up"][key][cnn.upstream_output_port.upper()] = copy(cnn)
+            self.connections["up"][key][cnn.upstream_output_port.upper()] = cnn
             key = cm_utils.make_part_key(cnn.downstream_part, cnn.down_part_rev)
             self.connections["down"].setdefault(key, {})
-            self.connections["down"][key][cnn.downstream_input_port.upper()] = copy(cnn)
+            self.connections["down"][key][cnn.downstream_input_port.upper()] = cnn
+        if duplicates:
+            msg = "\n".join(
+                "Duplicate active port {}".format(chk) for chk in duplicates
+            )
+            if IGNORE_DUPLICATE_ACTIVE_PART:
+                print(msg)
+            else:
+                raise ValueError(msg)
+        self._set_cached(cache_key, "connections", self.connections)
 
     def load_info(self, at_date=None, at_time=None, float_format=None):
         """
@@ -242,6 +395,10 @@ class ActiveData:
 
         """
         gps_time = self.set_active_time(at_date, at_time, float_format)
+        cache_key = self._cache_key("info", gps_time)
+        self.info = self._get_cached(cache_key, "info")
+        if self.info is not None:
+            return
         self.info = {}
         for info in self.session.query(partconn.PartInfo).filter(
             (partconn.PartInfo.posting_gpstime <= gps_time)
@@ -249,6 +406,7 @@ class ActiveData:
             key = cm_utils.make_part_key(info.hpn, info.hpn_rev)
             self.info.setdefault(key, [])
             self.info[key].append(copy(info))
+        self._set_cached(cache_key, "info", self.info)
 
     def load_rosetta(self, at_date=None, at_time=None, float_format=None):
         """
@@ -277,21 +435,25 @@ class ActiveData:
 
         """
         gps_time = self.set_active_time(at_date, at_time, float_format)
-        self.rosetta = {}
-        fnd_syspn = []
-        for rose in self.session.query(partconn.PartRosetta).filter(
-            (partconn.PartRosetta.start_gpstime <= gps_time)
-            & (
-                (partconn.PartRosetta.stop_gpstime > gps_time)
-                | (partconn.PartRosetta.stop_gpstime == None)  # noqa
-            )
-        ):
-            if rose.syspn in fnd_syspn:
-                raise ValueError(
-                    "System part number {} already found.".format(rose.syspn)
+        cache_key = self._cache_key("rosetta", gps_time)
+        self.rosetta = self._get_cached(cache_key, "rosetta")
+        if self.rosetta is None:
+            self.rosetta = {}
+            fnd_syspn = []
+            for rose in self.session.query(partconn.PartRosetta).filter(
+                (partconn.PartRosetta.start_gpstime <= gps_time)
+                & (
+                    (partconn.PartRosetta.stop_gpstime > gps_time)
+                    | (partconn.PartRosetta.stop_gpstime == None)  # noqa
                 )
-            fnd_syspn.append(rose.syspn)
-            self.rosetta[rose.hpn] = copy(rose)
+            ):
+                if rose.syspn in fnd_syspn:
+                    raise ValueError(
+                        "System part number {} already found.".format(rose.syspn)
+                    )
+                fnd_syspn.append(rose.syspn)
+                self.rosetta[rose.hpn] = copy(rose)
+            self._set_cached(cache_key, "rosetta", self.rosetta)
         if self.parts is not None:
             for key, part in self.parts.items():
                 try:
@@ -322,6 +484,10 @@ class ActiveData:
 
         """
         gps_time = self.set_active_time(at_date, at_time, float_format)
+        cache_key = self._cache_key("apriori", gps_time, rev)
+        self.apriori = self._get_cached(cache_key, "apriori")
+        if self.apriori is not None:
+            return
         self.apriori = {}
         apriori_keys = []
         for astat in self.session.query(partconn.AprioriAntenna).filter(
@@ -336,6 +502,7 @@ class ActiveData:
                 raise ValueError("{} already has an active apriori state.".format(key))
             apriori_keys.append(key)
             self.apriori[key] = copy(astat)
+        self._set_cached(cache_key, "apriori", self.apriori)
 
     def load_geo(self, at_date=None, at_time=None, float_format=None):
         """
@@ -360,12 +527,17 @@ class ActiveData:
         from . import geo_location
 
         gps_time = self.set_active_time(at_date, at_time, float_format)
+        cache_key = self._cache_key("geo", gps_time)
+        self.geo = self._get_cached(cache_key, "geo")
+        if self.geo is not None:
+            return
         self.geo = {}
         for ageo in self.session.query(geo_location.GeoLocation).filter(
             geo_location.GeoLocation.created_gpstime <= gps_time
         ):
             key = cm_utils.make_part_key(ageo.station_name, None)
             self.geo[key] = copy(ageo)
+        self._set_cached(cache_key, "geo", self.geo)
 
     def get_hptype(self, hptype):
         """
@@ -421,32 +593,28 @@ class ActiveData:
         rev_dict = {}
         for hloop in hpn:
             rev_dict[hloop] = {}
-            for part in self.parts.values():
-                phup = part.hpn.upper()
-                use_this_one = (
-                    (phup == hloop) if exact_match else phup.startswith(hloop)
+            for key in self.part_index.find(hloop, exact_match=exact_match):
+                part = self.parts[key]
+                prup = part.hpn_rev.upper()
+                rev_dict[hloop].setdefault(
+                    prup,
+                    Namespace(
+                        hpn=hloop,
+                        rev=prup,
+                        number=0,
+                        started=part.start_gpstime,
+                        ended=part.stop_gpstime,
+                    ),
                 )
-                if use_this_one:
-                    prup = part.hpn_rev.upper()
-                    rev_dict[hloop].setdefault(
-                        prup,
-                        Namespace(
-                            hpn=hloop,
-                            rev=prup,
-                            number=0,
-                            started=part.start_gpstime,
-                            ended=part.stop_gpstime,
-                        ),
-                    )
-                    rev_dict[hloop][prup].number += 1
-                    if part.start_gpstime < rev_dict[hloop][prup].started:
-                        rev_dict[hloop][prup].started = part.start_gpstime
-                    if rev_dict[hloop][prup].ended is not None:
-                        if (
-                            part.stop_gpstime is None
-                            or part.stop_gpstime > rev_dict[hloop][prup].ended
-                        ):
-                            rev_dict[hloop][prup].ended = part.stop_gpstime
+                rev_dict[hloop][prup].number += 1
+                if part.start_gpstime < rev_dict[hloop][prup].started:
+                    rev_dict[hloop][prup].started = part.start_gpstime
+                if rev_dict[hloop][prup].ended is not None:
+                    if (
+                        part.stop_gpstime is None
+                        or part.stop_gpstime > rev_dict[hloop][prup].ended
+                    ):
+                        rev_dict[hloop][prup].ended = part.stop_gpstime
         hpn_rev = []
         for hloop in sorted(rev_dict.keys()):
             for rev in sorted(rev_dict[hloop].keys()):
@@ -2,10 +2,21 @@
 
 import json
 import os.path
-import re
+import time
 
 from . import cm_table_info, mc
 
+# extra indexes for the lookups done on the sqlite CM snapshot, the primary keys
+# already cover lookups on their leading columns
+sqlite_indexes = {
+    "connections": [["downstream_part", "down_part_rev"]],
+    "parts": [["hptype"]],
+    "part_rosetta": [["hpn"]],
+    "geo_location": [["station_type_name"]],
+}
+# number of rows per executemany call when copying to sqlite
+SQLITE_BATCH_SIZE = 5000
+
 
 class SqliteHandling:
     """
@@ -19,6 +30,10 @@ class SqliteHandling:
         List of files to be used in hash comparisons.  If None uses default.
     cm_table_hash_file : str
         Name of json file that archives the previous hash set.
+    hash_cache_file : str
+        Path to the json file that caches the file hashes (keyed on the csv file
+        path) with the file modification time and size, so unchanged files are
+        not re-hashed.
     hash_dict : dict
         Dictionary containing the current hashes.
     testing : bool
@@ -31,6 +46,7 @@ class SqliteHandling:
         cm_table_list=None,
         cm_table_hash_file="cm_table_file_hash.json",
         testing=False,
+        hash_cache_file=mc.cm_hash_cache_file,
     ):
         """
         Initialize class by setting the class attributes to supplied or defaults.
@@ -45,6 +61,9 @@ class SqliteHandling:
             Name of json file that archives the previous hash set.
         testing : bool
             Flag to denote testing (sets directory and sql file generation)
+        hash_cache_file : str
+            Path to the json file caching the file hashes, defaults to one in
+            ~/.hera_mc so no local state is written to the csv directory.
         """
         if cm_csv_path is None:
             cm_csv_path = mc.get_cm_csv_path(testing=testing)
@@ -53,6 +72,7 @@ class SqliteHandling:
             cm_table_list = cm_table_info.cm_tables.keys()
         self.cm_table_list = cm_table_list
         self.cm_table_hash_file = os.path.join(self.cm_csv_path, cm_table_hash_file)
+        self.hash_cache_file = hash_cache_file
         self.testing = testing
         self.hash_dict = None
 
@@ -86,12 +106,79 @@ class SqliteHandling:
         return False
 
     def get_table_hash_dict(self):
-        """Compute the hash_dict for the data csv files."""
+        """
+        Compute the hash_dict for the data csv files.
+
+        Hashes of files with the same modification time and size as when they
+        were last hashed are taken from the hash cache file.
+        """
+        try:
+            with open(self.hash_cache_file, "r") as fp:
+                hash_cache = json.load(fp)
+        except (OSError, ValueError):
+            hash_cache = {}
+
         self.hash_dict = {}
+        # the cache file is shared by all csv directories, keep the other entries
+        new_cache = dict(hash_cache)
         for table in self.cm_table_list:
             fn = "{}{}.csv".format(cm_table_info.data_prefix, table)
             csv_file = os.path.join(self.cm_csv_path, fn)
-            self.hash_dict[fn] = hash_file(csv_file)
+            cache_key = os.path.abspath(csv_file)
+            try:
+                stat = os.stat(csv_file)
+            except OSError:
+                self.hash_dict[fn] = None
+                new_cache.pop(cache_key, None)
+                continue
+            cached = hash_cache.get(cache_key)
+            if (
+                isinstance(cached, dict)
+                and cached.get("mtime_ns") == stat.st_mtime_ns
+                and cached.get("size") == stat.st_size
+            ):
+                self.hash_dict[fn] = cached["hash"]
+            else:
+                self.hash_dict[fn] = hash_file(csv_file)
+            new_cache[cache_key] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "hash": self.hash_dict[fn],
+            }
+
+        if new_cache != hash_cache:
+            try:
+                with open(self.hash_cache_file, "w") as fp:
+                    json.dump(new_cache, fp, indent=4)
+            except OSError:  # pragma: no cover
+                # the cache is only an optimization
+                pass
+
+    def changed_tables(self):
+        """
+        Get the tables with csv file hashes that differ from the previous hash set.
+
+        Returns
+        -------
+        list of str
+            Names of the tables that changed, all of them if there is no
+            previous hash file.
+        """
+        if self.hash_dict is None:
+            self.get_table_hash_dict()
+        try:
+            with open(self.cm_table_hash_file, "r") as fp:
+                previous_hash_dict = json.load(fp)
+        except (OSError, ValueError):
+            return list(self.cm_table_list)
+        changed = []
+        for table in self.cm_table_list:
+            fn = "{}{}.csv".format(cm_table_info.data_prefix, table)
+            if fn not in previous_hash_dict or (
+                self.hash_dict.get(fn) != previous_hash_dict[fn]
+            ):
+                changed.append(table)
+        return changed
 
     def write_table_hash_dict(self):
         """Write the hash of the csv data-files to json hash_file."""
@@ -100,28 +187,37 @@ class SqliteHandling:
         with open(self.cm_table_hash_file, "w") as fp:
             json.dump(self.hash_dict, fp, indent=4)
 
-    def update_sqlite(self, db_file="hera_mc.db"):
+    def update_sqlite(self, db_file="hera_mc.db", tables=None):
         """
-        Dump the psql database to sqlite file.
+        Copy the CM tables from the psql database to the sqlite file.
+
+        Any missing tables (or tables whose columns no longer match the code
+        schema) are created, then the requested CM tables are replaced in a
+        single transaction, so readers see either the old or the new
+        snapshot. The file uses the WAL journal mode and has indexes for the
+        common CM lookups.
 
-        Parameter
-        ---------
-        table_dump_list : list of str
-            List containing name of tables to dump to sqlite.
+        Parameters
+        ----------
+        db_file : str
+            Name of the sqlite file to update in cm_csv_path.
+        tables : list of str, optional
+            Names of the CM tables to copy, defaults to all tables in
+            cm_table_list. Use `changed_tables` to only copy the tables whose
+            csv files changed. Tables that had to be (re)created are always
+            copied.
+
+        Returns
+        -------
+        list of str
+            Names of the tables that were copied.
         """
-        import subprocess
+        from sqlalchemy import create_engine, inspect, select
 
-        schema_file = os.path.join(self.cm_csv_path, "schema.sql")
-        inserts_file = os.path.join(self.cm_csv_path, "inserts.sql")
-        testtag = ""
-        if self.testing:
-            testtag = "tst"
-            schema_file += testtag
-            inserts_file += testtag
+        from . import MCDeclarativeBase, _import_table_modules
 
-        postgres_port = 5432
-        if "POSTGRES_PORT" in os.environ:
-            postgres_port = os.environ["POSTGRES_PORT"]
+        _import_table_modules()
+        start = time.perf_counter()
 
         with open(os.path.expanduser("~/.hera_mc/mc_config.json")) as f:
             config_data = json.load(f)
@@ -129,75 +225,79 @@ class SqliteHandling:
             db_url = config_data["databases"][db_name]["url"]
             if self.testing:
                 db_url = config_data["databases"]["testing"]["url"]
+        if "postgresql" in db_url and "postgresql+psycopg" not in db_url:
+            db_url = db_url.replace("postgresql", "postgresql+psycopg")
+
+        if tables is None:
+            tables = list(self.cm_table_list)
+        else:
+            tables = list(tables)
 
-        subprocess.call(
-            f"pg_dump -s -p {postgres_port} -d {db_url} > {schema_file}", shell=True
-        )
-        dump = (
-            f"pg_dump --inserts --data-only  -p {postgres_port} -d {db_url} -t "
-            "{} > {}".format(" -t ".join(self.cm_table_list), inserts_file)
-        )
-        subprocess.call(dump, shell=True)
-
-        schema = ""
-        creating_table = False
-        with open(schema_file, "r") as f:
-            lines = f.readlines()
-            msg = f"Schema dump failed, schema file {schema_file} is empty. "
-            assert len(lines) > 0, msg
-            for line in lines:
-                interline = line + ""
-                if "[]" in line:
-                    # want to convert any array column to a character varying column.
-                    # first find the column name (must be a single word)
-                    name_match = re.search(r"[\w]+", line)
-                    column_name = name_match.group(0)
-                    # then search after the column name for the type, which can be
-                    # multiple words and ends in "[]"
-                    type_match = re.search(
-                        r"([a-zA-Z ]+)\[\]", line.split(column_name)[-1]
-                    )
-                    column_type = type_match.group(0).strip(" ")
-                    interline = line.replace(column_type, "character varying")
-                modline = interline.replace("public.", "")
-
-                if "CREATE TABLE" in modline:
-                    creating_table = True
-                    schema += modline
-                    continue
-                if creating_table:
-                    # The DEFAULT clause is apparently sometimes written this way and
-                    # sometimes written differently (by defining the sequence and then
-                    # assigning it to the column). Using a pragma because I cannot
-                    # guarantee that this will be triggered.
-                    if "DEFAULT" in modline:  # pragma: no cover
-                        dat = modline.split()
-                        schema += dat[0] + " " + dat[1] + "\n"
-                    else:
-                        schema += modline
-                    if ");" in modline:
-                        creating_table = False
-
-        inserts = ""
-        with open(inserts_file, "r") as f:
-            lines = f.readlines()
-            msg = f"Inserts dump failed, inserts file {inserts_file} is empty. "
-            assert len(lines) > 0, msg
-            for line in lines:
-                modline = line.replace("public.", "")
-                if "INSERT" in modline:
-                    inserts += modline
-
-        sqlfile = os.path.join(self.cm_csv_path, "cm_hera.sql")
         dbfile_full = os.path.join(self.cm_csv_path, db_file)
-        with open(sqlfile, "w") as f:
-            f.write(schema)
-            f.write(inserts)
-            f.write(".save {}\n".format(dbfile_full))
-        subprocess.call("sqlite3 < {}".format(sqlfile), shell=True)
-        os.remove(schema_file)
-        os.remove(inserts_file)
-        os.remove(sqlfile)
+        sqlite_engine = create_engine("sqlite:///" + dbfile_full)
+        psql_engine = create_engine(db_url)
+        try:
+            with sqlite_engine.connect() as conn:
+                conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+            # make sure the schema matches, (re)creating tables if needed
+            insp = inspect(sqlite_engine)
+            existing_tables = set(insp.get_table_names())
+            recreate = []
+            for name, table in MCDeclarativeBase.metadata.tables.items():
+                if name in existing_tables and {
+                    col["name"] for col in insp.get_columns(name)
+                } != {col.name for col in table.columns}:
+                    recreate.append(table)
+            for table in recreate:
+                table.drop(sqlite_engine)
+            created = [
+                name
+                for name in MCDeclarativeBase.metadata.tables
+                if name not in existing_tables
+                or MCDeclarativeBase.metadata.tables[name] in recreate
+            ]
+            MCDeclarativeBase.metadata.create_all(sqlite_engine)
+            for table in self.cm_table_list:
+                if table in created and table not in tables:
+                    tables.append(table)
+
+            # tables are deleted in this order and copied in reverse order
+            tables = cm_table_info.order_the_tables(tables)
+            sa_tables = [
+                cm_table_info.cm_tables[table][0].__table__ for table in tables
+            ]
+            with psql_engine.connect() as psql_conn, sqlite_engine.begin() as conn:
+                for sa_table in sa_tables:
+                    conn.execute(sa_table.delete())
+                for sa_table in reversed(sa_tables):
+                    columns = list(sa_table.columns.keys())
+                    result = psql_conn.execution_options(
+                        yield_per=SQLITE_BATCH_SIZE
+                    ).execute(select(*sa_table.columns))
+                    for partition in result.partitions():
+                        conn.execute(
+                            sa_table.insert(),
+                            [dict(zip(columns, row)) for row in partition],
+                        )
+
+                for table, index_columns_list in sqlite_indexes.items():
+                    for index_columns in index_columns_list:
+                        conn.exec_driver_sql(
+                            "CREATE INDEX IF NOT EXISTS ix_{0}_{1} ON {0} ({2})".format(
+                                table, "_".join(index_columns), ", ".join(index_columns)
+                            )
+                        )
+        finally:
+            sqlite_engine.dispose()
+            psql_engine.dispose()
+
+        print(
+            "Updated {} tables in {} in {:.2f} s".format(
+                len(tables), dbfile_full, time.perf_counter() - start
+            )
+        )
+        return tables
 
 
 def hash_file(filename):
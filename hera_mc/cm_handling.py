@@ -152,11 +152,10 @@ class Handling:
             all_hpn = []
             all_rev = []
             for h_hpn, h_rev in match_list:
-                for key in active.parts.keys():
-                    if key.upper().startswith(h_hpn):
-                        k_hpn, k_rev = cm_utils.split_part_key(key)
-                        all_hpn.append(k_hpn.upper())
-                        all_rev.append(h_rev)
+                for key in active.part_index.find(h_hpn):
+                    k_hpn, k_rev = cm_utils.split_part_key(key)
+                    all_hpn.append(k_hpn.upper())
+                    all_rev.append(h_rev)
             match_list = cm_utils.match_list(all_hpn, all_rev, case_type="upper")
         return match_list
 
@@ -6,14 +6,23 @@
 """Find and display part hookups."""
 
 import copy
+import glob
 import json
+import mmap
 import os
+import struct
+import zlib
 from argparse import Namespace
+from collections.abc import Mapping
+from math import floor
 
 from astropy.time import Time
 
 from . import cm_active, cm_dossier, cm_sysdef, cm_transfer, cm_utils, mc
 
+HOOKUP_CACHE_MAGIC = b"HMCHUC01"
+_HOOKUP_CACHE_HEADER_LEN = struct.Struct("<Q")
+
 
 def get_hookup(
     hpn,
@@ -79,6 +88,326 @@ def get_hookup(
         )
 
 
+class SignalPathGraph(object):
+    """
+    Compiled adjacency representation of the active connections.
+
+    Parts are given integer ids and each part carries a per-port next-hop map
+    for both directions, so following a hookup is a tight loop over ids rather
+    than repeated dictionary look-ups, upper-casing and port filtering.  The
+    allowed ports are computed once per (hookup_type, part_type, pol) and the
+    filtered port options once per (direction, part, hookup_type, pol).
+
+    The port selection reproduces Hookup._get_port exactly, so the resulting
+    connection lists are identical to the uncompiled walk.
+
+    Parameters
+    ----------
+    active : ActiveData object
+        ActiveData with the parts and connections loaded.
+    sysdef : Sysdef object
+        System definition used to get the allowed ports.
+
+    """
+
+    def __init__(self, active, sysdef):
+        self.sysdef = sysdef
+        self.part_keys = list(active.parts.keys())
+        self.part_id = {key: i for i, key in enumerate(self.part_keys)}
+        self.hpn = [part.hpn.upper() for part in active.parts.values()]
+        self.part_type = [part.hptype for part in active.parts.values()]
+        # next_hop[odir][i] is keyed on the port of part i and holds the
+        # connection, the id of the part at the other end (None if that part is
+        # not active) and the port on that part.  odir is the direction opposite
+        # to the direction of travel, as in the connections dict.
+        self.next_hop = {"up": [None] * len(self.hpn), "down": [None] * len(self.hpn)}
+        for key, conns in active.connections["up"].items():
+            i = self.part_id.get(key)
+            if i is None:
+                continue
+            self.next_hop["up"][i] = {
+                port: (
+                    conn,
+                    self.part_id.get(
+                        cm_utils.make_part_key(conn.downstream_part, conn.down_part_rev)
+                    ),
+                    conn.downstream_input_port.upper(),
+                )
+                for port, conn in conns.items()
+            }
+        for key, conns in active.connections["down"].items():
+            i = self.part_id.get(key)
+            if i is None:
+                continue
+            self.next_hop["down"][i] = {
+                port: (
+                    conn,
+                    self.part_id.get(
+                        cm_utils.make_part_key(conn.upstream_part, conn.up_part_rev)
+                    ),
+                    conn.upstream_output_port.upper(),
+                )
+                for port, conn in conns.items()
+            }
+        self._allowed_ports = {}
+        self._port_options = {}
+
+    def allowed_ports(self, hookup_type, part_type, pol):
+        """
+        Return the allowed ports for a part_type and pol.
+
+        Membership is checked against the upper-cased get_ports output, as
+        done in Hookup._get_port.
+
+        Parameters
+        ----------
+        hookup_type : str
+            Hookup type (the sysdef hookup_type is set to it to get the ports).
+        part_type : str
+            Part type of the part.
+        pol : str
+            Polarization being followed.
+
+        Returns
+        -------
+        str
+            Upper-cased port definition used to check port membership.
+
+        """
+        akey = (hookup_type, part_type, pol)
+        if akey not in self._allowed_ports:
+            self.sysdef.hookup_type = hookup_type
+            self._allowed_ports[akey] = cm_utils.to_upper(
+                self.sysdef.get_ports(pol, part_type)
+            )
+        return self._allowed_ports[akey]
+
+    def port_options(self, direction, part_id, hookup_type, pol):
+        """
+        Return the allowed ports on a part that have a connection in direction.
+
+        Parameters
+        ----------
+        direction : str
+            'up' or 'down', the side of the connections dict to use.
+        part_id : int
+            Integer id of the part.
+        hookup_type : str
+            Hookup type.
+        pol : str
+            Polarization being followed.
+
+        Returns
+        -------
+        list
+            Ports, in the order of the connections dict.
+
+        """
+        okey = (direction, part_id, hookup_type, pol)
+        if okey not in self._port_options:
+            hops = self.next_hop[direction][part_id]
+            allowed = self.allowed_ports(hookup_type, self.part_type[part_id], pol)
+            self._port_options[okey] = (
+                [] if hops is None else [p for p in hops if p in allowed]
+            )
+        return self._port_options[okey]
+
+    def follow(self, key, port_pol, hookup_type, single_pol_labeled_parts):
+        """
+        Follow the connections upstream and downstream from a part.
+
+        Parameters
+        ----------
+        key : str
+            Part key (hpn:rev) of the starting part.
+        port_pol : str
+            Port polarization to follow.  Should be 'E<port' or 'N<port'.
+        hookup_type : str
+            Hookup type to use.
+        single_pol_labeled_parts : list
+            Part types that are labeled with a single polarization.
+
+        Returns
+        -------
+        list
+            List of connections for that hookup.
+
+        """
+        part_id = self.part_id[key]
+        pol, port = port_pol.split("<")
+        pol = pol.upper()
+        single_pol = self.part_type[part_id] in single_pol_labeled_parts
+        upstream = self._walk("up", part_id, port.upper(), pol, hookup_type, single_pol)
+        downstream = self._walk(
+            "down", part_id, port.upper(), pol, hookup_type, single_pol
+        )
+        return upstream[::-1] + downstream
+
+    def _walk(self, direction, part_id, port, pol, hookup_type, single_pol):
+        odir = cm_sysdef.Sysdef.opposite_direction[direction]
+        next_hop = self.next_hop[odir]
+        chain = []
+        while True:
+            hops = next_hop[part_id]
+            if hops is None:
+                break
+            this_port = self._choose_port(
+                port,
+                self.port_options(odir, part_id, hookup_type, pol),
+                self.hpn[part_id],
+                pol,
+                single_pol,
+            )
+            if this_port is None:
+                break
+            conn, next_id, port = hops[this_port]
+            if next_id is None:  # pragma: no cover
+                break
+            port = self._choose_port(
+                port,
+                self.port_options(direction, next_id, hookup_type, pol),
+                self.hpn[next_id],
+                pol,
+                single_pol,
+            )
+            chain.append(conn)
+            part_id = next_id
+        return chain
+
+    @staticmethod
+    def _choose_port(port, options, part, pol, single_pol):
+        if port is None:
+            return None
+        if single_pol and part[-1] == pol[0]:
+            return options[0]
+        if len(options) == 1:
+            return options[0]
+        if port in options:
+            return port
+        for p in options:
+            if p[0] == pol[0]:
+                return p
+
+
+class HookupCacheFile(Mapping):
+    """
+    Read-only, lazily loaded view of a binary hookup cache file.
+
+    The file is a magic string, the length of a json header and the header,
+    followed by one zlib-compressed json record per hookup entry.  The header
+    holds the cache metadata, the shared sysdef and an index of the record
+    offsets, so the file is memory-mapped and entries are only decoded (and
+    then kept) when they are accessed.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the cache file.
+
+    Attributes
+    ----------
+    header : dict
+        Cache metadata:  at_date_gps, hookup_type, hookup_list, cm_git_hash,
+        cm_update_time, part_type_cache, n_fully_connected, sysdef and index.
+
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        nmagic = len(HOOKUP_CACHE_MAGIC)
+        if self._mmap[:nmagic] != HOOKUP_CACHE_MAGIC:
+            self._mmap.close()
+            raise ValueError("{} is not a hookup cache file.".format(filename))
+        start = nmagic + _HOOKUP_CACHE_HEADER_LEN.size
+        (header_len,) = _HOOKUP_CACHE_HEADER_LEN.unpack(self._mmap[nmagic:start])
+        self.header = json.loads(self._mmap[start : start + header_len])
+        self._data_start = start + header_len
+        self._index = self.header["index"]
+        self._entries = {}
+
+    def __getitem__(self, key):
+        """Decode (once) and return the HookupEntry for key."""
+        if key not in self._entries:
+            offset, length = self._index[key]
+            offset += self._data_start
+            entry = json.loads(zlib.decompress(self._mmap[offset : offset + length]))
+            entry["sysdef"] = self.header["sysdef"]
+            self._entries[key] = cm_dossier.HookupEntry(input_dict=entry)
+        return self._entries[key]
+
+    def __iter__(self):
+        """Iterate over the entry keys."""
+        return iter(self._index)
+
+    def __len__(self):
+        """Return the number of entries."""
+        return len(self._index)
+
+    def __contains__(self, key):
+        """Check for an entry key without decoding it."""
+        return key in self._index
+
+    def close(self):
+        """Close the memory map, entries that were not decoded can't be read after."""
+        self._mmap.close()
+
+    def __enter__(self):
+        """Use as a context manager that closes the file on exit."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the memory map."""
+        self.close()
+
+    @staticmethod
+    def write(filename, hookup_dict, header):
+        """
+        Write a hookup dict to a binary hookup cache file.
+
+        The file is written to a temporary name and moved into place, so readers
+        never see a partially written file.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the cache file.
+        hookup_dict : dict
+            Hookup dictionary of HookupEntry objects.
+        header : dict
+            Cache metadata to write in the header.  The sysdef, index and
+            n_fully_connected entries are added here.
+
+        """
+        header = dict(header)
+        header["index"] = {}
+        header["n_fully_connected"] = 0
+        header["sysdef"] = None
+        records = []
+        offset = 0
+        for key, entry in hookup_dict.items():
+            entry = entry._to_dict()
+            # The sysdef is shared by all entries so is only written once.
+            header["sysdef"] = entry.pop("sysdef")
+            record = zlib.compress(
+                json.dumps(entry, separators=(",", ":")).encode("utf-8")
+            )
+            header["index"][key] = [offset, len(record)]
+            header["n_fully_connected"] += sum(entry["fully_connected"].values())
+            records.append(record)
+            offset += len(record)
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        tmp_filename = "{}.{}.tmp".format(filename, os.getpid())
+        with open(tmp_filename, "wb") as fp:
+            fp.write(HOOKUP_CACHE_MAGIC)
+            fp.write(_HOOKUP_CACHE_HEADER_LEN.pack(len(header_bytes)))
+            fp.write(header_bytes)
+            for record in records:
+                fp.write(record)
+        os.replace(tmp_filename, filename)
+
+
 class Hookup(object):
     """
     Class to find and display the signal path hookup information.
@@ -93,14 +422,18 @@ class Hookup(object):
     """
 
     hookup_list_to_cache = cm_sysdef.hera_zone_prefixes
-    hookup_cache_file = os.path.expanduser("~/.hera_mc/hookup_cache_3.json")
+    hookup_cache_dir = os.path.expanduser("~/.hera_mc")
+    hookup_cache_prefix = "hookup_cache_4_"
+    hookup_cache_file = None
 
     def __init__(self, session):
         self.session = session
         self.part_type_cache = {}
         self.cached_hookup_dict = None
+        self.cached_hookup_index = None
         self.sysdef = cm_sysdef.Sysdef()
         self.active = None
+        self.signal_path = None
 
     def get_hookup_from_db(
         self,
@@ -159,8 +492,11 @@ class Hookup(object):
         self.active.load_parts(at_date=None)
         self.active.load_connections(at_date=None)
         self.active.load_apriori(at_date=None)
+        self.signal_path = SignalPathGraph(self.active, self.sysdef)
         hpn, exact_match = self._proc_hpnlist(hpn, exact_match)
-        parts = self._cull_dict(hpn, self.active.parts, exact_match)
+        parts = self._cull_dict(
+            hpn, self.active.parts, exact_match, index=self.active.part_index
+        )
         hookup_dict = {}
         for k, part in parts.items():
             self.hookup_type = self.sysdef.find_hookup_type(
@@ -184,8 +520,13 @@ class Hookup(object):
             self.sysdef.setup(part=part, pol=pol, hookup_type=self.hookup_type)
             hookup_dict[k] = cm_dossier.HookupEntry(entry_key=k, sysdef=self.sysdef)
             for port_pol in self.sysdef.ppkeys:
-                hookup_dict[k].hookup[port_pol] = self._follow_hookup_stream(
-                    part=part.hpn, rev=part.hpn_rev, port_pol=port_pol
+                hookup_dict[k].hookup[port_pol] = self.signal_path.follow(
+                    key=k,
+                    port_pol=port_pol,
+                    hookup_type=self.hookup_type,
+                    single_pol_labeled_parts=self.sysdef.single_pol_labeled_parts[
+                        self.hookup_type
+                    ],
                 )
                 part_types_found = self._get_part_types_found(
                     hookup_dict[k].hookup[port_pol]
@@ -222,7 +563,9 @@ class Hookup(object):
         hpn : str, list
             List/string of input hera part number(s) (whole or 'startswith')
             If string
-                - 'cache' returns the entire cache file
+                - 'cache' returns the entire cache file for the CM version at at_date,
+                  as a read-only HookupCacheFile Mapping (not a dict) that stays
+                  readable until the cache is read or written again by this object
                 - 'default' uses default station prefixes in cm_sysdef
                 - otherwise converts as csv-list
             If element of list is of format '.xxx:a/b/c' it finds the appropriate
@@ -240,8 +583,8 @@ class Hookup(object):
             would allow 'HH1', 'HH10', 'HH123', etc.
         use_cache : bool
             Flag to force the cache to be read, if present and keys agree.
-            This is largely deprecated, but kept for archival possibilities
-            for the future.
+            The cache file for the CM version in effect at at_date is used and only
+            the requested entries are decoded.
         hookup_type : str or None
             Type of hookup to use.  Default is 'parts_hera'.
             If 'None' it will determine which system it thinks it is based on
@@ -250,8 +593,9 @@ class Hookup(object):
 
         Returns
         -------
-        dict
-            Hookup dossier dictionary as defined in cm_dossier.py
+        dict or HookupCacheFile
+            Hookup dossier dictionary as defined in cm_dossier.py (a HookupCacheFile
+            Mapping for hpn='cache').
 
         """
         at_date = cm_utils.get_astropytime(at_date, at_time, float_format)
@@ -259,14 +603,24 @@ class Hookup(object):
         self.hookup_type = hookup_type
 
         if isinstance(hpn, str) and hpn.lower() == "cache":
-            self.read_hookup_cache_from_file()
+            self.read_hookup_cache_from_file(at_date)
             return self.cached_hookup_dict
 
         if use_cache:
             hpn, exact_match = self._proc_hpnlist(hpn, exact_match)
-            if self._requested_list_OK_for_cache(hpn):
-                self.read_hookup_cache_from_file()
-                return self._cull_dict(hpn, self.cached_hookup_dict, exact_match)
+            cache_file = self.get_hookup_cache_file(at_date)
+            if (
+                self._requested_list_OK_for_cache(hpn)
+                and cache_file is not None
+                and os.path.exists(cache_file)
+            ):
+                self.read_hookup_cache_from_file(at_date)
+                return self._cull_dict(
+                    hpn,
+                    self.cached_hookup_dict,
+                    exact_match,
+                    index=self.cached_hookup_index,
+                )
 
         return self.get_hookup_from_db(
             hpn=hpn,
@@ -464,7 +818,7 @@ class Hookup(object):
         return full_info_string
 
     # ################################ Internal methods ######################################
-    def _cull_dict(self, hpn, search_dict, exact_match):
+    def _cull_dict(self, hpn, search_dict, exact_match, index=None):
         """
         Determine the complete appropriate set of parts to use within search_dict.
 
@@ -483,27 +837,20 @@ class Hookup(object):
         exact_match : bool
             If False, will only check the first characters in each hpn entry.  E.g. 'HH1'
             would allow 'HH1', 'HH10', 'HH123', etc
+        index : cm_utils.PartKeyIndex or None
+            Index of the keys of search_dict (e.g. ActiveData.part_index).  If None,
+            one is built from search_dict.
 
         Returns
         -------
         dict
             Contains the found entries within search_dict
         """
-        hpn_upper = [x.upper() for x in hpn]
+        if index is None:
+            index = cm_utils.PartKeyIndex(search_dict)
         found_dict = {}
-        for key in search_dict.keys():
-            hpn, rev = cm_utils.split_part_key(key.upper())
-            use_this_one = False
-            if exact_match:
-                if hpn in hpn_upper:
-                    use_this_one = True
-            else:
-                for hlu in hpn_upper:
-                    if hpn.startswith(hlu):
-                        use_this_one = True
-                        break
-            if use_this_one:
-                found_dict[key] = copy.copy(search_dict[key])
+        for key in index.find(hpn, exact_match=exact_match):
+            found_dict[key] = copy.copy(search_dict[key])
         return found_dict
 
     def _proc_hpnlist(self, hpn_request, exact_match):
@@ -566,6 +913,9 @@ class Hookup(object):
         """
         Follow a list of connections upstream and downstream.
 
+        This is the uncompiled walk over the connections dict, see
+        SignalPathGraph.follow for the one used by get_hookup_from_db.
+
         Parameters
         ----------
         part : str
@@ -759,9 +1109,67 @@ class Hookup(object):
         return headers
 
     # ############################### Cache file methods #####################################
+    def _close_cached_hookup(self):
+        """Close the memory map of a previously read cache file, if any."""
+        if isinstance(self.cached_hookup_dict, HookupCacheFile):
+            self.cached_hookup_dict.close()
+        self.cached_hookup_dict = None
+        self.cached_hookup_index = None
+
+    def _get_cm_version(self, at_date):
+        """
+        Get the CMVersion row in effect at at_date.
+
+        Parameters
+        ----------
+        at_date : astropy Time object
+            Date for which to get the CMVersion.
+
+        Returns
+        -------
+        CMVersion object or None
+            None if there is no CMVersion at or before at_date.
+
+        """
+        return (
+            self.session.query(cm_transfer.CMVersion)
+            .filter(cm_transfer.CMVersion.update_time <= int(floor(at_date.gps)))
+            .order_by(cm_transfer.CMVersion.update_time.desc())
+            .first()
+        )
+
+    def get_hookup_cache_file(self, at_date=None):
+        """
+        Return the name of the cache file for the CM version in effect at at_date.
+
+        Cache files are keyed on the CM git hash, so files for different CM
+        versions coexist and older at_dates use the file for their CM version.
+
+        Parameters
+        ----------
+        at_date : anything interpretable by cm_utils.get_astropytime or None
+            Date for which to get the cache file.  None uses self.at_date if it
+            has been set, otherwise 'now'.
+
+        Returns
+        -------
+        str or None
+            Cache file name, None if there is no CMVersion at or before at_date.
+
+        """
+        if at_date is None:
+            at_date = getattr(self, "at_date", "now")
+        cm_version = self._get_cm_version(cm_utils.get_astropytime(at_date))
+        if cm_version is None:
+            return None
+        return os.path.join(
+            self.hookup_cache_dir,
+            "{}{}.bin".format(self.hookup_cache_prefix, cm_version.git_hash),
+        )
+
     def write_hookup_cache_to_file(self, log_msg="Write."):
         """
-        Write the current hookup to the cache file.
+        Write the current hookup to the cache file for the current CM version.
 
         Parameters
         ----------
@@ -770,9 +1178,23 @@ class Hookup(object):
             This should be a short description of wny a new cache file is being written.
             E.g. "Found new antenna." or "Cronjob to ensure cache file up to date."
 
+        Raises
+        ------
+        ValueError
+            If there is no CM version in the database, since the cache files are
+            keyed on the CM git hash.
+
         """
         self.at_date = cm_utils.get_astropytime("now")
+        cm_version = self._get_cm_version(self.at_date)
+        if cm_version is None:
+            raise ValueError(
+                "No CM version at {}, so the hookup cache file cannot be written.".format(
+                    cm_utils.get_time_for_display(self.at_date)
+                )
+            )
         self.hookup_type = "parts_hera"
+        self._close_cached_hookup()
         self.cached_hookup_dict = self.get_hookup_from_db(
             self.hookup_list_to_cache,
             pol="all",
@@ -780,20 +1202,18 @@ class Hookup(object):
             exact_match=False,
             hookup_type=self.hookup_type,
         )
-        hookup_dict_for_json = copy.deepcopy(self.cached_hookup_dict)
-        for key, value in self.cached_hookup_dict.items():
-            if isinstance(value, cm_dossier.HookupEntry):
-                hookup_dict_for_json[key] = value._to_dict()
-
-        save_dict = {
+        self.cached_hookup_index = cm_utils.PartKeyIndex(self.cached_hookup_dict)
+        self.hookup_cache_file = self.get_hookup_cache_file(self.at_date)
+        header = {
             "at_date_gps": self.at_date.gps,
             "hookup_type": self.hookup_type,
             "hookup_list": self.hookup_list_to_cache,
-            "hookup_dict": hookup_dict_for_json,
+            "cm_git_hash": cm_version.git_hash,
+            "cm_update_time": cm_version.update_time,
             "part_type_cache": self.part_type_cache,
         }
-        with open(self.hookup_cache_file, "w") as outfile:
-            json.dump(save_dict, outfile)
+        os.makedirs(self.hookup_cache_dir, exist_ok=True)
+        HookupCacheFile.write(self.hookup_cache_file, self.cached_hookup_dict, header)
 
         cf_info = self.hookup_cache_file_info()
         log_dict = {
@@ -803,50 +1223,61 @@ class Hookup(object):
         }
         cm_utils.log("update_cache", log_dict=log_dict)
 
-    def read_hookup_cache_from_file(self):
-        """Read the current cache file into memory."""
-        with open(self.hookup_cache_file, "r") as outfile:
-            cache_dict = json.load(outfile)
-        if self.hookup_cache_file_OK(cache_dict):
+    def read_hookup_cache_from_file(self, at_date=None):
+        """
+        Open the cache file for at_date.
+
+        Only the header is read, the entries of self.cached_hookup_dict (a
+        read-only HookupCacheFile Mapping rather than a dict) are decoded as they
+        are accessed.  The previously read cache file, if any, is closed.
+
+        Parameters
+        ----------
+        at_date : anything interpretable by cm_utils.get_astropytime or None
+            Date for which to read the cache file.  None uses self.at_date if it
+            has been set, otherwise 'now'.
+
+        Raises
+        ------
+        FileNotFoundError
+            If there is no cache file for the CM version in effect at at_date.
+
+        """
+        if at_date is None:
+            at_date = getattr(self, "at_date", "now")
+        self.at_date = cm_utils.get_astropytime(at_date)
+        self.hookup_cache_file = self.get_hookup_cache_file(self.at_date)
+        if self.hookup_cache_file is None:
+            raise FileNotFoundError(
+                "No CM version at {}.".format(
+                    cm_utils.get_time_for_display(self.at_date)
+                )
+            )
+        cache = HookupCacheFile(self.hookup_cache_file)
+        self._close_cached_hookup()
+        if self.hookup_cache_file_OK(cache.header):
             print("<<<Cache IS current with database>>>")
         else:
             print("<<<Cache is NOT current with database>>>")
-        self.cached_at_date = Time(cache_dict["at_date_gps"], format="gps")
-        self.cached_hookup_type = cache_dict["hookup_type"]
-        self.cached_hookup_list = cache_dict["hookup_list"]
-        hookup_dict = {}
-        for key, value in cache_dict["hookup_dict"].items():
-            # this should only contain dicts made from HookupEntry
-            # add asserts to make sure
-            assert isinstance(value, dict)
-            assert sorted(value.keys()) == sorted(
-                [
-                    "entry_key",
-                    "hookup",
-                    "fully_connected",
-                    "hookup_type",
-                    "columns",
-                    "timing",
-                    "sysdef",
-                ]
-            )
-            hookup_dict[key] = cm_dossier.HookupEntry(input_dict=value)
-
-        self.cached_hookup_dict = hookup_dict
-        self.part_type_cache = cache_dict["part_type_cache"]
+        self.cached_at_date = Time(cache.header["at_date_gps"], format="gps")
+        self.cached_hookup_type = cache.header["hookup_type"]
+        self.cached_hookup_list = cache.header["hookup_list"]
+        self.cached_hookup_dict = cache
+        self.cached_hookup_index = cm_utils.PartKeyIndex(cache)
+        self.part_type_cache = cache.header["part_type_cache"]
         self.hookup_type = self.cached_hookup_type
 
     def hookup_cache_file_OK(self, cache_dict=None):
         """
-        Determine if the cache file is up-to-date with the cm db and if hookup_type is correct.
+        Determine if the cache file matches the cm db at self.at_date and the hookup_type.
 
-        There are 4 relevant dates:
-            cm_hash_time:  last time the database was updated per CMVersion
-            file_mod_time:  when the cache file was last changed (ie written)
-            at_date:  the date of the get hookup request (self.at_date)
-            cached_at_date:  the date in the cache file for which it was written.
-        If the cache_file was written before the latest cm_version, it fails because
-        anything could have changed within the database.
+        The cache files are keyed on the CM git hash, so the cache is current if
+        it was written for the CMVersion in effect at self.at_date.
+
+        Parameters
+        ----------
+        cache_dict : dict or None
+            Header of the cache file.
 
         Returns
         -------
@@ -854,28 +1285,22 @@ class Hookup(object):
             True if the cache file is current.
 
         """
-        # Get the relevant dates (checking the cache_file/cm_version up front)
         if cache_dict is None:
             return False
-        stats = os.stat(self.hookup_cache_file)
-        result = (
-            self.session.query(cm_transfer.CMVersion)
-            .order_by(cm_transfer.CMVersion.update_time)
-            .all()
-        )
-        cm_hash_time = Time(result[-1].update_time, format="gps")
-        file_mod_time = Time(stats.st_mtime, format="unix")
-        # If CMVersion changed since file was written, don't know so fail...
-        if file_mod_time < cm_hash_time:  # pragma: no cover
+        cm_version = self._get_cm_version(self.at_date)
+        if (
+            cm_version is None
+            or cache_dict.get("cm_git_hash") != cm_version.git_hash
+            or cache_dict.get("cm_update_time") != cm_version.update_time
+        ):
             log_dict = {
-                "file_mod_time": cm_utils.get_time_for_display(file_mod_time),
-                "cm_hash_time": cm_utils.get_time_for_display(cm_hash_time),
+                "at_date": cm_utils.get_time_for_display(self.at_date),
+                "cache_cm_git_hash": cache_dict.get("cm_git_hash"),
             }
             cm_utils.log(
-                "__hookup_cache_file_date_OK:  out of date.", log_dict=log_dict
+                "__hookup_cache_file_OK:  cm version differs.", log_dict=log_dict
             )
             return False
-        cached_at_date = Time(cache_dict["at_date_gps"], format="gps")
         cached_hookup_type = cache_dict["hookup_type"]
 
         if self.hookup_type is None:
@@ -883,12 +1308,7 @@ class Hookup(object):
         if self.hookup_type != cached_hookup_type:  # pragma: no cover
             return False
 
-        # If the cached and query dates are after the last hash time it's ok
-        if cached_at_date > cm_hash_time and self.at_date > cm_hash_time:
-            return True
-
-        # If not returned above, return False to regenerate
-        return False
+        return True
 
     def hookup_cache_file_info(self):
         """
@@ -900,11 +1320,15 @@ class Hookup(object):
             String containing the information.
 
         """
-        if not os.path.exists(self.hookup_cache_file):  # pragma: no cover
-            s = "{} does not exist.\n".format(self.hookup_cache_file)
+        cache_file = self.get_hookup_cache_file("now")
+        if cache_file is None or not os.path.exists(cache_file):
+            s = "{} does not exist.\n".format(cache_file)
         else:
-            self.read_hookup_cache_from_file()
+            self.read_hookup_cache_from_file("now")
             s = "Cache file:  {}\n".format(self.hookup_cache_file)
+            s += "Cache CM git hash:  {}\n".format(
+                self.cached_hookup_dict.header["cm_git_hash"]
+            )
             s += "Cache hookup type:  {}\n".format(self.cached_hookup_type)
             s += "Cached_at_date:  {}\n".format(
                 cm_utils.get_time_for_display(self.cached_at_date)
@@ -918,12 +1342,9 @@ class Hookup(object):
             s += "Cached hookup has {} keys.\n".format(
                 len(self.cached_hookup_dict.keys())
             )
-            hooked_up = 0
-            for k, hu in self.cached_hookup_dict.items():
-                for pol in hu.fully_connected:
-                    if hu.fully_connected[pol]:
-                        hooked_up += 1
-            s += "Number of ant-pols hooked up is {}\n".format(hooked_up)
+            s += "Number of ant-pols hooked up is {}\n".format(
+                self.cached_hookup_dict.header["n_fully_connected"]
+            )
         result = (
             self.session.query(cm_transfer.CMVersion)
             .order_by(cm_transfer.CMVersion.update_time)
@@ -936,9 +1357,11 @@ class Hookup(object):
         return s
 
     def delete_cache_file(self):
-        """Delete the local cached hookup file."""
-        if os.path.exists(self.hookup_cache_file):
-            os.remove(self.hookup_cache_file)
+        """Delete the local cached hookup files for all CM versions."""
+        for cache_file in glob.glob(
+            os.path.join(self.hookup_cache_dir, self.hookup_cache_prefix + "*.bin")
+        ):
+            os.remove(cache_file)
 
     def _requested_list_OK_for_cache(self, hpn):
         """
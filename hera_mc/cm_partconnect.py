@@ -459,6 +459,46 @@ def get_part_revisions(hpn, session=None):
     return revisions
 
 
+def get_part_revisions_bulk(hpn_list, session=None):
+    """
+    Retrieve revision numbers for a list of parts (exact match) in one query.
+
+    Parameters
+    ----------
+    hpn_list :  list of str
+        hera part numbers
+    session : object
+        Database session to use.  If None, it will start a new session, then close.
+
+    Returns
+    -------
+    dict
+        Keyed on the hpns in hpn_list, values are the revisions dicts as returned by
+        `get_part_revisions` (empty for parts that are not found).
+
+    """
+    hpn_list = [hpn for hpn in hpn_list if hpn is not None]
+    revisions = {hpn: {} for hpn in hpn_list}
+    hpns_by_upper = {}
+    for hpn in hpn_list:
+        hpns_by_upper.setdefault(hpn.upper(), []).append(hpn)
+    if not hpns_by_upper:
+        return revisions
+
+    with mc.MCSessionWrapper(session=session) as session:
+        for parts_rec in session.query(Parts).filter(
+            func.upper(Parts.hpn).in_(list(hpns_by_upper.keys()))
+        ):
+            parts_rec.gps2Time()
+            for hpn in hpns_by_upper[parts_rec.hpn.upper()]:
+                revisions[hpn][parts_rec.hpn_rev] = {
+                    "hpn": hpn,
+                    "started": parts_rec.start_date,
+                    "ended": parts_rec.stop_date,
+                }
+    return revisions
+
+
 class AprioriAntenna(MCDeclarativeBase):
     """
     Table for a priori antenna status.
@@ -741,7 +781,7 @@ class Connections(MCDeclarativeBase):
     def __eq__(self, other):
         """Define equality."""
         if (
-            isinstance(other, self.__class__)
+            isinstance(other, (Connections, ConnectionRecord))
             and self.upstream_part.upper() == other.upstream_part.upper()
             and self.up_part_rev.upper() == other.up_part_rev.upper()
             and self.upstream_output_port.upper() == other.upstream_output_port.upper()
@@ -785,6 +825,67 @@ class Connections(MCDeclarativeBase):
         }
 
 
+class ConnectionRecord:
+    """
+    Lightweight record of a row of the connections table.
+
+    Used for the active connections loaded by `cm_active.ActiveData`, which are
+    only read, so they don't need to be ORM objects. It has the same attributes
+    and representation as a Connections object and compares equal to the
+    matching Connections object.
+
+    Parameters
+    ----------
+    upstream_part, up_part_rev, upstream_output_port : str
+        Upstream part, revision and output port.
+    downstream_part, down_part_rev, downstream_input_port : str
+        Downstream part, revision and input port.
+    start_gpstime : int
+        Start time of the connection.
+    stop_gpstime : int or None
+        Stop time of the connection.
+
+    """
+
+    columns = (
+        "upstream_part",
+        "up_part_rev",
+        "upstream_output_port",
+        "downstream_part",
+        "down_part_rev",
+        "downstream_input_port",
+        "start_gpstime",
+        "stop_gpstime",
+    )
+    __slots__ = columns + ("start_date", "stop_date")
+
+    def __init__(
+        self,
+        upstream_part,
+        up_part_rev,
+        upstream_output_port,
+        downstream_part,
+        down_part_rev,
+        downstream_input_port,
+        start_gpstime,
+        stop_gpstime,
+    ):
+        self.upstream_part = upstream_part
+        self.up_part_rev = up_part_rev
+        self.upstream_output_port = upstream_output_port
+        self.downstream_part = downstream_part
+        self.down_part_rev = down_part_rev
+        self.downstream_input_port = downstream_input_port
+        self.start_gpstime = start_gpstime
+        self.stop_gpstime = stop_gpstime
+
+    __repr__ = Connections.__repr__
+    __eq__ = Connections.__eq__
+    __hash__ = None
+    gps2Time = Connections.gps2Time
+    _to_dict = Connections._to_dict
+
+
 def get_connection_from_dict(input_dict):
     """
     Convert a dictionary holding the connection info into a Connections object.
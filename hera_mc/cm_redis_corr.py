@@ -8,8 +8,6 @@ import json
 import time
 import warnings
 
-import redis
-
 from . import cm_sysutils, correlator, mc
 
 REDIS_CMINFO_HASH = "cminfo"
@@ -94,8 +92,8 @@ def set_redis_cminfo(
     # This is retained so that explicitly providing redishost=None has the desired behavior
     if redishost is None:  # pragma: no cover
         redishost = correlator.DEFAULT_REDIS_ADDRESS
-    redis_pool = redis.ConnectionPool(host=redishost)
-    rsession = redis.Redis(connection_pool=redis_pool)
+    # write both hashes in one round trip
+    pipe = correlator._get_redis_session(redishost, decode_responses=False).pipeline()
 
     # Write cminfo content into redis (cminfo)
     with mc.MCSessionWrapper(session=session, testing=testing) as session:
@@ -108,9 +106,9 @@ def set_redis_cminfo(
     redis_hash = REDIS_CMINFO_HASH
     if testing:
         redis_hash = "testing_" + REDIS_CMINFO_HASH
-    rsession.hset(redis_hash, mapping=redhkey)
+    pipe.hset(redis_hash, mapping=redhkey)
     if testing:
-        rsession.expire(redis_hash, 300)
+        pipe.expire(redis_hash, 300)
 
     # Write correlator mappings to redis (corr:map)
     redis_hash = REDIS_CORR_HASH
@@ -126,6 +124,7 @@ def set_redis_cminfo(
     redhkey["snap_to_serial"] = json.dumps(snap_to_serial)
     redhkey["update_time"] = time.time()
     redhkey["update_time_str"] = time.ctime(redhkey["update_time"])
-    rsession.hset(redis_hash, mapping=redhkey)
+    pipe.hset(redis_hash, mapping=redhkey)
     if testing:
-        rsession.expire(redis_hash, 300)
+        pipe.expire(redis_hash, 300)
+    pipe.execute()
@@ -5,7 +5,8 @@
 """
 Functions to handle various cm revision queries and checks.
 
-LAST, ACTIVE, ALL, <specific> are handled (typically) via get_revisions_of_type.
+LAST, ACTIVE, ALL, <specific> are handled (typically) via get_revisions_of_type,
+or get_revisions_of_type_bulk for a list of parts.
 FULL revisions are called directly (get_full_revision)
 """
 
@@ -16,6 +17,26 @@ from . import cm_partconnect, cm_utils, mc
 revision_categories = ["last", "active", "all", "full", "none"]
 
 
+def _check_rev_type(rev_type):
+    """Get the upper case revision query, FULL revisions are not handled here."""
+    rq = rev_type.upper()
+    if rq.startswith("FULL"):
+        raise ValueError("FULL revisions called with get_full_revision directly")
+    return rq
+
+
+def _revisions_of_type(hpn, revisions, rev_type, active_date):
+    """Select the revisions of a type from the revisions dict of a part."""
+    rq = rev_type.upper()
+    if rq.startswith("LAST"):
+        return _last_revision(hpn, revisions)
+    if rq.startswith("ACTIVE"):
+        return _active_revision(hpn, revisions, active_date)
+    if rq.startswith("ALL") or rq.startswith("NONE"):
+        return _all_revisions(hpn, revisions)
+    return _specific_revision(hpn, revisions, rev_type)
+
+
 def get_revisions_of_type(
     hpn, rev_type, at_date="now", at_time=None, float_format=None, session=None
 ):
@@ -45,42 +66,65 @@ def get_revisions_of_type(
         (hpn, rev, rev_query, started, ended, [hukey], [pkey])
 
     """
-    rq = rev_type.upper()
+    rq = _check_rev_type(rev_type)
 
     with mc.MCSessionWrapper(session=session) as session:
-        if rq.startswith("LAST"):
-            revisions = get_last_revision(hpn, session)
-        elif rq.startswith("ACTIVE"):
+        if rq.startswith("ACTIVE"):
             revisions = get_active_revision(
                 hpn, at_date, at_time, float_format, session
             )
-        elif rq.startswith("ALL") or rq.startswith("NONE"):
-            revisions = get_all_revisions(hpn, session)
-        elif rq.startswith("FULL"):
-            raise ValueError("FULL revisions called with get_full_revision directly")
         else:
-            revisions = get_specific_revision(hpn, rev_type, session)
+            revisions = _revisions_of_type(
+                hpn, cm_partconnect.get_part_revisions(hpn, session), rev_type, None
+            )
     return revisions
 
 
-def get_last_revision(hpn, session):
+def get_revisions_of_type_bulk(
+    hpn_list, rev_type, at_date="now", at_time=None, float_format=None, session=None
+):
     """
-    Return list of latest revisions as Namespace(hpn,rev,erv_query,started,ended).
+    Return the revisions of rev_query for a list of parts.
+
+    The revisions of all the parts are retrieved with a single query.
 
     Parameters
     ----------
-    hpn : str
-        HERA part number
+    hpn_list : list of str
+        HERA part numbers
+    rev_type : str
+        Revision type/value.  One of LAST, ACTIVE, ALL, <specific>
+    at_date : anything understandable to cm_utils.get_astropytime
+        Relevant date to check for (only used for ACTIVE).
+    at_time : anything understandable to cm_utils.get_astropytime
+        Relevant time to check for, ignored if at_date is a float or contains time information.
+    float_format : str or None
+        Format if at_date is a number denoting gps or unix seconds or jd day.
     session : object
-        Database session to use.
+        Database session to use.  If None, it will start a new session, then close.
 
     Returns
     -------
-    Namespace
-        (hpn, rev, rev_query, started, ended, [hukey], [pkey])
+    dict
+        Keyed on the hpns in hpn_list, values are lists of Namespaces
+        (hpn, rev, rev_query, started, ended) as returned by get_revisions_of_type.
 
     """
-    revisions = cm_partconnect.get_part_revisions(hpn, session)
+    rq = _check_rev_type(rev_type)
+    active_date = None
+    if rq.startswith("ACTIVE"):
+        active_date = cm_utils.get_astropytime(at_date, at_time, float_format)
+
+    with mc.MCSessionWrapper(session=session) as session:
+        revisions = cm_partconnect.get_part_revisions_bulk(hpn_list, session)
+    return {
+        hpn: _revisions_of_type(hpn, hpn_revisions, rev_type, active_date)
+        for hpn, hpn_revisions in revisions.items()
+    }
+
+
+def _last_revision(hpn, revisions):
+    """Select the latest revisions from the revisions dict of a part."""
     if len(revisions.keys()) == 0:
         return []
     latest_end = cm_utils.get_astropytime("<")
@@ -107,6 +151,38 @@ def get_last_revision(hpn, session):
     return last_rev
 
 
+def get_last_revision(hpn, session):
+    """
+    Return list of latest revisions as Namespace(hpn,rev,erv_query,started,ended).
+
+    Parameters
+    ----------
+    hpn : str
+        HERA part number
+    session : object
+        Database session to use.
+
+    Returns
+    -------
+    Namespace
+        (hpn, rev, rev_query, started, ended, [hukey], [pkey])
+
+    """
+    return _last_revision(hpn, cm_partconnect.get_part_revisions(hpn, session))
+
+
+def _all_revisions(hpn, revisions):
+    """List all the revisions in the revisions dict of a part."""
+    all_rev = []
+    for rev in sorted(revisions.keys()):
+        started = revisions[rev]["started"]
+        ended = revisions[rev]["ended"]
+        all_rev.append(
+            Namespace(hpn=hpn, rev=rev, rev_query="ALL", started=started, ended=ended)
+        )
+    return all_rev
+
+
 def get_all_revisions(hpn, session):
     """
     Return list of all revisions as Namespace(hpn, rev, started, ended).
@@ -124,21 +200,26 @@ def get_all_revisions(hpn, session):
         (hpn, rev, rev_query, started, ended, [hukey], [pkey])
 
     """
-    revisions = cm_partconnect.get_part_revisions(hpn, session)
-    if len(revisions.keys()) == 0:
-        all_rev = []
-    else:
-        sort_rev = sorted(revisions.keys())
-        all_rev = []
-        for rev in sort_rev:
-            started = revisions[rev]["started"]
-            ended = revisions[rev]["ended"]
-            all_rev.append(
+    return _all_revisions(hpn, cm_partconnect.get_part_revisions(hpn, session))
+
+
+def _specific_revision(hpn, revisions, rq):
+    """Select a particular revision from the revisions dict of a part."""
+    this_rev = []
+    for rev in revisions.keys():
+        if rq.upper() == rev.upper():
+            start_date = revisions[rev]["started"]
+            end_date = revisions[rev]["ended"]
+            this_rev = [
                 Namespace(
-                    hpn=hpn, rev=rev, rev_query="ALL", started=started, ended=ended
+                    hpn=hpn,
+                    rev=rev,
+                    rev_query=rq,
+                    started=start_date,
+                    ended=end_date,
                 )
-            )
-    return all_rev
+            ]
+    return this_rev
 
 
 def get_specific_revision(hpn, rq, session):
@@ -160,23 +241,26 @@ def get_specific_revision(hpn, rq, session):
         (hpn, rev, rev_query, started, ended, [hukey], [pkey])
 
     """
-    revisions = cm_partconnect.get_part_revisions(hpn, session)
-    this_rev = []
-    if len(revisions.keys()) > 0:
-        for rev in revisions.keys():
-            if rq.upper() == rev.upper():
-                start_date = revisions[rev]["started"]
-                end_date = revisions[rev]["ended"]
-                this_rev = [
-                    Namespace(
-                        hpn=hpn,
-                        rev=rev,
-                        rev_query=rq,
-                        started=start_date,
-                        ended=end_date,
-                    )
-                ]
-    return this_rev
+    return _specific_revision(hpn, cm_partconnect.get_part_revisions(hpn, session), rq)
+
+
+def _active_revision(hpn, revisions, active_date):
+    """Select the revisions active at active_date from the revisions dict of a part."""
+    return_active = []
+    for rev in sorted(revisions.keys()):
+        started = revisions[rev]["started"]
+        ended = revisions[rev]["ended"]
+        if cm_utils.is_active(active_date, started, ended):
+            return_active.append(
+                Namespace(
+                    hpn=hpn,
+                    rev=rev,
+                    rev_query="ACTIVE",
+                    started=started,
+                    ended=ended,
+                )
+            )
+    return return_active
 
 
 def get_active_revision(hpn, at_date, at_time=None, float_format=None, session=None):
@@ -204,23 +288,10 @@ def get_active_revision(hpn, at_date, at_time=None, float_format=None, session=N
     """
     with mc.MCSessionWrapper(session=session) as session:
         revisions = cm_partconnect.get_part_revisions(hpn, session)
-        return_active = []
-        if len(revisions.keys()) > 0:
-            active_date = cm_utils.get_astropytime(at_date, at_time, float_format)
-            for rev in sorted(revisions.keys()):
-                started = revisions[rev]["started"]
-                ended = revisions[rev]["ended"]
-                if cm_utils.is_active(active_date, started, ended):
-                    return_active.append(
-                        Namespace(
-                            hpn=hpn,
-                            rev=rev,
-                            rev_query="ACTIVE",
-                            started=started,
-                            ended=ended,
-                        )
-                    )
-    return return_active
+        if len(revisions.keys()) == 0:
+            return []
+        active_date = cm_utils.get_astropytime(at_date, at_time, float_format)
+        return _active_revision(hpn, revisions, active_date)
 
 
 def get_full_revision(hpn, hookup_dict):
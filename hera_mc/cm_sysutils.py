@@ -4,6 +4,7 @@
 
 """Methods for handling locating correlator and various system aspects."""
 import warnings
+from types import SimpleNamespace
 
 import numpy as np
 from sqlalchemy import and_, func, or_
@@ -33,6 +34,9 @@ class SystemInfo:
         "lon",
         "lat",
         "elevation",
+        "X",
+        "Y",
+        "Z",
         "antenna_number",
         "correlator_input",
         "snap_serial",
@@ -120,6 +124,7 @@ class Handling:
             'lon': station longitude (float)
             'lat': station latitude (float)
             'elevation': station elevation (float)
+            'X', 'Y', 'Z': station ECEF position (float)
             'antenna_number': antenna number (integer)
             'correlator_input': correlator input for x (East) pol and y (North) pol
                 (string tuple-pair)
@@ -158,11 +163,22 @@ class Handling:
         station_conn = []
         found_keys = list(hud.keys())
         found_stations = [x.split(":")[0] for x in found_keys]
-        station_geo = self.geo.get_location(found_stations, at_date)
-        for i, key in enumerate(found_keys):
+        # one query and one coordinate transform for all the stations
+        station_geo = {
+            col: values.tolist()
+            for col, values in self.geo.get_location_columns(
+                found_stations, at_date
+            ).items()
+        }
+        geo_rows = {}
+        for i, name in enumerate(station_geo["station_name"]):
+            geo_rows[name.upper()] = SimpleNamespace(
+                **{col: values[i] for col, values in station_geo.items()}
+            )
+        for key in found_keys:
             stn, rev = cm_utils.split_part_key(key)
             ant_num = int(stn[2:])
-            station_info = SystemInfo(station_geo[i])
+            station_info = SystemInfo(geo_rows.get(stn.upper(), SimpleNamespace()))
             station_info.antenna_number = ant_num
             current_hookup = hud[key].hookup
             corr = {}
@@ -231,37 +247,22 @@ class Handling:
                 'cofa_lon': longitude of the center-of-array in degrees
                 'cofa_alt': altitude of center-of-array in meters
         """
-        with warnings.catch_warnings():
-            # This filter can be removed when pyuvdata (and maybe other imported packages?)
-            # are updated to use importlib.metadata rather than pkg_resources
-            warnings.filterwarnings(
-                "ignore", "Deprecated call to `pkg_resources.declare_namespace"
-            )
-            from pyuvdata import utils as uvutils
-
         from . import cm_handling
 
         cm_h = cm_handling.Handling(session=self.session)
         cm_version = cm_h.get_cm_version()
         cofa_loc = self.geo.cofa()[0]
-        cofa_xyz = uvutils.XYZ_from_LatLonAlt(
-            cofa_loc.lat * np.pi / 180.0,
-            cofa_loc.lon * np.pi / 180.0,
-            cofa_loc.elevation,
-        )
+        cofa_xyz = np.array([cofa_loc.X, cofa_loc.Y, cofa_loc.Z])
         stations_conn = self.get_connected_stations(
             at_date="now", hookup_type=hookup_type
         )
         stn_arrays = SystemInfo()
         for stn in stations_conn:
             stn_arrays.update_arrays(stn)
-        # latitudes, longitudes output by get_connected_stations are in degrees
-        # XYZ_from_LatLonAlt wants radians
-        ecef_positions = uvutils.XYZ_from_LatLonAlt(
-            np.array(stn_arrays.lat) * np.pi / 180.0,
-            np.array(stn_arrays.lon) * np.pi / 180.0,
-            stn_arrays.elevation,
-        )
+        # the ECEF positions are computed for all stations at once by geo_handling
+        ecef_positions = np.array(
+            [stn_arrays.X, stn_arrays.Y, stn_arrays.Z], dtype=float
+        ).T.reshape(-1, 3)
 
         rel_ecef_positions = ecef_positions - cofa_xyz
         return {
@@ -540,6 +541,212 @@ class Handling:
         )
 
 
+class SnapCMInfo:
+    """
+    Snapshot of the SNAP related config management information at a given date.
+
+    All of the lookups needed to ingest SNAP status information (hostname to serial
+    number, serial number to node and SNAP location number and SNAP input to antenna
+    and polarization) are built once at initialization, so that they can be resolved
+    with dictionary lookups for every SNAP in a monitoring cycle.
+
+    Parameters
+    ----------
+    session : sqlalchemy session object
+        Session as generated from db.sessionmaker
+    at_date : anything interpretable by cm_utils.get_astropytime
+        Date at which to initialize.
+    at_time : anything interpretable by cm_utils.get_astropytime
+        Time at which to initialize, ignored if at_date is a float or contains time
+        information
+    float_format : str
+        Format if at_date is a number denoting gps or unix seconds or jd day.
+
+    """
+
+    snap_input_name_dict = {0: "n0", 1: "e2", 2: "n4", 3: "e6", 4: "n8", 5: "e10"}
+
+    def __init__(self, session, at_date="now", at_time=None, float_format=None):
+        from . import cm_active
+
+        self.session = session
+        self.at_date = cm_utils.get_astropytime(at_date, at_time, float_format)
+        active = cm_active.ActiveData(session, at_date=self.at_date)
+        active.load_parts()
+        active.load_connections()
+        active.load_rosetta()
+
+        self.serial_to_hostname = {}
+        self.hostname_to_serial = {}
+        for hpn, rose in active.rosetta.items():
+            self.serial_to_hostname[hpn] = rose.syspn
+            # load_rosetta rejects duplicate system part numbers, but keep the
+            # first part for a hostname regardless (as the lookup it replaced did)
+            self.hostname_to_serial.setdefault(rose.syspn, hpn)
+
+        # Active revisions for each part, used for the node/SNAP location lookup
+        self._revs = {}
+        for part in active.parts.values():
+            self._revs.setdefault(part.hpn.upper(), set()).add(part.hpn_rev.upper())
+
+        # Connection to the node for parts with a single active revision
+        self._rack_conn = {}
+        for hpn, revs in self._revs.items():
+            if len(revs) != 1:
+                continue
+            key = cm_utils.make_part_key(hpn, list(revs)[0])
+            try:
+                self._rack_conn[hpn] = active.connections["up"][key]["RACK"]
+            except KeyError:
+                continue
+
+        self.antpol = {}
+        if len(self.serial_to_hostname):
+            hookup = cm_hookup.Hookup(session)
+            hud = hookup.get_hookup(
+                list(self.serial_to_hostname.keys()),
+                at_date=self.at_date,
+                exact_match=True,
+            )
+        else:
+            hud = {}
+        for serial, hostname in self.serial_to_hostname.items():
+            snapr = f"{serial.upper()}:A"
+            if snapr not in hud:
+                continue
+            for input_id, this_input_name in self.snap_input_name_dict.items():
+                polport = None
+                for key in hud[snapr].hookup.keys():
+                    if this_input_name in key:
+                        polport = key
+                        break
+                if polport is not None and hud[snapr].fully_connected[polport]:
+                    self.antpol[(hostname, input_id)] = (
+                        int(hud[snapr].hookup[polport][0].upstream_part[2:]),
+                        polport[0].lower(),
+                    )
+
+    def get_snap_serial_from_hostname(self, hostname):
+        """
+        Get SNAP serial number (also called hpn or part number) from the hostname.
+
+        Parameters
+        ----------
+        hostname : str
+            SNAP hostname.
+
+        Returns
+        -------
+        str or None
+            SNAP serial number if the hostname is found in the part_rosetta,
+            None otherwise.
+
+        """
+        return self.hostname_to_serial.get(hostname)
+
+    def get_snap_hostname_from_serial(self, serial_number):
+        """
+        Get SNAP hostname from the SNAP serial number (also called hpn or part number).
+
+        Parameters
+        ----------
+        serial_number : str
+            SNAP serial number.
+
+        Returns
+        -------
+        str or None
+            SNAP hostname if serial_number is found in the part_rosetta, None otherwise.
+
+        """
+        return self.serial_to_hostname.get(serial_number)
+
+    def get_node_snap_from_serial(self, snap_serial):
+        """
+        Get SNAP connection information from SNAP serial number.
+
+        Parameters
+        ----------
+        snap_serial : str
+            SNAP serial number (also called hpn or part number).
+
+        Returns
+        -------
+        nodeID: int
+            Node number.
+        snap_loc_num : int
+            SNAP location number.
+
+        """
+        revs = self._revs.get(snap_serial.upper(), set())
+        if len(revs) > 1:
+            warnings.warn(
+                f"There is more that one active revision for snap serial {snap_serial}. "
+                "Setting node and snap location numbers to None"
+            )
+            return None, None
+        try:
+            conn = self._rack_conn[snap_serial.upper()]
+        except KeyError:
+            warnings.warn(
+                f"No active connections returned for snap serial {snap_serial}. "
+                "Setting node and snap location numbers to None"
+            )
+            return None, None
+        return int(conn.downstream_part[1:]), int(conn.downstream_input_port[3:])
+
+    def get_node_snap_from_hostname(self, hostname):
+        """
+        Get SNAP connection information from SNAP hostname.
+
+        Parameters
+        ----------
+        hostname : str
+            SNAP hostname.
+
+        Returns
+        -------
+        nodeID: int
+            Node number.
+        snap_loc_num : int
+            SNAP location number.
+
+        """
+        snap_serial = self.get_snap_serial_from_hostname(hostname)
+        if snap_serial is None:
+            return None, None
+        return self.get_node_snap_from_serial(snap_serial)
+
+    def get_antennas_for_snap(self, snap_hostname, snap_channel_number=None):
+        """
+        Get antenna number and pol connected to SNAP hostname and input.
+
+        Parameters
+        ----------
+        snap_hostname : str
+            SNAP hostname.
+        snap_channel_number : list of int or None
+            List of channel numbers to get antennas for. If None, get all inputs (0-5).
+
+        Returns
+        -------
+        dict
+            keyed on snap_channel_number, values are dicts with keys of "antenna"
+            (integer antenna number) and "pol" string, either "e" or "n".
+
+        """
+        if snap_channel_number is None:
+            snap_channel_number = self.snap_input_name_dict.keys()
+        elif not isinstance(snap_channel_number, list):
+            snap_channel_number = [snap_channel_number]
+
+        output_dict = {}
+        for input_id in snap_channel_number:
+            antenna, pol = self.antpol.get((snap_hostname, input_id), (None, None))
+            output_dict[input_id] = {"antenna": antenna, "pol": pol}
+        return output_dict
+
+
 def node_antennas(source="file", session=None):
     """
     Get the antennas associated with nodes.
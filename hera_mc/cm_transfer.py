@@ -12,13 +12,17 @@ Used in scripts cm_init.py, cm_pack.py
 import csv
 import os.path
 import subprocess
+import time
 from math import floor
 
 from astropy.time import Time
-from sqlalchemy import BigInteger, Column, String
+from sqlalchemy import BigInteger, Column, String, insert, text
 
 from . import MCDeclarativeBase, cm_table_info, cm_utils, mc
 
+# number of rows per executemany call for databases without COPY
+INSERT_BATCH_SIZE = 5000
+
 
 class CMVersion(MCDeclarativeBase):
     """
@@ -71,11 +75,14 @@ class CMVersion(MCDeclarativeBase):
         return cls(update_time=time, git_hash=git_hash)
 
 
-def package_db_to_csv(session=None, tables="all"):
+def package_db_to_csv(session=None, tables="all", output_path=None, max_workers=1):
     """
     Get the configuration management tables and package them to csv files.
 
-    The csv files are read by initialize_db_from_csv.
+    The csv files are read by initialize_db_from_csv. Each table is streamed
+    to its file (with COPY TO on PostgreSQL) rather than loaded into memory,
+    and the values are written with their database types so integers stay
+    integers and floats are written with full precision.
 
     Parameters
     ----------
@@ -84,6 +91,14 @@ def package_db_to_csv(session=None, tables="all"):
         on the default database is created and used.
     tables: string
         comma-separated list of names of tables to initialize or 'all'.
+    output_path : str, optional
+        Directory to write the files to, defaults to the current directory.
+    max_workers : int
+        Number of tables to write in parallel, each with its own connection.
+        Only used if the session is bound to an engine (rather than to a
+        connection). On PostgreSQL the connections share one REPEATABLE READ
+        snapshot so the files are consistent with each other, on other
+        databases each table is read in its own transaction.
 
     Returns
     -------
@@ -91,35 +106,145 @@ def package_db_to_csv(session=None, tables="all"):
         list of filenames written
 
     """
-    import pandas
+    from sqlalchemy.engine import Engine
 
     data_prefix = cm_table_info.data_prefix
     cm_tables = cm_table_info.cm_tables
 
     if tables == "all":
-        tables_to_write = cm_tables.keys()
+        tables_to_write = list(cm_tables.keys())
     else:
         tables_to_write = tables.split(",")
 
-    print("Writing packaged files to current directory.")
+    if output_path is None:
+        print("Writing packaged files to current directory.")
+        output_path = ""
+    else:
+        print("Writing packaged files to {}.".format(output_path))
     print(
         "--> If packing from qmaster, be sure to use 'cm_pack.py --go' to "
         "copy, commit and log the change."
     )
     print("    Note:  this works via the hera_cm_db_updates repo.")
     with mc.MCSessionWrapper(session=session) as session:
-        files_written = []
-        for table in tables_to_write:
-            data_filename = data_prefix + table + ".csv"
-            with session.get_bind().connect() as conn:
-                table_data = pandas.read_sql_table(table, conn)
-            print("\tPackaging:  " + data_filename)
-            table_data.to_csv(data_filename, index=False)
-            files_written.append(data_filename)
+        files_written = [
+            os.path.join(output_path, data_prefix + table + ".csv")
+            for table in tables_to_write
+        ]
+        sa_tables = [cm_tables[table][0].__table__ for table in tables_to_write]
+        bind = session.get_bind()
+        if max_workers > 1 and isinstance(bind, Engine):
+            _write_tables_in_parallel(bind, sa_tables, files_written, max_workers)
+        else:
+            conn = session.connection()
+            for sa_table, data_filename in zip(sa_tables, files_written):
+                _write_table_csv(conn, sa_table, data_filename)
 
     return files_written
 
 
+def _write_tables_in_parallel(engine, tables, data_filenames, max_workers):
+    """
+    Write tables to csv files in parallel, each on its own connection.
+
+    On PostgreSQL a REPEATABLE READ transaction exports its snapshot (with
+    pg_export_snapshot) and every worker transaction imports it, so all the
+    tables are read as of the same moment even if the database is changing.
+
+    Parameters
+    ----------
+    engine : SQLAlchemy Engine object
+        Engine to get the connections from.
+    tables : list of SQLAlchemy Table objects
+        Tables to write.
+    data_filenames : list of str
+        Paths to the csv files to write, one per table.
+    max_workers : int
+        Number of tables to write at a time.
+
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    use_snapshot = engine.dialect.name == "postgresql"
+    isolation = {"isolation_level": "REPEATABLE READ"} if use_snapshot else {}
+
+    with engine.connect().execution_options(**isolation) as snapshot_conn:
+        with snapshot_conn.begin():
+            snapshot_id = None
+            if use_snapshot:
+                snapshot_id = snapshot_conn.execute(
+                    text("SELECT pg_export_snapshot()")
+                ).scalar()
+
+            def _write_with_new_connection(sa_table, data_filename):
+                with engine.connect().execution_options(**isolation) as conn:
+                    with conn.begin():
+                        if snapshot_id is not None:
+                            # must be the first statement of the transaction
+                            conn.exec_driver_sql(
+                                "SET TRANSACTION SNAPSHOT '{}'".format(snapshot_id)
+                            )
+                        _write_table_csv(conn, sa_table, data_filename)
+
+            # the snapshot is only importable while the exporting transaction is open
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(_write_with_new_connection, sa_table, filename)
+                    for sa_table, filename in zip(tables, data_filenames)
+                ]
+                for future in futures:
+                    future.result()
+
+
+def _write_table_csv(conn, table, data_filename, batch_size=INSERT_BATCH_SIZE):
+    """
+    Stream a table to a csv file with a header row.
+
+    Uses COPY TO STDOUT for PostgreSQL and a streamed select otherwise. Nulls
+    are written as empty fields.
+
+    Parameters
+    ----------
+    conn : SQLAlchemy Connection object
+        Connection to the database.
+    table : SQLAlchemy Table object
+        Table to write.
+    data_filename : str
+        Path to the csv file to write.
+    batch_size : int
+        Number of rows to fetch at a time (not used for PostgreSQL).
+
+    """
+    start = time.perf_counter()
+    columns = [col.name for col in table.columns]
+    dialect = conn.dialect
+    if dialect.name == "postgresql":
+        preparer = dialect.identifier_preparer
+        copy_sql = (
+            "COPY {table} ({columns}) TO STDOUT WITH (FORMAT csv, HEADER true)".format(
+                table=preparer.format_table(table),
+                columns=", ".join(preparer.quote(col) for col in columns),
+            )
+        )
+        with open(data_filename, "wb") as csvfile:
+            with conn.connection.dbapi_connection.cursor() as cursor:
+                with cursor.copy(copy_sql) as copy:
+                    for data in copy:
+                        csvfile.write(data)
+    else:
+        with open(data_filename, "wt", newline="") as csvfile:
+            writer = csv.writer(csvfile, lineterminator="\n")
+            writer.writerow(columns)
+            result = conn.execution_options(yield_per=batch_size).execute(
+                table.select()
+            )
+            for partition in result.partitions():
+                writer.writerows(partition)
+    print(
+        "\tPackaging:  {} ({:.2f} s)".format(data_filename, time.perf_counter() - start)
+    )
+
+
 def pack_n_go(session, cm_csv_path):  # pragma: no cover
     """
     Move the csv files to the distribution directory, commit them and update the hash.
@@ -354,28 +479,141 @@ def _initialization(
         num_rows_deleted = wrapper.session.query(cm_tables[table][0]).delete()
         print("%d rows deleted in %s" % (num_rows_deleted, table))
 
-    # Initialize tables in reversed order
-    for table, data_filename in reversed(use_table):
+    # Initialize tables in reversed order, committing once per table
+    total_start = time.perf_counter()
+    for itable, (table, data_filename) in enumerate(reversed(use_table)):
         cm_utils.log("cm_initialization: " + data_filename)
-        field_row = True  # This is the first row
-        with open(data_filename, "rt") as csvfile:
-            reader = csv.reader(csvfile)
-            for row in reader:
-                table_inst = cm_tables[table][0]()
-                if field_row:
-                    field_name = row
-                    field_row = False
-                else:
-                    for i, r in enumerate(row):
-                        if r == "":
-                            r = None
-                        elif "gpstime" in field_name[i]:
-                            # Needed since pandas does not have an integer representation
-                            #  of NaN, so it outputs a float, which the database won't allow
-                            r = int(float(r))
-                        setattr(table_inst, field_name[i], r)
-                    wrapper.session.add(table_inst)
-                    wrapper.session.commit()
-    wrapper.wrapup(
-        updated=False
-    )  # Since we commited along the way to handle ForeignKey
+        table_start = time.perf_counter()
+        sa_table = cm_tables[table][0].__table__
+        columns, rows = _read_csv_table(data_filename, sa_table)
+        _bulk_load(wrapper.session, sa_table, columns, rows)
+        wrapper.session.commit()
+        print(
+            "[%d/%d] %d rows loaded in %s (%.2f s)"
+            % (
+                itable + 1,
+                len(use_table),
+                len(rows),
+                table,
+                time.perf_counter() - table_start,
+            )
+        )
+    print(
+        "%d tables loaded in %.2f s"
+        % (len(use_table), time.perf_counter() - total_start)
+    )
+    wrapper.wrapup(updated=False)  # Since we commited after each table
+
+
+def _column_converter(column):
+    """
+    Get a function to convert a csv string to the python type of a column.
+
+    Integer columns go through float if needed, since pandas does not have an
+    integer representation of NaN so integer columns with missing values are
+    written as floats (e.g. the gpstimes), which the database won't allow.
+    """
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:  # pragma: no cover
+        return str
+
+    if python_type is int:
+
+        def _to_int(value):
+            try:
+                return int(value)
+            except ValueError:
+                return int(float(value))
+
+        return _to_int
+    if python_type is float:
+        return float
+    return str
+
+
+def _read_csv_table(data_filename, table):
+    """
+    Read a cm csv file into rows of python values for a table.
+
+    Columns in the csv file that are not in the table are ignored, empty
+    strings and missing trailing fields are converted to None.
+
+    Parameters
+    ----------
+    data_filename : str
+        Path to the csv file, the first row has the column names.
+    table : SQLAlchemy Table object
+        Table the data are for.
+
+    Returns
+    -------
+    columns : list of str
+        Names of the table columns in the rows.
+    rows : list of tuple
+        Rows of values for the columns.
+
+    """
+    with open(data_filename, "rt", newline="") as csvfile:
+        reader = csv.reader(csvfile)
+        field_names = next(reader, [])
+        use_fields = [
+            (index, name, _column_converter(table.columns[name]))
+            for index, name in enumerate(field_names)
+            if name in table.columns
+        ]
+        rows = []
+        for row in reader:
+            if len(row) == 0:
+                continue
+            values = []
+            for index, _, converter in use_fields:
+                value = row[index] if index < len(row) else ""
+                values.append(None if value == "" else converter(value))
+            rows.append(tuple(values))
+
+    return [name for _, name, _ in use_fields], rows
+
+
+def _bulk_load(session, table, columns, rows, batch_size=INSERT_BATCH_SIZE):
+    """
+    Load rows into a table in the session's transaction.
+
+    Uses COPY FROM for PostgreSQL and batched executemany inserts otherwise.
+
+    Parameters
+    ----------
+    session : Session object
+        Session on the database to load into.
+    table : SQLAlchemy Table object
+        Table to load into.
+    columns : list of str
+        Names of the columns in the rows.
+    rows : list of tuple
+        Rows of values to load.
+    batch_size : int
+        Number of rows per executemany call (not used for PostgreSQL).
+
+    """
+    if len(rows) == 0 or len(columns) == 0:
+        return
+
+    connection = session.connection()
+    dialect = connection.dialect
+    if dialect.name == "postgresql":
+        preparer = dialect.identifier_preparer
+        copy_sql = "COPY {table} ({columns}) FROM STDIN".format(
+            table=preparer.format_table(table),
+            columns=", ".join(preparer.quote(col) for col in columns),
+        )
+        with connection.connection.dbapi_connection.cursor() as cursor:
+            with cursor.copy(copy_sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+    else:
+        statement = insert(table)
+        for start in range(0, len(rows), batch_size):
+            connection.execute(
+                statement,
+                [dict(zip(columns, row)) for row in rows[start : start + batch_size]],
+            )
@@ -6,13 +6,12 @@
 
 import datetime
 import subprocess
+from bisect import bisect_left
 
 from astropy.time import Time, TimeDelta
 
 import hera_mc
 
-from . import mc
-
 PAST_DATE = "2000-01-01"
 VALID_FLOAT_FORMAT_FOR_TIME = ["unix", "gps", "jd"]
 
@@ -40,6 +39,8 @@ def get_cm_repo_git_hash(mc_config_path=None, cm_csv_path=None, testing=False):
         return hera_mc.__version__
 
     if cm_csv_path is None:
+        from . import mc
+
         cm_csv_path = mc.get_cm_csv_path(mc_config_file=mc_config_path)
         if cm_csv_path is None:
             raise ValueError("No cm_csv_path defined in mc_config file.")
@@ -61,6 +62,8 @@ def log(msg, **kwargs):
         keywords and arguments to log.
 
     """
+    from . import mc
+
     fp = open(mc.cm_log_file, "a")
     dt = Time.now()
     fp.write(
@@ -160,6 +163,68 @@ def split_part_key(key):
     return split_key[0], split_key[1], split_key[2]
 
 
+class PartKeyIndex:
+    """
+    Sorted index of part keys for exact and prefix lookups on the part number.
+
+    The keys are sorted once on their part number, so a query is a binary
+    search plus a walk over the matching keys rather than a scan of all keys.
+
+    Parameters
+    ----------
+    keys : iterable of str
+        Standard part keys (hpn:rev), e.g. the keys of ActiveData.parts.
+
+    """
+
+    def __init__(self, keys):
+        entries = sorted(
+            (key.split(":")[0].upper(), i, key) for i, key in enumerate(keys)
+        )
+        self._hpns = [x[0] for x in entries]
+        self._positions = [x[1] for x in entries]
+        self._keys = [x[2] for x in entries]
+
+    def __len__(self):
+        """Return the number of indexed keys."""
+        return len(self._keys)
+
+    def _match_positions(self, hpn, exact_match):
+        hpn = hpn.upper()
+        i = bisect_left(self._hpns, hpn)
+        while i < len(self._hpns):
+            if exact_match:
+                if self._hpns[i] != hpn:
+                    break
+            elif not self._hpns[i].startswith(hpn):
+                break
+            yield self._positions[i], self._keys[i]
+            i += 1
+
+    def find(self, hpn, exact_match=False):
+        """
+        Return the keys whose part number matches any of the supplied hpns.
+
+        Parameters
+        ----------
+        hpn : str or list
+            HERA part number(s) to match (case insensitive).
+        exact_match : bool
+            If True match the whole part number, otherwise match keys whose part
+            number starts with hpn.
+
+        Returns
+        -------
+        list
+            Matching keys, each once, in the order they were supplied to the index.
+
+        """
+        found = {}
+        for this_hpn in listify(hpn):
+            found.update(self._match_positions(this_hpn, exact_match))
+        return [found[i] for i in sorted(found)]
+
+
 def stringify(inp):
     """
     "Stringify" the input, hopefully sensibly.
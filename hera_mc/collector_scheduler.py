@@ -0,0 +1,470 @@
+# -*- mode: python; coding: utf-8 -*-
+# Copyright 2026 the HERA Collaboration
+# Licensed under the 2-clause BSD license.
+
+"""
+Scheduler for the monitoring daemons that collect data into M&C.
+
+Each collector runs on its own cadence in a worker thread with its own session,
+so a slow redis or hera_corr_cm call only delays that collector. The latency
+(how long a run took) and lag (how late a run started relative to its schedule)
+are recorded for every collector.
+
+"""
+
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from math import floor
+
+from astropy.time import Time
+
+DEFAULT_INTERVAL = 60  # seconds
+DEFAULT_MAX_WORKERS = 8
+# the longest time to wait between checks for timed out collectors
+POLL_INTERVAL = 1.0  # seconds
+
+
+class Collector:
+    """
+    A command to run periodically to collect data into M&C.
+
+    Parameters
+    ----------
+    command : str or callable
+        Name of the MCSession method to call (e.g. "add_snap_status_from_corrcm")
+        or a function that takes a session as its first argument.
+    interval : float
+        Cadence to run the command on, in seconds.
+    timeout : float, optional
+        Time in seconds after which a run is logged as an error if it has not
+        finished. Defaults to the interval. A timed out run is not interrupted but
+        the collector is not started again until it finishes.
+    name : str, optional
+        Name for the collector, defaults to the method or function name.
+    kwargs : dict, optional
+        Keyword arguments to pass to the command.
+
+    Attributes
+    ----------
+    n_runs : int
+        Number of completed runs.
+    n_errors : int
+        Number of runs that raised an error.
+    n_timeouts : int
+        Number of runs that went past the timeout.
+    n_skipped : int
+        Number of scheduled runs skipped because the previous run had not finished.
+    last_latency : float
+        Duration of the last completed run in seconds.
+    max_latency : float
+        Longest run duration in seconds.
+    last_lag : float
+        Delay between the scheduled and actual start of the last run in seconds.
+    max_lag : float
+        Longest delay between the scheduled and actual start of a run in seconds.
+
+    """
+
+    def __init__(
+        self, command, interval=DEFAULT_INTERVAL, timeout=None, name=None, kwargs=None
+    ):
+        if isinstance(command, str):
+            default_name = command
+        elif callable(command):
+            default_name = command.__name__
+        else:
+            raise ValueError("command must be a string or a callable.")
+        if interval <= 0:
+            raise ValueError("interval must be positive.")
+
+        self.command = command
+        self.interval = interval
+        self.timeout = interval if timeout is None else timeout
+        self.name = default_name if name is None else name
+        self.kwargs = {} if kwargs is None else kwargs
+
+        self.next_run = None
+        self.run_start = None
+        self.future = None
+        self.timed_out = False
+
+        self.n_runs = 0
+        self.n_errors = 0
+        self.n_timeouts = 0
+        self.n_skipped = 0
+        self.total_latency = 0.0
+        self.last_latency = None
+        self.max_latency = None
+        self.last_lag = None
+        self.max_lag = None
+
+    def run(self, session):
+        """
+        Run the command with a session.
+
+        Parameters
+        ----------
+        session : MCSession object
+            Session to use for the command.
+
+        """
+        if isinstance(self.command, str):
+            getattr(session, self.command)(**self.kwargs)
+        else:
+            self.command(session, **self.kwargs)
+
+    def record(self, latency, lag, errored):
+        """
+        Record the latency and lag of a completed run.
+
+        Parameters
+        ----------
+        latency : float
+            Duration of the run in seconds.
+        lag : float
+            Delay between the scheduled and actual start of the run in seconds.
+        errored : bool
+            Whether the run raised an error.
+
+        """
+        self.n_runs += 1
+        if errored:
+            self.n_errors += 1
+        self.total_latency += latency
+        self.last_latency = latency
+        self.max_latency = (
+            latency if self.max_latency is None else max(self.max_latency, latency)
+        )
+        self.last_lag = lag
+        self.max_lag = lag if self.max_lag is None else max(self.max_lag, lag)
+
+    @property
+    def stats(self):
+        """Dict of the run counts and latency and lag statistics."""
+        return {
+            "n_runs": self.n_runs,
+            "n_errors": self.n_errors,
+            "n_timeouts": self.n_timeouts,
+            "n_skipped": self.n_skipped,
+            "mean_latency": (
+                self.total_latency / self.n_runs if self.n_runs > 0 else None
+            ),
+            "last_latency": self.last_latency,
+            "max_latency": self.max_latency,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+        }
+
+
+class CollectorScheduler:
+    """
+    Run collectors concurrently, each on its own cadence.
+
+    Runs are scheduled on a fixed grid for each collector (start time plus a
+    multiple of its interval) so the cadence does not drift. A run that is
+    still going when the next one is due causes that slot to be skipped.
+
+    Every run gets its own session from the session factory. After a successful
+    run a "good" daemon status is added. If the command errors, the session is
+    rolled back and an "errored" daemon status and a subsystem error are added.
+
+    Parameters
+    ----------
+    db : DB object
+        Database to get sessions from (e.g. from `mc.connect_to_mc_db`). Not
+        needed if session_factory is set.
+    collectors : list of Collector objects
+        Collectors to run. The names must be unique.
+    daemon_name : str
+        Name to use for the daemon_status records.
+    subsystem_name : str
+        Name to use for the subsystem_error records.
+    hostname : str, optional
+        Hostname to use for the daemon_status records, defaults to this host.
+    max_workers : int, optional
+        Number of worker threads. Defaults to the number of collectors, up to
+        DEFAULT_MAX_WORKERS. The database connection pool should allow at least
+        this many connections. With more collectors than workers a due run can
+        wait for a free worker, that wait is included in the lag and not counted
+        towards the timeout.
+    session_factory : callable, optional
+        Function returning a new session that can be used as a context manager.
+        Defaults to `db.sessionmaker`.
+    report_interval : float, optional
+        If set, print the collector statistics every report_interval seconds.
+
+    """
+
+    def __init__(
+        self,
+        db,
+        collectors,
+        daemon_name,
+        subsystem_name,
+        hostname=None,
+        max_workers=None,
+        session_factory=None,
+        report_interval=None,
+    ):
+        names = [coll.name for coll in collectors]
+        if len(set(names)) != len(names):
+            raise ValueError("Collector names must be unique.")
+        if session_factory is None:
+            session_factory = db.sessionmaker
+        if hostname is None:
+            hostname = socket.gethostname()
+        if max_workers is None:
+            max_workers = max(1, min(len(collectors), DEFAULT_MAX_WORKERS))
+
+        self.collectors = list(collectors)
+        self.daemon_name = daemon_name
+        self.subsystem_name = subsystem_name
+        self.hostname = hostname
+        self.max_workers = max_workers
+        self.session_factory = session_factory
+        self.report_interval = report_interval
+
+        self.executor = None
+        self._stop_event = threading.Event()
+        self._next_report = None
+
+    def start(self, now=None):
+        """
+        Start the worker threads and schedule the first run of every collector.
+
+        Parameters
+        ----------
+        now : float, optional
+            Monotonic time to schedule the first runs at, defaults to now.
+
+        """
+        if now is None:
+            now = time.monotonic()
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=self.daemon_name
+            )
+        for coll in self.collectors:
+            coll.next_run = now
+        if self.report_interval is not None:
+            self._next_report = now + self.report_interval
+
+    def run_pending(self, now=None):
+        """
+        Start the collectors that are due and check for timed out runs.
+
+        Parameters
+        ----------
+        now : float, optional
+            Monotonic time to use, defaults to now.
+
+        Returns
+        -------
+        float
+            Monotonic time when the next collector is due.
+
+        """
+        if self.executor is None:
+            self.start(now=now)
+        if now is None:
+            now = time.monotonic()
+
+        for coll in self.collectors:
+            if coll.future is not None:
+                if coll.future.done():
+                    coll.future = None
+                elif (
+                    coll.run_start is not None
+                    and not coll.timed_out
+                    and now - coll.run_start > coll.timeout
+                ):
+                    coll.timed_out = True
+                    coll.n_timeouts += 1
+                    message = "{name} has not finished after {sec:.1f} seconds".format(
+                        name=coll.name, sec=now - coll.run_start
+                    )
+                    print(
+                        "{t} -- {m}".format(t=time.asctime(), m=message),
+                        file=sys.stderr,
+                    )
+                    self._log_error(message)
+
+            if now < coll.next_run:
+                continue
+            if coll.future is not None:
+                coll.n_skipped += 1
+            else:
+                # the run start is set by the worker, so time spent waiting for a
+                # free worker counts towards the lag rather than the timeout
+                coll.run_start = None
+                coll.timed_out = False
+                coll.future = self.executor.submit(
+                    self._run_collector, coll, now, coll.next_run, time.monotonic()
+                )
+            # move to the first slot on the grid after now
+            n_intervals = floor((now - coll.next_run) / coll.interval) + 1
+            coll.next_run += n_intervals * coll.interval
+
+        if self._next_report is not None and now >= self._next_report:
+            self.report_stats()
+            self._next_report += self.report_interval
+
+        return min(coll.next_run for coll in self.collectors)
+
+    def _run_collector(self, coll, submit_time, scheduled_time, submit_monotonic):
+        """
+        Run a collector in a worker thread with its own session.
+
+        The start of the run is expressed on the scheduler's clock (submit_time,
+        which may be supplied to run_pending) by adding the time the run waited
+        for a worker, so the lag includes the wait.
+        """
+        start = time.monotonic()
+        coll.run_start = submit_time + (start - submit_monotonic)
+        lag = coll.run_start - scheduled_time
+        errored = False
+        try:
+            with self.session_factory() as session:
+                try:
+                    coll.run(session)
+                    session.commit()
+                    session.add_daemon_status(
+                        self.daemon_name, self.hostname, Time.now(), "good"
+                    )
+                    session.commit()
+                except Exception:
+                    errored = True
+                    print(
+                        "{t} -- error calling command {c}".format(
+                            t=time.asctime(), c=coll.name
+                        ),
+                        file=sys.stderr,
+                    )
+                    traceback.print_exc(file=sys.stderr)
+                    traceback_str = traceback.format_exc()
+                    session.rollback()
+                    self._log_error(traceback_str, session=session)
+        except Exception:
+            # errors getting or closing the session
+            errored = True
+            traceback.print_exc(file=sys.stderr)
+            self._log_error(traceback.format_exc())
+        coll.record(time.monotonic() - start, lag, errored)
+
+    def _log_error(self, message, session=None):
+        """
+        Add an "errored" daemon status and a subsystem error.
+
+        If a session is passed and logging with it fails, a new session is tried.
+        Errors logging with a new session are printed rather than raised so the
+        other collectors keep running.
+
+        """
+        if session is not None:
+            try:
+                session.add_daemon_status(
+                    self.daemon_name, self.hostname, Time.now(), "errored"
+                )
+                session.add_subsystem_error(Time.now(), self.subsystem_name, 2, message)
+                session.commit()
+                return
+            except Exception:
+                session.rollback()
+        try:
+            with self.session_factory() as new_session:
+                new_session.add_daemon_status(
+                    self.daemon_name, self.hostname, Time.now(), "errored"
+                )
+                new_session.add_subsystem_error(
+                    Time.now(), self.subsystem_name, 2, message
+                )
+                new_session.commit()
+        except Exception:
+            print(
+                "{t} -- error logging to subsystem_error with a new session".format(
+                    t=time.asctime()
+                ),
+                file=sys.stderr,
+            )
+            traceback.print_exc(file=sys.stderr)
+
+    def stats(self):
+        """
+        Get the statistics for all the collectors.
+
+        Returns
+        -------
+        dict
+            Collector.stats dicts keyed on collector name.
+
+        """
+        return {coll.name: coll.stats for coll in self.collectors}
+
+    def report_stats(self, file=None):
+        """
+        Print a line of statistics for each collector.
+
+        Parameters
+        ----------
+        file : file object, optional
+            File to print to, defaults to sys.stdout.
+
+        """
+        if file is None:
+            file = sys.stdout
+
+        def _fmt(value):
+            return "-" if value is None else "{:.2f}".format(value)
+
+        for name, stats in self.stats().items():
+            print(
+                "{t} -- {name}: runs={n_runs} errors={n_errors} timeouts={n_timeouts} "
+                "skipped={n_skipped} latency mean/max={mean}/{max_lat}s "
+                "lag last/max={last_lag}/{max_lag}s".format(
+                    t=time.asctime(),
+                    name=name,
+                    n_runs=stats["n_runs"],
+                    n_errors=stats["n_errors"],
+                    n_timeouts=stats["n_timeouts"],
+                    n_skipped=stats["n_skipped"],
+                    mean=_fmt(stats["mean_latency"]),
+                    max_lat=_fmt(stats["max_latency"]),
+                    last_lag=_fmt(stats["last_lag"]),
+                    max_lag=_fmt(stats["max_lag"]),
+                ),
+                file=file,
+            )
+
+    def run(self):
+        """Run the collectors until `stop` is called."""
+        self.start()
+        try:
+            while not self._stop_event.is_set():
+                next_run = self.run_pending()
+                wait = min(next_run - time.monotonic(), POLL_INTERVAL)
+                if wait > 0:
+                    self._stop_event.wait(wait)
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        """Stop the run loop after the current iteration."""
+        self._stop_event.set()
+
+    def shutdown(self, wait=True):
+        """
+        Shut down the worker threads.
+
+        Parameters
+        ----------
+        wait : bool
+            Option to wait for running collectors to finish.
+
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
@@ -9,11 +9,11 @@ Anything tracked in the correlator redis database and accessed via hera_corr_cm.
 Includes many SNAP-related things.
 """
 import json
+import threading
 import warnings
 from math import floor
 
 import numpy as np
-import redis
 from astropy.time import Time
 from sqlalchemy import (
     BigInteger,
@@ -33,6 +33,11 @@ DEFAULT_ACCLEN_SPECTRA = 147456
 
 DEFAULT_REDIS_ADDRESS = "redishost"
 
+# Process-wide redis connection pools, created on first use for each redishost (and
+# decode_responses setting) and shared by everything that reads from redis.
+_redis_pools = {}
+_redis_pools_lock = threading.Lock()
+
 signal_source_list = [
     "antenna",
     "load",
@@ -107,7 +112,36 @@ class ArraySignalSource(MCDeclarativeBase):
         return cls(time=corr_time, source=source)
 
 
-def _get_snap_input_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
+def _get_redis_session(redishost=DEFAULT_REDIS_ADDRESS, decode_responses=True):
+    """
+    Get a redis client using the shared connection pool for a redis host.
+
+    Parameters
+    ----------
+    redishost : str
+        Address of redis database
+    decode_responses : bool
+        Option to decode the responses to strings.
+
+    Returns
+    -------
+    redis.Redis object
+
+    """
+    import redis
+
+    key = (redishost, decode_responses)
+    with _redis_pools_lock:
+        redis_pool = _redis_pools.get(key)
+        if redis_pool is None:
+            redis_pool = redis.ConnectionPool(
+                host=redishost, decode_responses=decode_responses
+            )
+            _redis_pools[key] = redis_pool
+    return redis.Redis(connection_pool=redis_pool)
+
+
+def _get_snap_input_from_redis(redishost=DEFAULT_REDIS_ADDRESS, snap_input_dict=None):
     """
     Get the SNAP input state from redis ("adc" or "noise").
 
@@ -115,6 +149,9 @@ def _get_snap_input_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
     ----------
     redishost : str
         Address of redis database
+    snap_input_dict : dict, optional
+        The result of the redis call `hgetall("corr:status:input")` if it has
+        already been made (e.g. in a pipeline).
 
     Returns
     -------
@@ -126,10 +163,9 @@ def _get_snap_input_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
         Time that source was last set.
 
     """
-    redis_pool = redis.ConnectionPool(host=redishost, decode_responses=True)
-    rsession = redis.Redis(connection_pool=redis_pool)
-
-    snap_input_dict = rsession.hgetall("corr:status:input")
+    if snap_input_dict is None:
+        rsession = _get_redis_session(redishost)
+        snap_input_dict = rsession.hgetall("corr:status:input")
     # keys are:
     # - source (either "adc" or "noise")
     # - seed (either "same" or "diff")
@@ -142,7 +178,7 @@ def _get_snap_input_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
     return snap_source, snap_seed_type, snap_time
 
 
-def _get_fem_switch_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
+def _get_fem_switch_from_redis(redishost=DEFAULT_REDIS_ADDRESS, fem_switch_dict=None):
     """
     Get the FEM switch state from redis ("antenna" or "load" or "noise").
 
@@ -150,6 +186,9 @@ def _get_fem_switch_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
     ----------
     redishost : str
         Address of redis database
+    fem_switch_dict : dict, optional
+        The result of the redis call `hgetall("corr:fem_switch_state")` if it has
+        already been made (e.g. in a pipeline).
 
     Returns
     -------
@@ -159,10 +198,9 @@ def _get_fem_switch_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
         Time that the fem_switch was last set.
 
     """
-    redis_pool = redis.ConnectionPool(host=redishost, decode_responses=True)
-    rsession = redis.Redis(connection_pool=redis_pool)
-
-    fem_switch_dict = rsession.hgetall("corr:fem_switch_state")
+    if fem_switch_dict is None:
+        rsession = _get_redis_session(redishost)
+        fem_switch_dict = rsession.hgetall("corr:fem_switch_state")
     # keys are:
     #  - state ("antenna" or "load" or "noise")
     #  - time (a unix time stamp).
@@ -254,10 +292,16 @@ def _get_array_source_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
         If values pulled from redis cannot be interpreted properly.
 
     """
+    # get both hashes in one round trip
+    pipe = _get_redis_session(redishost).pipeline(transaction=False)
+    pipe.hgetall("corr:status:input")
+    pipe.hgetall("corr:fem_switch_state")
+    snap_input_dict, fem_switch_dict = pipe.execute()
+
     snap_source, snap_seed_type, snap_time = _get_snap_input_from_redis(
-        redishost=redishost
+        snap_input_dict=snap_input_dict
     )
-    fem_switch, fem_time = _get_fem_switch_from_redis(redishost=redishost)
+    fem_switch, fem_time = _get_fem_switch_from_redis(fem_switch_dict=fem_switch_dict)
 
     return _define_array_signal_source(
         snap_source, snap_seed_type, snap_time, fem_switch, fem_time
@@ -333,34 +377,56 @@ class CorrelatorComponentEventTime(MCDeclarativeBase):
         return cls(component=component, event=event, time=corr_time)
 
 
-def _get_f_engine_sync_time_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
+def _parse_f_engine_sync_time(sync_time_unix_ms):
     """
-    Get the most recent f-engine sync time from redis.
+    Convert the redis value of "corr:feng_sync_time" to a Time object.
 
     Parameters
     ----------
-    redishost : str
-        Address of redis database
+    sync_time_unix_ms : str or None
+        The result of the redis call `get("corr:feng_sync_time")`.
 
     Returns
     -------
     time : astropy Time object
         Time of the most recent f-engine sync
 
+    Raises
+    ------
+    ValueError
+        If the key was not found in redis.
+
     """
-    redis_pool = redis.ConnectionPool(host=redishost, decode_responses=True)
-    rsession = redis.Redis(connection_pool=redis_pool)
+    if sync_time_unix_ms is None:
+        raise ValueError("The corr:feng_sync_time key was not found in redis.")
 
     # The redis key that is currently being used for this is in unix ms.
     # In the future, this key will change in redis to "feng:sync_time".
     # Unclear if that will be in Unix seconds or ms.
-    sync_time_unix_ms = rsession.get("corr:feng_sync_time")
-
     sync_time_unix = float(sync_time_unix_ms) * 1e-3
 
     return Time(sync_time_unix, format="unix")
 
 
+def _get_f_engine_sync_time_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
+    """
+    Get the most recent f-engine sync time from redis.
+
+    Parameters
+    ----------
+    redishost : str
+        Address of redis database
+
+    Returns
+    -------
+    time : astropy Time object
+        Time of the most recent f-engine sync
+
+    """
+    rsession = _get_redis_session(redishost)
+    return _parse_f_engine_sync_time(rsession.get("corr:feng_sync_time"))
+
+
 def _get_catcher_start_stop_time_from_redis(
     redishost=DEFAULT_REDIS_ADDRESS,
     taking_data_dict=None,
@@ -387,8 +453,7 @@ def _get_catcher_start_stop_time_from_redis(
 
     """
     if taking_data_dict is None:
-        redis_pool = redis.ConnectionPool(host=redishost, decode_responses=True)
-        rsession = redis.Redis(connection_pool=redis_pool)
+        rsession = _get_redis_session(redishost)
         taking_data_dict = rsession.hgetall("corr:is_taking_data")
 
     if len(taking_data_dict) > 0:
@@ -431,13 +496,22 @@ def _get_correlator_component_event_times_from_redis(
     """
     outdict = {}
 
+    # get the keys in one round trip
+    pipe = _get_redis_session(redishost).pipeline(transaction=False)
+    pipe.get("corr:feng_sync_time")
+    if taking_data_dict is None:
+        pipe.hgetall("corr:is_taking_data")
+        sync_time_unix_ms, taking_data_dict = pipe.execute()
+    else:
+        (sync_time_unix_ms,) = pipe.execute()
+
     outdict["f_engine"] = {
         "event": "sync",
-        "time": _get_f_engine_sync_time_from_redis(redishost=redishost),
+        "time": _parse_f_engine_sync_time(sync_time_unix_ms),
     }
 
     catcher_event, catcher_time = _get_catcher_start_stop_time_from_redis(
-        redishost=redishost, taking_data_dict=taking_data_dict
+        taking_data_dict=taking_data_dict
     )
 
     if catcher_event is not None:
@@ -511,8 +585,7 @@ def _get_catcher_file_from_redis(redishost=DEFAULT_REDIS_ADDRESS, test_dict=None
     if test_dict:
         catcher_file_dict = test_dict
     else:
-        redis_pool = redis.ConnectionPool(host=redishost, decode_responses=True)
-        rsession = redis.Redis(connection_pool=redis_pool)
+        rsession = _get_redis_session(redishost)
 
         catcher_file_dict = rsession.hgetall("corr:current_file")
 
@@ -613,8 +686,17 @@ def _get_correlator_file_queues_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
         List of CorrelatorFileQueues objects constructed from the redis file queues.
 
     """
-    redis_pool = redis.ConnectionPool(host=redishost, decode_responses=True)
-    rsession = redis.Redis(connection_pool=redis_pool)
+    # get all the queues in one round trip. lrange gives an empty list for an
+    # empty queue so the ends can be requested along with the lengths.
+    pipe = _get_redis_session(redishost).pipeline(transaction=False)
+    for queue_info in file_queue_names.values():
+        if queue_info["type"] == "queue":
+            pipe.llen(queue_info["redis_key"])
+            pipe.lrange(queue_info["redis_key"], -1, -1)
+            pipe.lrange(queue_info["redis_key"], 0, 0)
+        else:
+            pipe.hgetall(queue_info["redis_key"])
+    results = iter(pipe.execute())
 
     time = Time.now()
     obj_list = []
@@ -622,12 +704,14 @@ def _get_correlator_file_queues_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
         newest = None
         oldest = None
         if queue_info["type"] == "queue":
-            length = rsession.llen(queue_info["redis_key"])
+            length = next(results)
+            queue_newest = next(results)
+            queue_oldest = next(results)
             if length > 0:
-                newest = rsession.lrange(queue_info["redis_key"], -1, -1)
-                oldest = rsession.lrange(queue_info["redis_key"], 0, 0)
+                newest = queue_newest
+                oldest = queue_oldest
         else:
-            rdict = rsession.hgetall(queue_info["redis_key"])
+            rdict = next(results)
             length = len(rdict)
             if length > 0:
                 # with a little bit of poking, it *seems* like the keys are ordered
@@ -750,8 +834,7 @@ def _get_correlator_file_eod_status_from_redis(redishost=DEFAULT_REDIS_ADDRESS):
         when the RTP job was launched.
 
     """
-    redis_pool = redis.ConnectionPool(host=redishost, decode_responses=True)
-    rsession = redis.Redis(connection_pool=redis_pool)
+    rsession = _get_redis_session(redishost)
 
     file_eod_dict = rsession.hgetall("corr:files:jds")
     new_dict = {}
@@ -1659,8 +1742,7 @@ def _get_snap_feng_init_status_from_redis(
 
     """
     if snap_config_dict is None:
-        redis_pool = redis.ConnectionPool(host=redishost, decode_responses=True)
-        rsession = redis.Redis(connection_pool=redis_pool)
+        rsession = _get_redis_session(redishost)
 
         snap_config_dict = rsession.hgetall("snap_log")
         # These keys are:
@@ -3,8 +3,12 @@
 # Licensed under the 2-clause BSD license.
 """Database consistency checking functions."""
 
+import hashlib
+import json
+import os
+
 from sqlalchemy import inspect, text
-from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import OperationalError, ProgrammingError
 
 from . import logger
 
@@ -59,6 +63,11 @@ def is_valid_database(base, session):
 
         base = MCDeclarativeBase
 
+    from . import _import_table_modules
+
+    # make sure all the tables are registered on MCDeclarativeBase
+    _import_table_modules()
+
     engine = session.get_bind()
     try:  # This tries thrice with 5sec sleeps in between
         insp = inspect(engine)
@@ -108,3 +117,163 @@ def is_valid_database(base, session):
             errors = True
 
     return not errors
+
+
+def get_schema_fingerprint(base=None):
+    """
+    Get a fingerprint of the schema declared in a model base.
+
+    The fingerprint covers the table names and the names, types, nullability and
+    primary keys of their columns, so it changes if the models change. It is
+    computed without touching the database.
+
+    Parameters
+    ----------
+    base : Declarative Base, optional
+        Instance of SQLAlchemy Declarative Base, defaults to MCDeclarativeBase.
+
+    Returns
+    -------
+    str
+        Hex digest of the declared schema.
+
+    """
+    if base is None:
+        from . import MCDeclarativeBase
+
+        base = MCDeclarativeBase
+
+    from . import _import_table_modules
+
+    _import_table_modules()
+
+    schema = []
+    for table_name in sorted(base.metadata.tables):
+        table = base.metadata.tables[table_name]
+        columns = sorted(
+            [
+                col.name,
+                type(col.type).__name__,
+                bool(col.nullable),
+                bool(col.primary_key),
+            ]
+            for col in table.columns
+        )
+        schema.append([table_name, columns])
+
+    return hashlib.sha256(json.dumps(schema).encode("utf-8")).hexdigest()
+
+
+def get_alembic_revision(session):
+    """
+    Get the alembic revision the database is at.
+
+    Parameters
+    ----------
+    session : SQLAlchemy session
+        Session to use, bound to an engine.
+
+    Returns
+    -------
+    str or None
+        The alembic revision (comma separated if there are several heads) or
+        None if the database does not have an alembic_version table.
+
+    """
+    try:
+        revisions = session.execute(
+            text("SELECT version_num FROM alembic_version")
+        ).scalars()
+        revisions = sorted(revisions)
+    except (OperationalError, ProgrammingError):
+        # no alembic_version table (e.g. a database made with create_all)
+        session.rollback()
+        return None
+
+    if len(revisions) == 0:
+        return None
+    return ",".join(revisions)
+
+
+def _read_schema_cache(cache_file):
+    """Read the schema cache file, returning an empty dict if it is unusable."""
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    return cache
+
+
+def _write_schema_cache(cache_file, cache):
+    """Write the schema cache file, ignoring errors (the cache is optional)."""
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+        # write to a temporary file and rename so readers never see a partial file
+        tmp_file = "{0}.{1}.tmp".format(cache_file, os.getpid())
+        with open(tmp_file, "w") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning("could not write schema cache file %s: %s", cache_file, e)
+
+
+def check_database_schema(base, session, cache_file=None, deep_check=False):
+    """
+    Check the database schema, skipping the full check if nothing has changed.
+
+    The full check (`is_valid_database`) reflects every table, which takes a
+    query per table. After a successful full check the schema fingerprint of the
+    models and the alembic revision of the database are recorded in the cache
+    file. Later checks of the same database only read the alembic revision and
+    skip the full check if both still match. If the database has no alembic
+    revision the full check is always done.
+
+    Parameters
+    ----------
+    base : Declarative Base
+        Instance of SQLAlchemy Declarative Base to check, None to use
+        MCDeclarativeBase.
+    session : SQLAlchemy session
+        Session to use, bound to an engine.
+    cache_file : str, optional
+        Path to the json file of previous checks. If None, the full check is done
+        and nothing is cached.
+    deep_check : bool
+        Option to always do the full check (the cache is updated if it passes).
+
+    Returns
+    -------
+    True if the database matches the declared models.
+
+    """
+    if cache_file is None:
+        return is_valid_database(base, session)
+
+    fingerprint = get_schema_fingerprint(base)
+    revision = get_alembic_revision(session)
+    db_key = session.get_bind().url.render_as_string(hide_password=True)
+
+    cache = _read_schema_cache(cache_file)
+    entry = cache.get(db_key)
+    if (
+        not deep_check
+        and revision is not None
+        and isinstance(entry, dict)
+        and entry.get("fingerprint") == fingerprint
+        and entry.get("alembic_revision") == revision
+    ):
+        logger.debug("skipping schema check for %s, no changes found", db_key)
+        return True
+
+    valid = is_valid_database(base, session)
+    if valid and revision is not None:
+        cache[db_key] = {"fingerprint": fingerprint, "alembic_revision": revision}
+        _write_schema_cache(cache_file, cache)
+    elif db_key in cache:
+        del cache[db_key]
+        _write_schema_cache(cache_file, cache)
+
+    return valid
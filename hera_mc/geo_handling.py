@@ -10,22 +10,88 @@ Bottom part is the class that does the work.
 """
 
 import copy
+import threading
 import warnings
 
-from numpy import radians
-
-with warnings.catch_warnings():
-    # This filter can be removed when pyuvdata (and maybe other imported packages?)
-    # are updated to use importlib.metadata rather than pkg_resources
-    warnings.filterwarnings(
-        "ignore", "Deprecated call to `pkg_resources.declare_namespace"
-    )
-    from pyuvdata import utils as uvutils
+import numpy as np
 from sqlalchemy import func
 
 from . import cm_partconnect, cm_sysdef, cm_utils, geo_location, mc
 from .data import DATA_PATH
 
+# Process-wide registry of the station types (with their stations) and the center of
+# array, shared by all Handling objects so that e.g. logging an observation does not
+# re-read the geo tables. Entries are keyed on the database and are dropped whenever
+# the latest CMVersion.update_time changes or `geo_location.update` is used. It can be
+# turned off by setting USE_GEO_REGISTRY to False.
+USE_GEO_REGISTRY = True
+_geo_registry = {}
+_geo_registry_lock = threading.Lock()
+_geo_registry_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def get_geo_registry_stats():
+    """
+    Return the process-wide geo registry counters.
+
+    Returns
+    -------
+    dict
+        Keys are "hits", "misses", "invalidations" and "entries".
+
+    """
+    with _geo_registry_lock:
+        stats = dict(_geo_registry_stats)
+        stats["entries"] = len(_geo_registry)
+    return stats
+
+
+def clear_geo_registry():
+    """Clear the process-wide geo registry and reset its counters."""
+    with _geo_registry_lock:
+        _geo_registry.clear()
+        for key in _geo_registry_stats:
+            _geo_registry_stats[key] = 0
+
+
+def _copy_station_types(station_types):
+    """Copy the station types dict, including the station sets."""
+    return {
+        name: dict(info, Stations=set(info["Stations"]))
+        for name, info in station_types.items()
+    }
+
+
+def _location_attrs(loc):
+    """Get the attributes of a located GeoLocation object (columns and derived)."""
+    attrs = {
+        col.key: getattr(loc, col.key)
+        for col in geo_location.GeoLocation.__table__.columns
+    }
+    for key in ["created_date", "desc", "lon", "lat", "X", "Y", "Z"]:
+        attrs[key] = getattr(loc, key)
+    return attrs
+
+
+def _location_from_attrs(attrs):
+    """Make a new (transient) GeoLocation object from `_location_attrs` output."""
+    loc = geo_location.GeoLocation()
+    for key, value in attrs.items():
+        setattr(loc, key, value)
+    return loc
+
+
+def _import_uvutils():
+    """Import pyuvdata.utils, which is slow to import so is only done when needed."""
+    with warnings.catch_warnings():
+        # This filter can be removed when pyuvdata (and maybe other imported packages?)
+        # are updated to use importlib.metadata rather than pkg_resources
+        warnings.filterwarnings(
+            "ignore", "Deprecated call to `pkg_resources.declare_namespace"
+        )
+        from pyuvdata import utils as uvutils
+    return uvutils
+
 
 def cofa(testing=False):
     """Return location class of current COFA."""
@@ -98,6 +164,11 @@ class Handling:
     ----------
     session : Session object
         session on current database.
+    testing : bool
+        Flag to not write out files or show plots when testing.
+    use_registry : bool or None
+        Option to use the process-wide registry of the station types and center of
+        array. If None, use the module level USE_GEO_REGISTRY setting.
 
     """
 
@@ -105,8 +176,10 @@ class Handling:
     hera_zone = [34, "J"]
     lat_corr = {"J": 10000000}
 
-    def __init__(self, session, testing=False):
+    def __init__(self, session, testing=False, use_registry=None):
         self.session = session
+        self.use_registry = use_registry
+        self._registry = None
 
         self.get_station_types()
         self.testing = testing
@@ -115,6 +188,44 @@ class Handling:
         self.graph = False
         self.station_types_plotted = False
 
+    def _registry_entry(self):
+        """
+        Get the process-wide registry entry for this database, None if not in use.
+
+        The first time this is called on an object with the registry in use, the
+        latest CMVersion.update_time is checked and the entry for this database is
+        replaced by an empty one if it has changed.
+
+        """
+        use_registry = (
+            USE_GEO_REGISTRY if self.use_registry is None else self.use_registry
+        )
+        if not use_registry:
+            return None
+        from .cm_transfer import CMVersion
+
+        if self._registry is None:
+            db_key = str(self.session.get_bind().engine.url)
+            cm_version = self.session.query(func.max(CMVersion.update_time)).scalar()
+            with _geo_registry_lock:
+                entry = _geo_registry.get(db_key)
+                if entry is not None and entry["cm_version"] != cm_version:
+                    _geo_registry_stats["invalidations"] += 1
+                    entry = None
+                if entry is None:
+                    entry = _geo_registry[db_key] = {"cm_version": cm_version}
+            self._registry = entry
+        return self._registry
+
+    def _get_registered(self, entry, key):
+        """Get an item from a registry entry, None if it is not there."""
+        if entry is None:
+            return None
+        with _geo_registry_lock:
+            value = entry.get(key)
+            _geo_registry_stats["misses" if value is None else "hits"] += 1
+        return value
+
     def cofa(self):
         """
         Get the current center of array.
@@ -124,12 +235,21 @@ class Handling:
         GeoLocation object
             GeoLocation object for the center of the array.
         """
+        # don't use the registry when writing the locations to a file
+        entry = self._registry_entry() if self.fp_out is None else None
+        cofa_attrs = self._get_registered(entry, "cofa")
+        if cofa_attrs is not None:
+            return [_location_from_attrs(attrs) for attrs in cofa_attrs]
+
         current_cofa = self.station_types["cofa"]["Stations"]
         located = self.get_location(current_cofa, "now")
         if len(located) > 1:  # pragma: no cover
             s = "{} has multiple cofa values.".format(str(current_cofa))
             warnings.warn(s)
 
+        if entry is not None:
+            with _geo_registry_lock:
+                entry["cofa"] = [_location_attrs(loc) for loc in located]
         return located
 
     def get_station_types(self):
@@ -137,7 +257,16 @@ class Handling:
         Add a dictionary of sub-arrays (station_types) to the object.
 
         [station_type_name]{'Prefix', 'Description':'...', 'plot_marker':'...', 'stations':[]}
+
+        The station types are taken from the process-wide registry if it is in use
+        and has them for this database and CM version.
         """
+        entry = self._registry_entry()
+        station_types = self._get_registered(entry, "station_types")
+        if station_types is not None:
+            self.station_types = _copy_station_types(station_types)
+            return
+
         self.station_types = {}
         for sta in self.session.query(geo_location.StationType):
             self.station_types[sta.station_type_name.lower()] = {
@@ -158,6 +287,10 @@ class Handling:
                 )
                 warnings.warn(s)
 
+        if entry is not None:
+            with _geo_registry_lock:
+                entry["station_types"] = _copy_station_types(self.station_types)
+
     def set_graph(self, graph_it):
         """
         Set the graph attribute.
@@ -319,6 +452,97 @@ class Handling:
             )
         return antenna_connected.upstream_part
 
+    def _query_locations(self, to_find_list, query_date):
+        """
+        Get the GeoLocation records for a list of station names in one query.
+
+        Station names are matched case-insensitively (using the index on the upper
+        case station name). The records are returned in the order of to_find_list,
+        names that are not found are skipped.
+        """
+        if isinstance(to_find_list, str):
+            to_find_list = [to_find_list]
+        upper_names = [name.upper() for name in to_find_list]
+        found = {}
+        for loc in self.session.query(geo_location.GeoLocation).filter(
+            func.upper(geo_location.GeoLocation.station_name).in_(set(upper_names))
+            & (geo_location.GeoLocation.created_gpstime < query_date.gps)
+        ):
+            found.setdefault(loc.station_name.upper(), []).append(loc)
+        return [loc for name in upper_names for loc in found.get(name, [])]
+
+    def _transform_locations(self, easting, northing, elevation):
+        """
+        Convert UTM coordinates to lon/lat (in degrees) and ECEF positions.
+
+        Parameters
+        ----------
+        easting, northing, elevation : array of float
+            UTM coordinates in the HERA zone and elevation in m.
+
+        Returns
+        -------
+        lon, lat : array of float
+            Longitude and latitude in degrees.
+        xyz : array of float
+            ECEF positions in m, shape (N, 3).
+
+        """
+        import cartopy.crs as ccrs
+
+        uvutils = _import_uvutils()
+        latlon_p = ccrs.Geodetic()
+        utm_p = ccrs.UTM(self.hera_zone[0])
+        lat_corr = self.lat_corr[self.hera_zone[1]]
+        lonlat = latlon_p.transform_points(
+            utm_p, np.asarray(easting), np.asarray(northing) - lat_corr
+        )
+        lon = lonlat[:, 0]
+        lat = lonlat[:, 1]
+        xyz = uvutils.XYZ_from_LatLonAlt(
+            np.radians(lat), np.radians(lon), np.asarray(elevation)
+        ).reshape(-1, 3)
+        return lon, lat, xyz
+
+    def get_location_columns(
+        self, to_find_list, query_date, query_time=None, float_format=None
+    ):
+        """
+        Get the locations for a list of station_names as arrays.
+
+        Parameters
+        ----------
+        to_find_list :  list of str
+            station names to find
+        query_date :  Anything that `get_astropytime` can translate.
+            Date for query.
+        query_time : Anything that `get_astropytime` can translate.
+            Time for query.
+        float_format : str or None
+            Format if query_date is unix or gps.
+
+        Returns
+        -------
+        dict of numpy arrays
+            Keyed by the geo_location column names and "lon", "lat" (in degrees),
+            "X", "Y" and "Z" (ECEF positions in m), with one entry per station found
+            in the order of to_find_list.
+
+        """
+        self.query_date = cm_utils.get_astropytime(query_date, query_time, float_format)
+        locations = self._query_locations(to_find_list, self.query_date)
+        columns = {
+            col.name: np.array([getattr(loc, col.key) for loc in locations])
+            for col in geo_location.GeoLocation.__table__.columns
+        }
+        columns["lon"], columns["lat"], xyz = self._transform_locations(
+            columns["easting"].astype(float),
+            columns["northing"].astype(float),
+            columns["elevation"].astype(float),
+        )
+        columns["X"], columns["Y"], columns["Z"] = xyz.T
+        return columns
+
     def get_location(
         self, to_find_list, query_date, query_time=None, float_format=None
     ):
@@ -342,37 +566,28 @@ class Handling:
             GeoLocation objects corresponding to station names.
 
         """
-        import cartopy.crs as ccrs
-
-        latlon_p = ccrs.Geodetic()
-        utm_p = ccrs.UTM(self.hera_zone[0])
-        lat_corr = self.lat_corr[self.hera_zone[1]]
-        locations = []
         self.query_date = cm_utils.get_astropytime(query_date, query_time, float_format)
-        for station_name in to_find_list:
-            for a in self.session.query(geo_location.GeoLocation).filter(
-                (
-                    func.upper(geo_location.GeoLocation.station_name)
-                    == station_name.upper()
-                )
-                & (geo_location.GeoLocation.created_gpstime < self.query_date.gps)
-            ):
-                a.gps2Time()
-                a.desc = self.station_types[a.station_type_name]["Description"]
-                # TODO: remove this when cartopy has been updated (needed for v0.21.1)
-                with warnings.catch_warnings():
-                    warnings.filterwarnings(
-                        "ignore", "Conversion of an array with ndim > 0 to a scalar"
-                    )
-                    a.lon, a.lat = latlon_p.transform_point(
-                        a.easting, a.northing - lat_corr, utm_p
-                    )
-                a.X, a.Y, a.Z = uvutils.XYZ_from_LatLonAlt(
-                    radians(a.lat), radians(a.lon), a.elevation
-                )
-                locations.append(copy.copy(a))
-                if self.fp_out is not None and not self.testing:  # pragma: no cover
-                    self.fp_out.write("{}\n".format(self._loc_line(a)))
+        locations = [
+            copy.copy(loc)
+            for loc in self._query_locations(to_find_list, self.query_date)
+        ]
+        return self._add_location_info(locations)
+
+    def _add_location_info(self, locations):
+        """Add the created date, description, lon/lat and ECEF positions to locations."""
+        lon, lat, xyz = self._transform_locations(
+            [loc.easting for loc in locations],
+            [loc.northing for loc in locations],
+            [loc.elevation for loc in locations],
+        )
+        for i, a in enumerate(locations):
+            a.gps2Time()
+            a.desc = self.station_types[a.station_type_name]["Description"]
+            a.lon = float(lon[i])
+            a.lat = float(lat[i])
+            a.X, a.Y, a.Z = xyz[i].tolist()
+            if self.fp_out is not None and not self.testing:  # pragma: no cover
+                self.fp_out.write("{}\n".format(self._loc_line(a)))
         return locations
 
     def _loc_line(self, loc):
@@ -502,37 +717,18 @@ class Handling:
             Stations types to limit check.
 
         """
-        import cartopy.crs as ccrs
-
         station_types_to_check = self.parse_station_types_to_check(
             station_types_to_check
         )
         dt = query_date.gps
-        latlon_p = ccrs.Geodetic()
-        utm_p = ccrs.UTM(self.hera_zone[0])
-        lat_corr = self.lat_corr[self.hera_zone[1]]
-        found_stations = []
-        for a in self.session.query(geo_location.GeoLocation).filter(
-            geo_location.GeoLocation.created_gpstime >= dt
-        ):
-            if a.station_type_name.lower() in station_types_to_check:
-                a.gps2Time()
-                a.desc = self.station_types[a.station_type_name]["Description"]
-                # TODO: remove this when cartopy has been updated (needed for v0.21.1)
-                with warnings.catch_warnings():
-                    warnings.filterwarnings(
-                        "ignore", "Conversion of an array with ndim > 0 to a scalar"
-                    )
-                    a.lon, a.lat = latlon_p.transform_point(
-                        a.easting, a.northing - lat_corr, utm_p
-                    )
-                a.X, a.Y, a.Z = uvutils.XYZ_from_LatLonAlt(
-                    radians(a.lat), radians(a.lon), a.elevation
-                )
-                found_stations.append(copy.copy(a))
-                if self.fp_out is not None and not self.testing:  # pragma: no cover
-                    self.fp_out.write("{}\n".format(self._loc_line(a)))
-        return found_stations
+        found_stations = [
+            copy.copy(a)
+            for a in self.session.query(geo_location.GeoLocation).filter(
+                geo_location.GeoLocation.created_gpstime >= dt
+            )
+            if a.station_type_name.lower() in station_types_to_check
+        ]
+        return self._add_location_info(found_stations)
 
     def get_antenna_label(
         self, label_to_show, stn, query_date, query_time=None, float_format=None
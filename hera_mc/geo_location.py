@@ -5,7 +5,7 @@
 """Keep track of geo-located stations."""
 
 from astropy.time import Time
-from sqlalchemy import BigInteger, Column, Float, ForeignKey, String, func
+from sqlalchemy import BigInteger, Column, Float, ForeignKey, Index, String, func
 
 from . import MCDeclarativeBase, NotNull, cm_utils, mc
 
@@ -87,6 +87,11 @@ class GeoLocation(MCDeclarativeBase):
     elevation = Column(Float)
     created_gpstime = NotNull(BigInteger)
 
+    # station names are looked up case-insensitively
+    __table_args__ = (
+        Index("ix_geo_location_upper_station_name", func.upper(station_name)),
+    )
+
     def gps2Time(self):
         """Add a created_date attribute -- an astropy Time object based on created_gpstime."""
         self.created_date = Time(self.created_gpstime, format="gps")
@@ -170,6 +175,10 @@ def update(session=None, data=None, add_new_geo=False):
                 session.commit()
     cm_utils.log("geo_location update", data_dict=data_dict)
 
+    from .geo_handling import clear_geo_registry
+
+    clear_geo_registry()
+
     return True
 
 
@@ -16,7 +16,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.automap import automap_base
 from sqlalchemy.orm import sessionmaker
 
-from . import MCDeclarativeBase
+from . import MCDeclarativeBase, _import_table_modules
 from .data import DATA_PATH
 from .mc_session import MCSession
 
@@ -24,6 +24,8 @@ test_data_path = op.join(DATA_PATH, "test_data")
 default_config_file = op.expanduser("~/.hera_mc/mc_config.json")
 mc_log_file = op.expanduser("~/.hera_mc/mc_log.txt")
 cm_log_file = op.expanduser("~/.hera_mc/cm_log.txt")
+schema_cache_file = op.expanduser("~/.hera_mc/schema_cache.json")
+cm_hash_cache_file = op.expanduser("~/.hera_mc/cm_table_hash_cache.json")
 
 
 class DB(object, metaclass=ABCMeta):
@@ -40,6 +42,8 @@ class DB(object, metaclass=ABCMeta):
     sqlalchemy_base = None
 
     def __init__(self, sqlalchemy_base, db_url):  # noqa
+        # make sure all the tables are registered on MCDeclarativeBase
+        _import_table_modules()
         if "postgresql" in db_url and "postgresql+psycopg" not in db_url:
             db_url = db_url.replace("postgresql", "postgresql+psycopg")
         self.sqlalchemy_base = MCDeclarativeBase
@@ -78,20 +82,33 @@ class AutomappedDB(DB):
     raises an exception if the existing database does not match the schema
     defined in the SQLAlchemy initialization magic.
 
+    The full schema check reflects every table, so it is only done if the
+    declared models or the alembic revision of the database have changed since
+    the last successful check (recorded in `schema_cache_file`) or if
+    `deep_check` is set.
+
     Parameters
     ----------
     db_url : str
         Database location.
+    deep_check : bool
+        Option to always do the full schema check rather than skipping it when
+        nothing has changed.
+    cache_file : str, optional
+        Path to the json file recording successful schema checks. Set to None to
+        always do the full check without recording it.
 
     """
 
-    def __init__(self, db_url):
+    def __init__(self, db_url, deep_check=False, cache_file=schema_cache_file):
         super(AutomappedDB, self).__init__(automap_base(), db_url)
 
-        from .db_check import is_valid_database
+        from .db_check import check_database_schema
 
         with self.sessionmaker() as session:
-            if not is_valid_database(MCDeclarativeBase, session):
+            if not check_database_schema(
+                MCDeclarativeBase, session, cache_file=cache_file, deep_check=deep_check
+            ):
                 raise RuntimeError(
                     "database {0} does not match expected schema".format(db_url)
                 )
@@ -151,8 +168,9 @@ def get_mc_argument_parser():
     Get an M&C specific `argparse.ArgumentParser` object.
 
     Includes some predefined arguments global to all scripts that interact with
-    the M&C system. Currently, these are the path to the M&C config file, and
-    the name of the M&C database connection to use.
+    the M&C system. Currently, these are the path to the M&C config file, the
+    name of the M&C database connection to use and an option to do the full
+    schema check of a production database.
 
     Once you have parsed arguments, you can pass the resulting object to a
     function like `connect_to_mc_db()` to automatically use the settings it
@@ -176,6 +194,13 @@ def get_mc_argument_parser():
         help="Name of the database to connect to. The default is "
         "used if unspecified.",
     )
+    p.add_argument(
+        "--deep-schema-check",
+        dest="deep_schema_check",
+        action="store_true",
+        help="Always check the full schema of a production database rather than "
+        "skipping the check if nothing has changed since the last check.",
+    )
     return p
 
 
@@ -211,7 +236,7 @@ def get_cm_csv_path(mc_config_file=None, testing=False):
     return cm_csv_path
 
 
-def connect_to_mc_db(args, forced_db_name=None, check_connect=True):
+def connect_to_mc_db(args, forced_db_name=None, check_connect=True, deep_check=None):
     """
     Get a DB object that is connected to the M&C database.
 
@@ -226,6 +251,11 @@ def connect_to_mc_db(args, forced_db_name=None, check_connect=True):
         args.
     check_connect : bool
         Option to test the database connection.
+    deep_check : bool, optional
+        Option to always do the full schema check for production databases
+        rather than skipping it when nothing has changed. Defaults to the
+        `deep_schema_check` item for the database in the config file (or the
+        `--deep-schema-check` argument if set), otherwise False.
 
     Returns
     -------
@@ -284,10 +314,15 @@ def connect_to_mc_db(args, forced_db_name=None, check_connect=True):
             "the DB named {0!r} in {1!r}".format(db_name, config_path)
         )
 
+    if deep_check is None:
+        deep_check = db_data.get("deep_schema_check", False)
+        if args is not None and getattr(args, "deep_schema_check", False):
+            deep_check = True
+
     if db_mode == "testing":
         db = DeclarativeDB(db_url)
     elif db_mode == "production":
-        db = AutomappedDB(db_url)
+        db = AutomappedDB(db_url, deep_check=deep_check)
     else:
         raise RuntimeError(
             "cannot connect to M&C database: unrecognized mode "
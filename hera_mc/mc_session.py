@@ -10,26 +10,32 @@ your database and configure M&C to find it.
 
 import os
 import warnings
+from functools import lru_cache
 from math import floor
 
 import numpy as np
 import yaml
 from astropy.time import Time
 from sqlalchemy import asc, desc
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy.sql.expression import func
 
+try:
+    from sqlalchemy.dialects.postgresql import distinct_on
+except ImportError:  # pragma: no cover
+    # sqlalchemy < 2.1 builds DISTINCT ON from Query.distinct
+    distinct_on = None
+
 from . import cm_utils
 from . import correlator as corr
-from . import geo_handling, node, rtp
+from . import node, rtp, weather
 from .autocorrelations import (
+    Float32ArrayType,
     HeraAuto,
     HeraAutoSpectrum,
     _get_autos_from_redis,
     measurement_func_dict,
 )
-from .cm_active import ActiveData
-from .cm_hookup import Hookup
 from .daemon_status import DaemonStatus
 from .librarian import (
     LibFiles,
@@ -43,9 +49,131 @@ from .qm import AntMetrics, ArrayMetrics, MetricList
 from .subsystem_error import SubsystemError
 from .weather import WeatherData, create_from_sensors, weather_sensor_dict
 
+# Default number of records per multi-row insert statement
+INSERT_CHUNK_SIZE = 500
+
+# PostgreSQL limits the number of bound parameters in a single statement.
+_MAX_BIND_PARAMS = 32767
+
+# Default number of rows fetched from the server and written per chunk when
+# writing query results to a file.
+EXPORT_CHUNK_SIZE = 10000
+
+
+def _get_arrow_type(sa_type):
+    """
+    Get the pyarrow type to use for a (dialect specific) sqlalchemy type.
+
+    Types without a python type that maps onto pyarrow are written as strings.
+
+    Parameters
+    ----------
+    sa_type : sqlalchemy type
+        Column type, as implemented for the dialect in use.
+
+    Returns
+    -------
+    pyarrow DataType
+
+    """
+    import pyarrow as pa
+    from sqlalchemy.types import ARRAY
+
+    if isinstance(sa_type, ARRAY):
+        return pa.list_(_get_arrow_type(sa_type.item_type))
+    if isinstance(sa_type, Float32ArrayType):
+        return pa.list_(pa.float32())
+    try:
+        python_type = sa_type.python_type
+    except NotImplementedError:  # pragma: no cover
+        return pa.string()
+    return {
+        bool: pa.bool_(),
+        int: pa.int64(),
+        float: pa.float64(),
+        str: pa.string(),
+    }.get(python_type, pa.string())
+
+
+def _csv_str(value):
+    """
+    Get the string to write to a CSV file for a value.
+
+    Numpy arrays are written like lists so they are not abbreviated.
+
+    Parameters
+    ----------
+    value : object
+        Value from a query result row.
+
+    Returns
+    -------
+    str
+
+    """
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    return str(value)
+
+
+@lru_cache(maxsize=None)
+def _get_insert_info(table_class):
+    """
+    Get the column and primary key information needed to insert records.
+
+    This is cached per table class so the mapper is only inspected once.
+
+    Parameters
+    ----------
+    table_class : class
+        Class specifying a table to insert into.
+
+    Returns
+    -------
+    columns : tuple of tuple of str
+        Tuples of (attribute key, column name) for each mapped column.
+    primary_keys : tuple of str
+        Names of the primary key columns.
+
+    """
+    from sqlalchemy import inspect
+
+    mapper = inspect(table_class)
+    columns = tuple((col.key, col.expression.name) for col in mapper.column_attrs)
+    primary_keys = tuple(col.name for col in mapper.primary_key)
+    return columns, primary_keys
+
+
+def _import_pandas():
+    """Import pandas for return_format="pandas", with a helpful error if missing."""
+    try:
+        import pandas as pd
+    except ImportError as err:
+        raise ImportError(
+            "pandas is needed for return_format='pandas'. Please install it "
+            "explicitly or run `pip install .[all]` from the top-level of "
+            "hera_mc."
+        ) from err
+    return pd
+
 
 class MCSession(Session):
-    """Primary session object that handles most DB queries."""
+    """
+    Primary session object that handles most DB queries.
+
+    Attributes
+    ----------
+    export_chunk_size : int
+        Number of rows fetched and written per chunk when get methods write their
+        results to a file.
+    export_progress : bool
+        Option to print the number of rows written and the rate when get methods
+        write their results to a file.
+
+    """
+
+    export_chunk_size = EXPORT_CHUNK_SIZE
+    export_progress = False
 
     def __enter__(self):
         """Enter the session."""
@@ -108,6 +236,12 @@ class MCSession(Session):
         """
         Write out query results to a file.
 
+        The rows are streamed from the database (using a server-side cursor where
+        supported) as plain row tuples rather than ORM objects and written out in
+        chunks of `export_chunk_size` rows, so memory use does not grow with the
+        number of records. Filenames ending in ".parquet" are written as Parquet
+        files (this requires pyarrow), otherwise a CSV file is written.
+
         Parameters
         ----------
         table_class : class
@@ -123,17 +257,197 @@ class MCSession(Session):
             table_name = getattr(table_class, "__tablename__")
             filename = table_name + ".csv"
 
-        column_names = [
-            col.name for col in (getattr(getattr(table_class, "__table__"), "_columns"))
-        ]
-        with open(filename, "w") as the_file:
-            # write header
-            the_file.write(", ".join(column_names) + "\n")
+        table_columns = getattr(getattr(table_class, "__table__"), "_columns")
+        column_names = [col.name for col in table_columns]
+
+        result = self._execute_core(query, yield_per=self.export_chunk_size)
+        keys = list(result.keys())
+        col_index = [keys.index(col) for col in column_names]
+
+        start = Time.now()
+        n_rows = 0
+        if filename.endswith(".parquet"):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as err:
+                raise ImportError(
+                    "pyarrow is needed to write parquet files. Please install it "
+                    "explicitly or run `pip install .[all]` from the top-level of "
+                    "hera_mc."
+                ) from err
+            dialect = self.connection().dialect
+            schema = pa.schema(
+                [
+                    (col.name, _get_arrow_type(col.type.dialect_impl(dialect)))
+                    for col in table_columns
+                ]
+            )
+            with pq.ParquetWriter(filename, schema) as writer:
+                for rows in result.partitions():
+                    columns = list(zip(*rows))
+                    batch = pa.record_batch(
+                        [
+                            pa.array(columns[index], type=field.type)
+                            for index, field in zip(col_index, schema)
+                        ],
+                        schema=schema,
+                    )
+                    writer.write_batch(batch)
+                    n_rows += len(rows)
+                    self._report_export_progress(filename, n_rows, start)
+        else:
+            with open(filename, "w") as the_file:
+                # write header
+                the_file.write(", ".join(column_names) + "\n")
+
+                # write rows
+                for rows in result.partitions():
+                    the_file.writelines(
+                        ", ".join([_csv_str(row[index]) for index in col_index]) + "\n"
+                        for row in rows
+                    )
+                    n_rows += len(rows)
+                    self._report_export_progress(filename, n_rows, start)
+        result.close()
+
+    def _execute_core(self, query, yield_per=None):
+        """
+        Execute the Core statement for an ORM query to get plain row tuples.
+
+        This avoids creating ORM objects and adding them to the identity map.
+
+        Parameters
+        ----------
+        query : query object
+            Query to execute.
+        yield_per : int or None
+            If set, fetch the rows in chunks of this size (using a server-side
+            cursor where supported).
+
+        Returns
+        -------
+        sqlalchemy Result object
+
+        """
+        # query execution normally flushes pending changes, so keep that behavior
+        self.flush()
+        execution_options = {} if yield_per is None else {"yield_per": yield_per}
+        return self.connection().execute(
+            query.statement, execution_options=execution_options
+        )
+
+    def _query_results(self, query, table_class, return_format):
+        """
+        Get query results as objects or in the format set by return_format.
+
+        Parameters
+        ----------
+        query : query object
+            Query to get the results of.
+        table_class : class
+            Class specifying the table queried.
+        return_format : {None, "numpy", "pandas"}
+            None returns a list of objects, otherwise see `_query_to_arrays`.
+
+        Returns
+        -------
+        list of objects or dict of numpy arrays or pandas DataFrame
+
+        """
+        if return_format is None:
+            return query.all()
+        if return_format not in ["numpy", "pandas"]:
+            raise ValueError(
+                "return_format must be one of None, 'numpy' or 'pandas'. "
+                "value was: {}".format(return_format)
+            )
+        return self._query_to_arrays(query, table_class, return_format)
+
+    def _query_to_arrays(self, query, table_class, return_format):
+        """
+        Get query results as numpy arrays or a pandas DataFrame.
+
+        Parameters
+        ----------
+        query : query object
+            Query to get the results of.
+        table_class : class
+            Class specifying the table queried.
+        return_format : str
+            "numpy" or "pandas".
+
+        Returns
+        -------
+        dict or pandas DataFrame
+            For "numpy", a dict of numpy arrays keyed on column name. Float
+            columns have NaNs for nulls, integer, boolean and string columns are
+            object arrays if they contain nulls and array columns are 2D if all the
+            arrays have the same length. For "pandas", a DataFrame with a column
+            per table column.
+
+        """
+        table_columns = getattr(getattr(table_class, "__table__"), "_columns")
+        column_names = [col.name for col in table_columns]
+        result = self._execute_core(query)
+        keys = list(result.keys())
+        rows = result.fetchall()
+
+        if return_format == "pandas":
+            pd = _import_pandas()
+            return pd.DataFrame.from_records(rows, columns=keys)[column_names]
+
+        from sqlalchemy.types import ARRAY
+
+        dialect = self.connection().dialect
+        columns = dict(zip(keys, zip(*rows))) if rows else dict.fromkeys(keys, ())
+        arrays = {}
+        for col in table_columns:
+            values = columns[col.name]
+            col_type = col.type.dialect_impl(dialect)
+            if isinstance(col_type, Float32ArrayType):
+                try:
+                    arrays[col.name] = np.asarray(values, dtype=Float32ArrayType.dtype)
+                except ValueError:
+                    arrays[col.name] = np.asarray(values, dtype=object)
+                continue
+            if isinstance(col_type, ARRAY):
+                try:
+                    arrays[col.name] = np.asarray(values, dtype=np.float64)
+                except ValueError:
+                    arrays[col.name] = np.asarray(values, dtype=object)
+                continue
+            try:
+                python_type = col_type.python_type
+            except NotImplementedError:  # pragma: no cover
+                python_type = object
+            if python_type is float:
+                arrays[col.name] = np.asarray(values, dtype=np.float64)
+            elif python_type in (int, bool) and None not in values:
+                arrays[col.name] = np.asarray(values, dtype=python_type)
+            else:
+                arrays[col.name] = np.asarray(values, dtype=object)
+        return arrays
+
+    def _report_export_progress(self, filename, n_rows, start):
+        """
+        Print the number of rows written and the rate if export_progress is set.
+
+        Parameters
+        ----------
+        filename : str
+            Name of file being written.
+        n_rows : int
+            Number of rows written so far.
+        start : astropy Time object
+            Time the export started.
 
-            # write rows
-            for item in query:
-                item_vals = [str(getattr(item, col)) for col in column_names]
-                the_file.write(", ".join(item_vals) + "\n")
+        """
+        if not self.export_progress:
+            return
+        elapsed = (Time.now() - start).sec
+        rate = n_rows / elapsed if elapsed > 0 else float("inf")
+        print(f"{filename}: {n_rows} rows written ({rate:.0f} rows/s)")
 
     def _time_filter(
         self,
@@ -146,6 +460,9 @@ class MCSession(Session):
         filter_value=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
+        max_points=None,
     ):
         """
         Fiter entries by time, used by most get methods on this object.
@@ -160,6 +477,11 @@ class MCSession(Session):
         multiple records at the same time.  If you want a range of times you need to
         set both startime and stoptime.
 
+        If latest_per is set, the most recent record (at or before starttime if it
+        is set, otherwise now) is returned for each value of the latest_per
+        column(s) in a single query, using DISTINCT ON for PostgreSQL and a window
+        function for other databases.
+
         Parameters
         ----------
         table_class : class
@@ -190,13 +512,67 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to get the most recent record for each value of. Only one
+            record is returned per value (ties in time are broken by primary key),
+            ordered by the latest_per column(s). stoptime is ignored.
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame, both built from the rows without creating objects.
+            Ignored if write_to_file is True.
+        max_points : int, optional
+            Maximum number of records to return for a time range. If there are
+            more raw records than this in the range, the hourly or daily rollups
+            (see `update_monitoring_rollups`) are returned instead, using the
+            finest resolution that fits (or daily if none do). If the rollups have
+            not been made over the times of the raw records, a warning is raised
+            and the raw records are returned. The rollups have
+            the mean values in the value columns, with added "<column>_min",
+            "<column>_max" and "<column>_count" columns and a "resolution"
+            column (in seconds). Only used for time ranges (starttime and
+            stoptime set), requires return_format to be set and the table to be
+            in `rollup.rollup_sources`.
 
         Returns
         -------
-        list of objects, optional
-            If write_to_file is False: List of objects that match the filtering.
+        list of objects or dict of numpy arrays or pandas DataFrame, optional
+            If write_to_file is False: the records that match the filtering, in the
+            format set by return_format.
+
+        Raises
+        ------
+        ValueError
+            If latest_per is set and most_recent is False, if return_format is
+            not one of the allowed values or if max_points is set without
+            return_format or for a table without rollups.
 
         """
+        if return_format not in [None, "numpy", "pandas"]:
+            raise ValueError(
+                "return_format must be one of None, 'numpy' or 'pandas'. "
+                "value was: {}".format(return_format)
+            )
+
+        if latest_per is not None:
+            if most_recent is False:
+                raise ValueError("most_recent cannot be False if latest_per is set.")
+            most_recent = True
+
+        if max_points is not None:
+            from .rollup import rollup_sources
+
+            if return_format is None or write_to_file:
+                raise ValueError(
+                    "max_points requires return_format to be 'numpy' or 'pandas'."
+                )
+            if table_class.__tablename__ not in rollup_sources:
+                raise ValueError(
+                    "There are no rollups for the {} table.".format(
+                        table_class.__tablename__
+                    )
+                )
+
         if starttime is None and most_recent is None:
             most_recent = True
 
@@ -244,7 +620,15 @@ class MCSession(Session):
                 if val is not None:
                     query = query.filter(filter_attr[index] == val)
 
-        if most_recent or stoptime is None:
+        if latest_per is not None:
+            query = self._latest_per_query(
+                query,
+                table_class,
+                time_attr,
+                latest_per,
+                Time.now() if starttime is None else starttime,
+            )
+        elif most_recent or stoptime is None:
             if most_recent and starttime is None:
                 current_time = Time.now()
                 # get most recent row
@@ -285,6 +669,21 @@ class MCSession(Session):
 
         else:
             query = query.filter(time_attr.between(starttime.gps, stoptime.gps))
+            # only count as far as needed to know if the raw records fit
+            if (
+                max_points is not None
+                and query.limit(max_points + 1).count() > max_points
+                and self._rollups_cover_query(query, table_class, time_attr)
+            ):
+                return self._get_rollups_for_range(
+                    table_class,
+                    starttime,
+                    stoptime,
+                    filter_column,
+                    filter_value,
+                    max_points,
+                    return_format,
+                )
             query = query.order_by(time_attr)
             if filter_value is not None:
                 for attr in filter_attr:
@@ -292,10 +691,152 @@ class MCSession(Session):
 
         if write_to_file:
             self._write_query_to_file(query, table_class, filename=filename)
+        elif return_format is not None:
+            return self._query_to_arrays(query, table_class, return_format)
         else:
             return query.all()
 
-    def _insert_ignoring_duplicates(self, table_class, obj_list, update=False):
+    def _rollups_cover_query(self, query, table_class, time_attr):
+        """
+        Check that the rollups cover the raw records of a query, warn if not.
+
+        Parameters
+        ----------
+        query : query object
+            Query for the raw records in the time range.
+        table_class : class
+            Class specifying the table with the raw records.
+        time_attr : column attribute
+            Column holding the time.
+
+        Returns
+        -------
+        bool
+            True if the rollups have been made over the times of the raw records.
+
+        """
+        from .rollup import rollups_cover
+
+        first_gps, last_gps = query.with_entities(
+            func.min(time_attr), func.max(time_attr)
+        ).one()
+        if rollups_cover(self, table_class.__tablename__, first_gps, last_gps):
+            return True
+        warnings.warn(
+            "The {} rollups do not cover the requested time range (see "
+            "update_monitoring_rollups), returning the raw records.".format(
+                table_class.__tablename__
+            )
+        )
+        return False
+
+    def _get_rollups_for_range(
+        self,
+        table_class,
+        starttime,
+        stoptime,
+        filter_column,
+        filter_value,
+        max_points,
+        return_format,
+    ):
+        """
+        Get the rollups for a table in place of the raw records for a time range.
+
+        Parameters
+        ----------
+        table_class : class
+            Class specifying the table with the raw records.
+        starttime : astropy Time object
+            Start of the time range.
+        stoptime : astropy Time object
+            End of the time range.
+        filter_column : list of str or None
+            Column names that are filtered on.
+        filter_value : list or None
+            Values the filter_column(s) are required to equal (None to ignore).
+        max_points : int
+            Maximum number of records.
+        return_format : str
+            "numpy" or "pandas".
+
+        Returns
+        -------
+        dict of numpy arrays or pandas DataFrame
+            The rollups, see `rollup.get_rollup_arrays`.
+
+        """
+        from .rollup import get_rollup_arrays
+
+        filters = None
+        if filter_value is not None:
+            filters = dict(zip(filter_column, filter_value))
+        arrays = get_rollup_arrays(
+            self,
+            table_class.__tablename__,
+            starttime,
+            stoptime,
+            filters=filters,
+            max_points=max_points,
+        )
+        if return_format == "pandas":
+            pd = _import_pandas()
+            return pd.DataFrame(arrays)
+        return arrays
+
+    def _latest_per_query(self, query, table_class, time_attr, latest_per, at_time):
+        """
+        Restrict a query to the most recent record per value of some column(s).
+
+        Parameters
+        ----------
+        query : query object
+            Query on table_class with any other filters applied.
+        table_class : class
+            Class specifying a table to query.
+        time_attr : column attribute
+            Column holding the time to filter on.
+        latest_per : str or list of str
+            Column name(s) to get the most recent record for each value of.
+        at_time : astropy Time object
+            Only records at or before this time are considered.
+
+        Returns
+        -------
+        query object
+            Query returning one record per value of latest_per.
+
+        """
+        if isinstance(latest_per, str):
+            latest_per = [latest_per]
+        group_attr = [getattr(table_class, col) for col in latest_per]
+        _, primary_keys = _get_insert_info(table_class)
+        tie_break = [asc(getattr(table_class.__table__.c, col)) for col in primary_keys]
+        query = query.filter(time_attr <= at_time.gps)
+
+        if self.bind.dialect.name == "postgresql":
+            if distinct_on is not None:
+                query = query.ext(distinct_on(*group_attr))
+            else:  # pragma: no cover
+                query = query.distinct(*group_attr)
+            return query.order_by(*group_attr, desc(time_attr), *tie_break)
+
+        row_number = (
+            func.row_number()
+            .over(partition_by=group_attr, order_by=[desc(time_attr)] + tie_break)
+            .label("latest_per_row")
+        )
+        ranked = query.add_columns(row_number).subquery()
+        ranked_class = aliased(table_class, ranked)
+        return (
+            self.query(ranked_class)
+            .filter(ranked.c.latest_per_row == 1)
+            .order_by(*[getattr(ranked_class, col) for col in latest_per])
+        )
+
+    def _insert_ignoring_duplicates(
+        self, table_class, obj_list, update=False, chunk_size=INSERT_CHUNK_SIZE
+    ):
         """
         Insert record handling duplication based on update flag.
 
@@ -305,6 +846,10 @@ class MCSession(Session):
         sample certain data (especially redis data) densely on qmaster or to
         update an existing record.
 
+        The records are sent as multi-row `INSERT ... VALUES (...), (...)` statements
+        with one statement per chunk of records, so that a typical monitoring cycle
+        only needs a handful of round trips to the database.
+
         Parameters
         ----------
         table_class : class
@@ -315,45 +860,52 @@ class MCSession(Session):
             If true, update the existing record with the new data, otherwise do
             nothing (which is appropriate if the data is the same because of
             dense sampling).
+        chunk_size : int
+            Maximum number of records to insert per statement. Setting this to 1
+            gives one statement per record. The chunk size is reduced if needed to
+            keep the number of bound parameters per statement below the PostgreSQL
+            limit.
 
         """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+
         if self.bind.dialect.name == "postgresql":
-            from sqlalchemy import inspect
             from sqlalchemy.dialects.postgresql import insert
 
-            ies = [c.name for c in inspect(table_class).primary_key]
+            columns, ies = _get_insert_info(table_class)
+            chunk_size = min(chunk_size, _MAX_BIND_PARAMS // len(columns))
             conn = self.connection()
 
-            for obj in obj_list:
-                # This appears to be the most correct way to map each row
-                # object into a dictionary:
-                values = {}
-                for col in inspect(obj).mapper.column_attrs:
-                    values[col.expression.name] = getattr(obj, col.key)
+            rows = [
+                {name: getattr(obj, key) for key, name in columns} for obj in obj_list
+            ]
+            if update:
+                # A single statement cannot update the same row twice, so only keep
+                # the last record for each primary key (which is what the
+                # record-by-record approach would leave in the table).
+                rows = list(
+                    {tuple(row[col] for col in ies): row for row in rows}.values()
+                )
 
+            for start in range(0, len(rows), chunk_size):
+                stmt = insert(table_class).values(rows[start : start + chunk_size])
                 if update:
-                    # create dict of columns to update (everything other than
-                    # the primary keys)
-                    update_dict = {}
-                    for col, val in values.items():
-                        if col not in ies:
-                            update_dict[col] = val
-
                     # The special PostgreSQL insert statement lets us update
                     # existing rows via `ON CONFLICT ... DO UPDATE` syntax.
-                    stmt = (
-                        insert(table_class)
-                        .values(**values)
-                        .on_conflict_do_update(index_elements=ies, set_=update_dict)
+                    # Everything other than the primary keys is updated.
+                    update_dict = {
+                        name: stmt.excluded[name]
+                        for _, name in columns
+                        if name not in ies
+                    }
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=ies, set_=update_dict
                     )
                 else:
                     # The special PostgreSQL insert statement lets us ignore
                     # existing rows via `ON CONFLICT ... DO NOTHING` syntax.
-                    stmt = (
-                        insert(table_class)
-                        .values(**values)
-                        .on_conflict_do_nothing(index_elements=ies)
-                    )
+                    stmt = stmt.on_conflict_do_nothing(index_elements=ies)
                 conn.execute(stmt)
         else:  # pragma: no cover
             # Generic approach:
@@ -382,6 +934,8 @@ class MCSession(Session):
             should be used for any other kind of non-science data.
 
         """
+        from . import geo_handling
+
         h = geo_handling.Handling(session=self)
         hera_cofa = h.cofa()[0]
 
@@ -425,6 +979,8 @@ class MCSession(Session):
         tag=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get observation(s) from the M&C database.
@@ -463,6 +1019,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "tag". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -479,6 +1043,8 @@ class MCSession(Session):
             filter_value=tag,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_server_status(
@@ -563,6 +1129,9 @@ class MCSession(Session):
         hostname=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
+        max_points=None,
     ):
         """
         Get subsystem server_status record(s) from the M&C database.
@@ -601,6 +1170,18 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "hostname". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
+        max_points : int, optional
+            Maximum number of records to return for a time range. If there are
+            more, the hourly or daily rollups are returned instead (see
+            `update_monitoring_rollups`). Requires return_format to be set.
 
         Returns
         -------
@@ -624,6 +1205,9 @@ class MCSession(Session):
             filter_value=hostname,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
+            max_points=max_points,
         )
 
     def get_rtp_server_status(
@@ -781,6 +1365,8 @@ class MCSession(Session):
         subsystem=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get subsystem server_status record(s) from the M&C database.
@@ -817,6 +1403,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "subsystem". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -833,6 +1427,8 @@ class MCSession(Session):
             filter_value=subsystem,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_daemon_status(self, name, hostname, time, status, testing=False):
@@ -873,6 +1469,8 @@ class MCSession(Session):
         daemon_name=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get daemon_status record(s) from the M&C database.
@@ -909,6 +1507,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "name". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -925,6 +1531,8 @@ class MCSession(Session):
             filter_value=daemon_name,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_lib_status(
@@ -981,6 +1589,8 @@ class MCSession(Session):
         stoptime=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get lib_status record(s) from the M&C database.
@@ -1014,6 +1624,13 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by. If set, the most recent record for each
+            value is returned in a single query (stoptime is ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -1028,6 +1645,8 @@ class MCSession(Session):
             stoptime=stoptime,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_lib_raid_status(self, time, hostname, num_disks, info):
@@ -1056,6 +1675,8 @@ class MCSession(Session):
         hostname=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get lib_raid_status record(s) from the M&C database.
@@ -1092,6 +1713,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "hostname". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -1108,6 +1737,8 @@ class MCSession(Session):
             filter_value=hostname,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_lib_raid_error(self, time, hostname, disk, log):
@@ -1136,6 +1767,8 @@ class MCSession(Session):
         hostname=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get lib_raid_error record(s) from the M&C database.
@@ -1172,6 +1805,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "hostname". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -1188,6 +1829,8 @@ class MCSession(Session):
             filter_value=hostname,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_lib_remote_status(
@@ -1224,6 +1867,8 @@ class MCSession(Session):
         remote_name=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get lib_remote_status record(s) from the M&C database.
@@ -1260,6 +1905,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "remote_name". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -1276,6 +1929,8 @@ class MCSession(Session):
             filter_value=remote_name,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_lib_file(self, filename, obsid, time, size_gb):
@@ -1305,6 +1960,8 @@ class MCSession(Session):
         stoptime=None,
         write_to_file=False,
         write_filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get lib_files record(s) from the M&C database.
@@ -1345,6 +2002,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "obsid". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -1354,7 +2019,11 @@ class MCSession(Session):
         if filename is not None:
             query = self.query(LibFiles).filter(LibFiles.filename == filename)
         else:
-            if most_recent is not None or starttime is not None:
+            if (
+                most_recent is not None
+                or starttime is not None
+                or latest_per is not None
+            ):
                 return self._time_filter(
                     LibFiles,
                     "time",
@@ -1365,6 +2034,8 @@ class MCSession(Session):
                     filter_value=obsid,
                     write_to_file=write_to_file,
                     filename=write_filename,
+                    latest_per=latest_per,
+                    return_format=return_format,
                 )
             else:
                 if obsid is not None:
@@ -1375,7 +2046,7 @@ class MCSession(Session):
         if write_to_file:
             self._write_query_to_file(query, LibFiles, filename=write_filename)
         else:
-            return query.all()
+            return self._query_results(query, LibFiles, return_format)
 
     def add_rtp_process_event(self, time, obsid, event):
         """
@@ -1401,6 +2072,8 @@ class MCSession(Session):
         obsid=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get rtp_process_event record(s) from the M&C database.
@@ -1436,6 +2109,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "obsid". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -1452,6 +2133,8 @@ class MCSession(Session):
             filter_value=obsid,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_rtp_task_process_event(self, time, obsid, task_name, event):
@@ -1481,6 +2164,8 @@ class MCSession(Session):
         task_name=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get rtp_task_process_event record(s) from the M&C database.
@@ -1518,6 +2203,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name. Ignored if
             write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "obsid". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -1549,6 +2242,8 @@ class MCSession(Session):
                 filter_value=[obsid, task_name],
                 write_to_file=write_to_file,
                 filename=filename,
+                latest_per=latest_per,
+                return_format=return_format,
             )
 
         query = self.query(rtp.RTPTaskProcessEvent)
@@ -1560,7 +2255,7 @@ class MCSession(Session):
         if write_to_file:
             self._write_query_to_file(query, rtp.RTPTaskProcessEvent, filename=filename)
         else:
-            return query.all()
+            return self._query_results(query, rtp.RTPTaskProcessEvent, return_format)
 
     def add_rtp_task_multiple_process_event(self, time, obsid, task_name, event):
         """
@@ -1588,6 +2283,8 @@ class MCSession(Session):
         task_name=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get rtp_task_multiple_process_event record(s) from the M&C database.
@@ -1624,6 +2321,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directoryo named based on the table name. Ignored if
             write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "obsid_start". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -1655,6 +2360,8 @@ class MCSession(Session):
                 filter_value=[obsid_start, task_name],
                 write_to_file=write_to_file,
                 filename=filename,
+                latest_per=latest_per,
+                return_format=return_format,
             )
 
         query = self.query(rtp.RTPTaskMultipleProcessEvent)
@@ -1670,7 +2377,9 @@ class MCSession(Session):
                 query, rtp.RTPTaskMultipleProcessEvent, filename=filename
             )
         else:
-            return query.all()
+            return self._query_results(
+                query, rtp.RTPTaskMultipleProcessEvent, return_format
+            )
 
     def add_rtp_process_record(
         self,
@@ -1739,6 +2448,8 @@ class MCSession(Session):
         obsid=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get rtp_process_record record(s) from the M&C database.
@@ -1774,6 +2485,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "obsid". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -1790,6 +2509,8 @@ class MCSession(Session):
             filter_value=obsid,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_rtp_task_jobid(self, obsid, task_name, start_time, job_id):
@@ -1819,6 +2540,8 @@ class MCSession(Session):
         task_name=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get rtp_task_jobid record(s) from the M&C database.
@@ -1858,6 +2581,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "obsid". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -1889,6 +2620,8 @@ class MCSession(Session):
                 filter_value=[obsid, task_name],
                 write_to_file=write_to_file,
                 filename=filename,
+                latest_per=latest_per,
+                return_format=return_format,
             )
 
         query = self.query(rtp.RTPTaskJobID)
@@ -1901,7 +2634,7 @@ class MCSession(Session):
             self._write_query_to_file(query, rtp.RTPTaskJobID, filename=filename)
 
         else:
-            return query.all()
+            return self._query_results(query, rtp.RTPTaskJobID, return_format)
 
     def add_rtp_task_resource_record(
         self,
@@ -1946,6 +2679,8 @@ class MCSession(Session):
         task_name=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get rtp_task_resource_record from the M&C database.
@@ -1985,6 +2720,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "obsid". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -2016,6 +2759,8 @@ class MCSession(Session):
                 filter_value=[obsid, task_name],
                 write_to_file=write_to_file,
                 filename=filename,
+                latest_per=latest_per,
+                return_format=return_format,
             )
 
         query = self.query(rtp.RTPTaskResourceRecord)
@@ -2030,7 +2775,7 @@ class MCSession(Session):
             )
 
         else:
-            return query.all()
+            return self._query_results(query, rtp.RTPTaskResourceRecord, return_format)
 
     def add_rtp_task_multiple_track(self, obsid_start, task_name, obsid):
         """
@@ -2133,6 +2878,8 @@ class MCSession(Session):
         task_name=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get rtp_task_multiple_jobid record(s) from the M&C database.
@@ -2173,6 +2920,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "obsid_start". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -2204,6 +2959,8 @@ class MCSession(Session):
                 filter_value=[obsid_start, task_name],
                 write_to_file=write_to_file,
                 filename=filename,
+                latest_per=latest_per,
+                return_format=return_format,
             )
 
         query = self.query(rtp.RTPTaskMultipleJobID)
@@ -2218,7 +2975,7 @@ class MCSession(Session):
             )
 
         else:
-            return query.all()
+            return self._query_results(query, rtp.RTPTaskMultipleJobID, return_format)
 
     def add_rtp_task_multiple_resource_record(
         self,
@@ -2264,6 +3021,8 @@ class MCSession(Session):
         task_name=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get rtp_task_multiple_resource_record from the M&C database.
@@ -2304,6 +3063,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "obsid_start". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -2335,6 +3102,8 @@ class MCSession(Session):
                 filter_value=[obsid_start, task_name],
                 write_to_file=write_to_file,
                 filename=filename,
+                latest_per=latest_per,
+                return_format=return_format,
             )
 
         query = self.query(rtp.RTPTaskMultipleResourceRecord)
@@ -2353,7 +3122,9 @@ class MCSession(Session):
             )
 
         else:
-            return query.all()
+            return self._query_results(
+                query, rtp.RTPTaskMultipleResourceRecord, return_format
+            )
 
     def add_rtp_launch_record(
         self,
@@ -2422,6 +3193,8 @@ class MCSession(Session):
         stoptime=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Fetch rtp_launch_record entries based on their submitted_time.
@@ -2454,6 +3227,13 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by. If set, the most recent record for each
+            value is returned in a single query (stoptime is ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -2467,6 +3247,8 @@ class MCSession(Session):
             stoptime=stoptime,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def get_rtp_launch_record_by_jd(self, jd):
@@ -2589,7 +3371,8 @@ class MCSession(Session):
         Add weather data for a given variable and timespan from KAT sensors.
 
         This function connects to the meerkat db and grabs the latest data
-        using the "create_from_sensors" function.
+        using the "create_from_sensors" function. The records are inserted in bulk,
+        records that are already in the database are skipped.
 
         Parameters
         ----------
@@ -2617,8 +3400,60 @@ class MCSession(Session):
         weather_data_list = create_from_sensors(
             starttime, stoptime, variables=variables
         )
-        for obj in weather_data_list:
-            self.add(obj)
+        self._insert_ignoring_duplicates(WeatherData, weather_data_list)
+
+    def backfill_weather_data(
+        self,
+        starttime,
+        stoptime,
+        variables=None,
+        window_sec=weather.DEFAULT_WINDOW_SEC,
+        max_concurrent=weather.DEFAULT_MAX_CONCURRENT,
+        portal_client=None,
+    ):
+        """
+        Add weather data for a long timespan from KAT sensors.
+
+        The sensor histories are fetched in time windows, several at a time, and the
+        records are committed window by window. The progress is recorded in the
+        weather_backfill table, so running it again with the same times after it
+        was stopped resumes where it stopped. See `weather.backfill_from_sensors`.
+
+        Parameters
+        ----------
+        starttime : astropy Time object
+            Time to start getting history.
+        stoptime : astropy Time object
+            Time to stop getting history.
+        variables : str or list of str
+            Variable(s) to get history for. Must be keys in
+            weather.weather_sensor_dict, defaults to all keys in
+            weather.weather_sensor_dict
+        window_sec : float
+            Length of the time windows to request in seconds.
+        max_concurrent : int
+            Maximum number of concurrent requests to katportal.
+        portal_client : KATPortalClient, optional
+            Client to get the sensor histories from, defaults to a client for the
+            MeerKAT portal.
+
+        Returns
+        -------
+        dict
+            Number of records added for each variable.
+
+        """
+        n_records = weather.backfill_from_sensors(
+            self,
+            starttime,
+            stoptime,
+            variables=variables,
+            portal_client=portal_client,
+            window_sec=window_sec,
+            max_concurrent=max_concurrent,
+        )
+        self.commit()
+        return n_records
 
     def get_weather_data(
         self,
@@ -2628,6 +3463,8 @@ class MCSession(Session):
         variable=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get weather_data record(s) from the M&C database.
@@ -2665,6 +3502,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "variable". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -2685,6 +3530,8 @@ class MCSession(Session):
             filter_value=variable,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_node_sensor_readings(
@@ -2765,6 +3612,9 @@ class MCSession(Session):
         nodeID=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
+        max_points=None,
     ):
         """
         Get node_sensor record(s) from the M&C database.
@@ -2801,6 +3651,18 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "node". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
+        max_points : int, optional
+            Maximum number of records to return for a time range. If there are
+            more, the hourly or daily rollups are returned instead (see
+            `update_monitoring_rollups`). Requires return_format to be set.
 
         Returns
         -------
@@ -2817,6 +3679,9 @@ class MCSession(Session):
             filter_value=nodeID,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
+            max_points=max_points,
         )
 
     def add_node_power_status(
@@ -2903,6 +3768,8 @@ class MCSession(Session):
         nodeID=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get node power status record(s) from the M&C database.
@@ -2938,6 +3805,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "node". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -2954,6 +3829,8 @@ class MCSession(Session):
             filter_value=nodeID,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_node_power_command(self, time, nodeID, part, command):
@@ -3008,6 +3885,8 @@ class MCSession(Session):
         nodeID=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get node power command record(s) from the M&C database.
@@ -3043,6 +3922,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "node". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -3059,6 +3946,8 @@ class MCSession(Session):
             filter_value=nodeID,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_node_white_rabbit_status(self, col_dict):
@@ -3244,6 +4133,8 @@ class MCSession(Session):
         nodeID=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get node_white_rabbit_status record(s) from the M&C database.
@@ -3279,6 +4170,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "node". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -3295,6 +4194,8 @@ class MCSession(Session):
             filter_value=nodeID,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_array_signal_source(self, time, source):
@@ -3358,6 +4259,8 @@ class MCSession(Session):
         source=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get array_signal_source record(s) from the M&C database.
@@ -3394,6 +4297,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "source". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -3410,6 +4321,8 @@ class MCSession(Session):
             filter_value=source,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_correlator_component_event_time(self, component, event, time):
@@ -3441,6 +4354,8 @@ class MCSession(Session):
         event=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get correlator_component_event_time record(s) from the M&C database.
@@ -3477,6 +4392,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "component". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -3493,6 +4416,8 @@ class MCSession(Session):
             filter_value=[component, event],
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_correlator_component_event_time_from_redis(
@@ -3666,6 +4591,8 @@ class MCSession(Session):
         stoptime=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get correlator_catcher_file record(s) from the M&C database.
@@ -3699,6 +4626,13 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by. If set, the most recent record for each
+            value is returned in a single query (stoptime is ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -3713,6 +4647,8 @@ class MCSession(Session):
             stoptime=stoptime,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_correlator_file_queues(
@@ -3782,6 +4718,8 @@ class MCSession(Session):
         stoptime=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get correlator_file_queues record(s) from the M&C database.
@@ -3819,6 +4757,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "queue". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -3835,6 +4781,8 @@ class MCSession(Session):
             filter_value=queue,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def get_correlator_file_eod(self, jd):
@@ -4112,6 +5060,8 @@ class MCSession(Session):
             SNAP hostname if serial_number is found in the part_rosetta None otherwise.
 
         """
+        from .cm_active import ActiveData
+
         active = ActiveData(session=self, at_date=at_date, float_format="gps")
         active.load_rosetta()
         if serial_number in active.rosetta.keys():
@@ -4140,6 +5090,8 @@ class MCSession(Session):
             in the part_rosetta, None otherwise.
 
         """
+        from .cm_active import ActiveData
+
         active = ActiveData(session=self, at_date=at_date, float_format="gps")
         active.load_rosetta()
 
@@ -4151,7 +5103,9 @@ class MCSession(Session):
 
         return serial_number
 
-    def _get_node_snap_from_serial(self, snap_serial, session=None, at_date="now"):
+    def _get_node_snap_from_serial(
+        self, snap_serial, session=None, at_date="now", cm_snapshot=None
+    ):
         """
         Get SNAP connection information from SNAP serial number.
 
@@ -4162,7 +5116,10 @@ class MCSession(Session):
         session : Session object
             Session to pass to cm_handling.Handling. Defaults to self.
         at_date : "now", Time or gps second
-            Date at which to initialize.
+            Date at which to initialize. Ignored if cm_snapshot is passed.
+        cm_snapshot : cm_sysutils.SnapCMInfo object, optional
+            Snapshot of the SNAP config management info to use for the lookup.
+            If None, the config management tables are read for this SNAP.
 
         Returns
         -------
@@ -4172,8 +5129,12 @@ class MCSession(Session):
             SNAP location number.
 
         """
+        if cm_snapshot is not None:
+            return cm_snapshot.get_node_snap_from_serial(snap_serial)
         if session is None:
             session = self
+        from .cm_active import ActiveData
+
         active = ActiveData(session=self, at_date=at_date, float_format="gps")
         active.load_parts()
         active.load_connections()
@@ -4202,7 +5163,7 @@ class MCSession(Session):
 
         return nodeID, snap_loc_num
 
-    def _get_node_snap_from_snap_hostname(self, hostname, at_date):
+    def _get_node_snap_from_snap_hostname(self, hostname, at_date, cm_snapshot=None):
         """
         Get SNAP connection information from SNAP hostname.
 
@@ -4211,7 +5172,10 @@ class MCSession(Session):
         hostname : str
             SNAP hostname.
         at_date : 'now', Time or gps second
-            Date at which to initialize.
+            Date at which to initialize. Ignored if cm_snapshot is passed.
+        cm_snapshot : cm_sysutils.SnapCMInfo object, optional
+            Snapshot of the SNAP config management info to use for the lookup.
+            If None, the config management tables are read for this SNAP.
 
         Returns
         -------
@@ -4221,6 +5185,8 @@ class MCSession(Session):
             SNAP location number.
 
         """
+        if cm_snapshot is not None:
+            return cm_snapshot.get_node_snap_from_hostname(hostname)
         snap_hpn = self.get_snap_serial_from_hostname(hostname, at_date=at_date)
         if snap_hpn is not None:
             nodeID, snap_loc_num = self._get_node_snap_from_serial(
@@ -4232,7 +5198,9 @@ class MCSession(Session):
 
         return nodeID, snap_loc_num
 
-    def _get_node_snap_lists_for_configs(self, config_obj_list, time_list=None):
+    def _get_node_snap_lists_for_configs(
+        self, config_obj_list, time_list=None, use_cm_snapshot=True
+    ):
         """
         Get SNAP connection information for lists of config objects.
 
@@ -4243,6 +5211,10 @@ class MCSession(Session):
             or CorrelatorConfigPhaseSwitchIndex.
         time_list : list of astropy Time objects
             Times corresponding to objects in config_obj_list. Use now if None.
+        use_cm_snapshot : bool
+            Option to build one cm_sysutils.SnapCMInfo snapshot per distinct time and
+            resolve all the lookups from it. If False, the config management tables
+            are read for every object.
 
         Returns
         -------
@@ -4252,15 +5224,25 @@ class MCSession(Session):
             List of SNAP location numbers.
 
         """
+        from .cm_sysutils import SnapCMInfo
+
         node_list = []
         loc_num_list = []
+        cm_snapshots = {}
         for index, obj in enumerate(config_obj_list):
             if time_list is None:
                 at_date = "now"
             else:
                 at_date = time_list[index]
+            if use_cm_snapshot:
+                snapshot_key = at_date if isinstance(at_date, str) else at_date.gps
+                if snapshot_key not in cm_snapshots:
+                    cm_snapshots[snapshot_key] = SnapCMInfo(self, at_date=at_date)
+                cm_snapshot = cm_snapshots[snapshot_key]
+            else:
+                cm_snapshot = None
             node, loc_num = self._get_node_snap_from_snap_hostname(
-                obj.hostname, at_date=at_date
+                obj.hostname, at_date=at_date, cm_snapshot=cm_snapshot
             )
             node_list.append(node)
             loc_num_list.append(loc_num)
@@ -4589,6 +5571,8 @@ class MCSession(Session):
         stoptime=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get correlator config status record(s) from the M&C database.
@@ -4624,6 +5608,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "config_hash". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -4640,6 +5632,8 @@ class MCSession(Session):
             filter_value=config_hash,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def _add_config_file_to_librarian(
@@ -4828,6 +5822,8 @@ class MCSession(Session):
         package=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get correlator software versions record(s) from the M&C database.
@@ -4863,6 +5859,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "package". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -4879,6 +5883,8 @@ class MCSession(Session):
             filter_value=package,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_snap_config_version(self, init_time, version, init_args, config_hash):
@@ -4910,6 +5916,8 @@ class MCSession(Session):
         stoptime=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get SNAP configuration and version record(s) from the M&C database.
@@ -4943,6 +5951,13 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by. If set, the most recent record for each
+            value is returned in a single query (stoptime is ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -4957,6 +5972,8 @@ class MCSession(Session):
             stoptime=stoptime,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_corr_snap_versions_from_corrcm(
@@ -5073,6 +6090,7 @@ class MCSession(Session):
         dest_is_configured,
         version,
         sample_rate,
+        cm_snapshot=None,
     ):
         """
         Add new snap status data to the M&C database.
@@ -5108,10 +6126,15 @@ class MCSession(Session):
             Version of firmware installed
         sample_rate : float
             Sample rate in MHz
+        cm_snapshot : cm_sysutils.SnapCMInfo object, optional
+            Snapshot of the SNAP config management info to use to get the node and
+            SNAP location number. If None, the config management tables are read.
 
         """
         # get node & snap location number from config management
-        nodeID, snap_loc_num = self._get_node_snap_from_serial(serial_number)
+        nodeID, snap_loc_num = self._get_node_snap_from_serial(
+            serial_number, cm_snapshot=cm_snapshot
+        )
 
         self.add(
             corr.SNAPStatus.create(
@@ -5143,6 +6166,9 @@ class MCSession(Session):
         nodeID=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
+        max_points=None,
     ):
         """
         Get snap status record(s) from the M&C database.
@@ -5180,6 +6206,18 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "hostname". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
+        max_points : int, optional
+            Maximum number of records to return for a time range. If there are
+            more, the hourly or daily rollups are returned instead (see
+            `update_monitoring_rollups`). Requires return_format to be set.
 
         Returns
         -------
@@ -5196,10 +6234,18 @@ class MCSession(Session):
             filter_value=[hostname, nodeID],
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
+            max_points=max_points,
         )
 
     def _get_antennas_for_snap(
-        self, snap_hostname, snap_channel_number=None, session=None, at_date="now"
+        self,
+        snap_hostname,
+        snap_channel_number=None,
+        session=None,
+        at_date="now",
+        cm_snapshot=None,
     ):
         """
         Get antenna number and pol connected to SNAP hostname and input from cm.
@@ -5213,7 +6259,10 @@ class MCSession(Session):
         session : Session object
             Session to pass to cm_handling.Handling. Defaults to self.
         at_date : "now", Time or gps second
-            Date at which to initialize.
+            Date at which to initialize. Ignored if cm_snapshot is passed.
+        cm_snapshot : cm_sysutils.SnapCMInfo object, optional
+            Snapshot of the SNAP config management info to use for the lookup.
+            If None, the config management tables are read for this SNAP.
 
         Returns
         -------
@@ -5222,6 +6271,10 @@ class MCSession(Session):
             (integer antenna number) and "pol" string, either "e" or "n".
 
         """
+        if cm_snapshot is not None:
+            return cm_snapshot.get_antennas_for_snap(
+                snap_hostname, snap_channel_number=snap_channel_number
+            )
         if session is None:
             session = self
 
@@ -5243,6 +6296,8 @@ class MCSession(Session):
 
             return output_dict
 
+        from .cm_hookup import Hookup
+
         hookup = Hookup(session)
         hd = hookup.get_hookup(snap_serial, at_date="now", exact_match=True)
         snapr = f"{snap_serial.upper()}:A"
@@ -5274,9 +6329,10 @@ class MCSession(Session):
         hostname,
         snap_channel_number,
         snap_input,
+        cm_snapshot=None,
     ):
         """
-        Add new snap status data to the M&C database.
+        Add new snap input data to the M&C database.
 
         Parameters
         ----------
@@ -5288,10 +6344,15 @@ class MCSession(Session):
             The SNAP ADC channel number (0-5).
         snap_input : str
             Either "adc" or "noise-%d" where %d is the noise seed.
+        cm_snapshot : cm_sysutils.SnapCMInfo object, optional
+            Snapshot of the SNAP config management info to use to get the attached
+            antenna and polarization. If None, the config management tables are read.
 
         """
         # get attached antpols from config management
-        antpol_dict = self._get_antennas_for_snap(hostname, snap_channel_number)
+        antpol_dict = self._get_antennas_for_snap(
+            hostname, snap_channel_number, cm_snapshot=cm_snapshot
+        )
 
         self.add(
             corr.SNAPInput.create(
@@ -5312,6 +6373,8 @@ class MCSession(Session):
         hostname=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get snap input record(s) from the M&C database.
@@ -5347,6 +6410,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "hostname". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -5363,6 +6434,8 @@ class MCSession(Session):
             filter_value=hostname,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_snap_status_from_corrcm(
@@ -5371,6 +6444,7 @@ class MCSession(Session):
         testing=False,
         cm_session=None,
         redishost=corr.DEFAULT_REDIS_ADDRESS,
+        use_cm_snapshot=True,
     ):
         """Get and add snap status information using a HeraCorrCM object.
 
@@ -5398,6 +6472,11 @@ class MCSession(Session):
             be set to another session instance (useful for testing).
         redishost : str
             redis address to use. Defaults to correlator.DEFAULT_REDIS_ADDRESS.
+        use_cm_snapshot : bool
+            Option to build a single cm_sysutils.SnapCMInfo snapshot of the config
+            management info and resolve the node, SNAP location and antenna lookups
+            for all SNAPs from it. If False, the config management tables are read
+            for every SNAP (slow, mostly useful for validation).
 
         Returns
         -------
@@ -5410,6 +6489,15 @@ class MCSession(Session):
             snap_status_dict = corr._get_snap_status(
                 corr_cm=self.corr_obj, redishost=redishost
             )
+        if use_cm_snapshot:
+            from .cm_sysutils import SnapCMInfo
+
+            if cm_session is None:
+                cm_session = self
+            cm_snapshot = SnapCMInfo(cm_session)
+        else:
+            cm_snapshot = None
+
         snap_status_list = []
         snap_input_list = []
         for hostname, snap_dict in snap_status_dict.items():
@@ -5434,7 +6522,7 @@ class MCSession(Session):
             sample_rate = snap_dict["sample_rate"]
 
             # get attached antpols from config management
-            antpol_dict = self._get_antennas_for_snap(hostname)
+            antpol_dict = self._get_antennas_for_snap(hostname, cm_snapshot=cm_snapshot)
             if snap_dict["input"] is None:
                 for snap_channel_number in range(6):
                     snap_input_list.append(
@@ -5470,7 +6558,7 @@ class MCSession(Session):
             # get nodeID & snap location number from config management
             if serial_number is not None:
                 nodeID, snap_loc_num = self._get_node_snap_from_serial(
-                    serial_number, session=cm_session
+                    serial_number, session=cm_session, cm_snapshot=cm_snapshot
                 )
             else:
                 nodeID = None
@@ -5530,6 +6618,8 @@ class MCSession(Session):
         hostname=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get snap feng init status record(s) from the M&C database.
@@ -5565,6 +6655,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "hostname". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -5581,6 +6679,8 @@ class MCSession(Session):
             filter_value=hostname,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
         )
 
     def add_snap_feng_init_status_from_redis(
@@ -5756,6 +6856,9 @@ class MCSession(Session):
         antenna_number=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
+        max_points=None,
     ):
         """
         Get antenna status record(s) from the M&C database.
@@ -5791,6 +6894,18 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "antenna_number". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
+        max_points : int, optional
+            Maximum number of records to return for a time range. If there are
+            more, the hourly or daily rollups are returned instead (see
+            `update_monitoring_rollups`). Requires return_format to be set.
 
         Returns
         -------
@@ -5807,6 +6922,9 @@ class MCSession(Session):
             filter_value=antenna_number,
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
+            max_points=max_points,
         )
 
     def add_antenna_status_from_corrcm(
@@ -5890,6 +7008,8 @@ class MCSession(Session):
         obsid=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get antenna metric(s) from the M&C database.
@@ -5935,6 +7055,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "ant". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -5967,6 +7095,8 @@ class MCSession(Session):
                 filter_value=[ant, pol, metric, obsid],
                 write_to_file=write_to_file,
                 filename=filename,
+                latest_per=latest_per,
+                return_format=return_format,
             )
 
         query = self.query(AntMetrics)
@@ -5983,7 +7113,7 @@ class MCSession(Session):
             self._write_query_to_file(query, AntMetrics, filename=filename)
 
         else:
-            return query.all()
+            return self._query_results(query, AntMetrics, return_format)
 
     def add_array_metric(self, obsid, metric, val):
         """
@@ -6013,6 +7143,8 @@ class MCSession(Session):
         obsid=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
     ):
         """
         Get array metric(s) from the M&C database.
@@ -6050,6 +7182,14 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "metric". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
 
         Returns
         -------
@@ -6076,6 +7216,8 @@ class MCSession(Session):
                 filter_value=[metric, obsid],
                 write_to_file=write_to_file,
                 filename=filename,
+                latest_per=latest_per,
+                return_format=return_format,
             )
 
         query = self.query(ArrayMetrics)
@@ -6088,7 +7230,7 @@ class MCSession(Session):
             self._write_query_to_file(query, ArrayMetrics, filename=filename)
 
         else:
-            return query.all()
+            return self._query_results(query, ArrayMetrics, return_format)
 
     def add_metric_desc(self, metric, desc):
         """
@@ -6350,6 +7492,9 @@ class MCSession(Session):
         feed_pol=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
+        max_points=None,
     ):
         """
         Get  autocorrelation record(s) from the M&C database.
@@ -6387,6 +7532,18 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "antenna_number". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
+        max_points : int, optional
+            Maximum number of records to return for a time range. If there are
+            more, the hourly or daily rollups are returned instead (see
+            `update_monitoring_rollups`). Requires return_format to be set.
 
         Returns
         -------
@@ -6403,6 +7560,9 @@ class MCSession(Session):
             filter_value=[antenna_number, feed_pol],
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
+            max_points=max_points,
         )
 
     def get_autocorrelation_spectrum(
@@ -6414,6 +7574,9 @@ class MCSession(Session):
         feed_pol=None,
         write_to_file=False,
         filename=None,
+        latest_per=None,
+        return_format=None,
+        as_array=False,
     ):
         """
         Get autocorrelation spectrum record(s) from the M&C database.
@@ -6451,13 +7614,34 @@ class MCSession(Session):
             Name of file to write to. If not provided, defaults to a file in the
             current directory named based on the table name.
             Ignored if write_to_file is False.
+        latest_per : str or list of str
+            Column name(s) to group by, e.g. "antenna_number". If set, the most recent
+            record for each value is returned in a single query (stoptime is
+            ignored).
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
+        as_array : bool
+            Option to return the spectra as a single (Ntimes, Nants, Nfreq) float32
+            array rather than a record per spectrum. The antenna axis runs over
+            the (antenna_number, antenna_feed_pol) pairs present in the results,
+            missing spectra are filled with NaNs. Cannot be combined with
+            return_format, ignored if write_to_file is True.
 
         Returns
         -------
-        list of HeraAutoSpectrum objects
+        list of HeraAutoSpectrum objects or dict
+            If as_array is True, a dict with keys "time" (gps seconds, length Ntimes),
+            "antenna_number" and "antenna_feed_pol" (length Nants) and "spectrum"
+            (shape (Ntimes, Nants, Nfreq)).
 
         """
-        return self._time_filter(
+        if as_array and not write_to_file:
+            if return_format is not None:
+                raise ValueError("as_array cannot be combined with return_format.")
+            return_format = "numpy"
+        result = self._time_filter(
             HeraAutoSpectrum,
             "time",
             most_recent=most_recent,
@@ -6467,4 +7651,167 @@ class MCSession(Session):
             filter_value=[antenna_number, feed_pol],
             write_to_file=write_to_file,
             filename=filename,
+            latest_per=latest_per,
+            return_format=return_format,
+        )
+        if not as_array or write_to_file:
+            return result
+
+        times, time_index = np.unique(result["time"], return_inverse=True)
+        antpols = list(
+            zip(result["antenna_number"].tolist(), result["antenna_feed_pol"].tolist())
+        )
+        antpol_axis = sorted(set(antpols))
+        antpol_lookup = {antpol: index for index, antpol in enumerate(antpol_axis)}
+        antpol_index = np.asarray(
+            [antpol_lookup[antpol] for antpol in antpols], dtype=np.intp
+        )
+
+        spectra = result["spectrum"]
+        if spectra.dtype == object:
+            raise ValueError(
+                "The spectra have different numbers of frequencies so cannot be "
+                "combined into an array."
+            )
+        n_freq = spectra.shape[1] if spectra.ndim == 2 else 0
+        cube = np.full(
+            (times.size, len(antpol_axis), n_freq), np.nan, dtype=spectra.dtype
+        )
+        cube[time_index, antpol_index] = spectra
+
+        return {
+            "time": times,
+            "antenna_number": np.asarray(
+                [antpol[0] for antpol in antpol_axis], dtype=np.int64
+            ),
+            "antenna_feed_pol": np.asarray(
+                [antpol[1] for antpol in antpol_axis], dtype=object
+            ),
+            "spectrum": cube,
+        }
+
+    def update_monitoring_rollups(self, sources=None, starttime=None, stoptime=None):
+        """
+        Update the hourly and daily rollups of the high cadence monitoring tables.
+
+        By default the rollups are updated incrementally from the latest hourly
+        bucket already stored for each table. This is meant to be run
+        periodically (e.g. by `mc_update_rollups.py`).
+
+        Parameters
+        ----------
+        sources : list of str, optional
+            Names of the tables to update the rollups for, defaults to all the
+            tables in `rollup.rollup_sources`.
+        starttime : astropy Time object, optional
+            Time to recompute the rollups from, e.g. after backfilling raw data.
+        stoptime : astropy Time object, optional
+            Time to update the rollups up to, defaults to now.
+
+        Returns
+        -------
+        dict
+            Number of rollup rows written keyed on table name.
+
+        """
+        from .rollup import update_rollups
+
+        n_written = update_rollups(
+            self, sources=sources, starttime=starttime, stoptime=stoptime
+        )
+        self.commit()
+        return n_written
+
+    def get_monitoring_rollup(
+        self,
+        source,
+        resolution="hour",
+        most_recent=None,
+        starttime=None,
+        stoptime=None,
+        variable=None,
+        entity=None,
+        write_to_file=False,
+        filename=None,
+        return_format=None,
+    ):
+        """
+        Get monitoring_rollup record(s) from the M&C database.
+
+        Default behavior is to return the most recent record(s) -- there can be
+        more than one if there are multiple records at the same time.
+        If only starttime is set, this method will return the first record(s) after the
+        starttime -- again there can be more than one if there are multiple records at
+        the same time.  If both most_recent and starttime are set, this method will
+        return the most recent record(s) at the starttime, meaning the record with the
+        largest time <= starttime -- again there can be more than one if there are
+        multiple records at the same time.  If you want a range of times you need to
+        set both startime and stoptime.
+
+        Parameters
+        ----------
+        source : str
+            Name of the table the rollups are for, one of the keys in
+            `rollup.rollup_sources`.
+        resolution : {"hour", "day"}
+            Resolution of the rollups.
+        most_recent : bool
+            Option to get the most recent record(s). Defaults to True if starttime is
+            None. If both most_recent and starttime are set, get the most recent record
+            before the starttime.
+        starttime : astropy Time object
+            Time to look for records after or, if most_recent is True, time to get the
+            get the most recent value for.
+        stoptime : astropy Time object
+            Last time to get records for, only used if starttime is not None.
+            If none, only the first record after starttime will be returned.
+            Ignored if most_recent is True.
+        variable : str, optional
+            Variable to get records for. If none, all variables will be included.
+        entity : str, optional
+            Entity to get records for (the entity column values joined by ":",
+            e.g. "3" for node 3 or "12:e" for antenna 12, feed e). If none, all
+            entities will be included.
+        write_to_file : bool
+            Option to write records to a CSV file.
+        filename : str
+            Name of file to write to. If not provided, defaults to a file in the
+            current directory named based on the table name.
+            Ignored if write_to_file is False.
+        return_format : {None, "numpy", "pandas"}
+            Format for the returned records. None returns a list of objects, "numpy"
+            returns a dict of numpy arrays keyed on column name and "pandas" returns
+            a DataFrame. Ignored if write_to_file is True.
+
+        Returns
+        -------
+        list of MonitoringRollup objects
+
+        """
+        from .rollup import MonitoringRollup, rollup_resolutions, rollup_sources
+
+        if source not in rollup_sources:
+            raise ValueError(
+                "source must be one of {}. value was: {}".format(
+                    list(rollup_sources.keys()), source
+                )
+            )
+        if resolution not in rollup_resolutions:
+            raise ValueError(
+                "resolution must be one of {}. value was: {}".format(
+                    list(rollup_resolutions.keys()), resolution
+                )
+            )
+
+        return self._time_filter(
+            MonitoringRollup,
+            "bucket_start",
+            most_recent=most_recent,
+            starttime=starttime,
+            stoptime=stoptime,
+            filter_column=["source", "resolution", "variable", "entity"],
+            filter_value=[source, rollup_resolutions[resolution], variable, entity],
+            write_to_file=write_to_file,
+            filename=filename,
+            return_format=return_format,
         )
@@ -0,0 +1,660 @@
+# -*- mode: python; coding: utf-8 -*-
+# Copyright 2026 the HERA Collaboration
+# Licensed under the 2-clause BSD license.
+
+"""
+Hourly and daily rollups of the high cadence monitoring tables.
+
+The rollups hold the minimum, maximum, mean and number of values of each
+monitored quantity per entity (e.g. per node or per antenna and feed) in each
+time bucket, so long time ranges can be plotted without reading the raw rows.
+Hourly rollups are computed from the raw rows and daily rollups from the hourly
+ones. They are updated incrementally by `MCSession.update_monitoring_rollups`.
+
+The columns in this module are documented in docs/mc_definition.tex,
+the documentation needs to be kept up to date with any changes.
+"""
+
+import importlib
+from math import floor
+
+import numpy as np
+from astropy.time import Time
+from sqlalchemy import BigInteger, Column, Float, Integer, String, func, insert
+
+from . import MCDeclarativeBase
+
+# bucket lengths in seconds
+rollup_resolutions = {"hour": 3600, "day": 86400}
+# separator between the entity column values in the entity column
+ENTITY_SEPARATOR = ":"
+# number of rows per executemany call when writing rollups
+ROLLUP_INSERT_BATCH_SIZE = 5000
+# number of raw rows to fetch at a time for sources aggregated in python
+ROLLUP_FETCH_BATCH_SIZE = 1000
+
+
+class MonitoringRollup(MCDeclarativeBase):
+    """
+    Definition of monitoring_rollup table.
+
+    Attributes
+    ----------
+    source : String Column
+        Name of the table the values are from. Part of the primary key.
+    resolution : Integer Column
+        Length of the time bucket in seconds (3600 or 86400). Part of the
+        primary key.
+    bucket_start : BigInteger Column
+        GPS second of the start of the time bucket. Part of the primary key.
+    variable : String Column
+        Name of the quantity (usually the column name in the source table).
+        Part of the primary key.
+    entity : String Column
+        Values of the columns identifying what the quantity was measured for
+        (e.g. the node or the antenna number and feed polarization), joined by
+        ":". Part of the primary key.
+    count : BigInteger Column
+        Number of values in the bucket.
+    min_value : Float Column
+        Minimum value in the bucket.
+    max_value : Float Column
+        Maximum value in the bucket.
+    mean_value : Float Column
+        Mean value in the bucket.
+
+    """
+
+    __tablename__ = "monitoring_rollup"
+    source = Column(String(64), primary_key=True)
+    resolution = Column(Integer, primary_key=True, autoincrement=False)
+    bucket_start = Column(BigInteger, primary_key=True, autoincrement=False)
+    variable = Column(String(64), primary_key=True)
+    entity = Column(String(64), primary_key=True)
+    count = Column(BigInteger, nullable=False)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    mean_value = Column(Float, nullable=False)
+
+
+class RollupSource:
+    """
+    Description of a table to make rollups for.
+
+    Parameters
+    ----------
+    module : str
+        Name of the hera_mc module defining the table class.
+    class_name : str
+        Name of the table class.
+    time_column : str
+        Name of the (integer gps second) time column.
+    entity_columns : list of str
+        Names of the columns identifying what the values were measured for.
+    value_columns : list of str
+        Names of the numeric columns to make rollups of, aggregated in the
+        database.
+    derived : dict, optional
+        Quantities computed from a column for each row (aggregated in python),
+        keyed on variable name with values of (column name, function).
+
+    """
+
+    def __init__(
+        self,
+        module,
+        class_name,
+        time_column,
+        entity_columns,
+        value_columns,
+        derived=None,
+    ):
+        self.module = module
+        self.class_name = class_name
+        self.time_column = time_column
+        self.entity_columns = entity_columns
+        self.value_columns = value_columns
+        self.derived = {} if derived is None else derived
+
+    @property
+    def table_class(self):
+        """The table class, imported when first used."""
+        module = importlib.import_module("." + self.module, __package__)
+        return getattr(module, self.class_name)
+
+    @property
+    def variables(self):
+        """List of all the variable names."""
+        return list(self.value_columns) + list(self.derived)
+
+
+def _spectrum_mean(spectrum):
+    """Get the mean of a spectrum ignoring NaNs, None if there are no values."""
+    if spectrum is None or np.all(np.isnan(spectrum)):
+        return None
+    return float(np.nanmean(spectrum))
+
+
+# sources keyed on table name
+rollup_sources = {
+    "hera_autos": RollupSource(
+        "autocorrelations",
+        "HeraAuto",
+        "time",
+        ["antenna_number", "antenna_feed_pol"],
+        ["value"],
+    ),
+    "hera_auto_spectrum": RollupSource(
+        "autocorrelations",
+        "HeraAutoSpectrum",
+        "time",
+        ["antenna_number", "antenna_feed_pol"],
+        [],
+        derived={"spectrum_mean": ("spectrum", _spectrum_mean)},
+    ),
+    "node_sensor": RollupSource(
+        "node",
+        "NodeSensor",
+        "time",
+        ["node"],
+        [
+            "top_sensor_temp",
+            "middle_sensor_temp",
+            "bottom_sensor_temp",
+            "humidity_sensor_temp",
+            "humidity",
+        ],
+    ),
+    "snap_status": RollupSource(
+        "correlator", "SNAPStatus", "time", ["hostname", "node"], ["fpga_temp"]
+    ),
+    "antenna_status": RollupSource(
+        "correlator",
+        "AntennaStatus",
+        "time",
+        ["antenna_number", "antenna_feed_pol"],
+        [
+            "adc_mean",
+            "adc_rms",
+            "adc_power",
+            "pam_power",
+            "pam_voltage",
+            "pam_current",
+            "fem_voltage",
+            "fem_current",
+            "fem_imu_theta",
+            "fem_imu_phi",
+            "fem_temp",
+        ],
+    ),
+    "rtp_server_status": RollupSource(
+        "rtp",
+        "RTPServerStatus",
+        "mc_time",
+        ["hostname"],
+        [
+            "mc_system_timediff",
+            "cpu_load_pct",
+            "memory_used_pct",
+            "disk_space_pct",
+            "network_bandwidth_mbs",
+        ],
+    ),
+    "lib_server_status": RollupSource(
+        "librarian",
+        "LibServerStatus",
+        "mc_time",
+        ["hostname"],
+        [
+            "mc_system_timediff",
+            "cpu_load_pct",
+            "memory_used_pct",
+            "disk_space_pct",
+            "network_bandwidth_mbs",
+        ],
+    ),
+}
+
+
+def _entity_str(values):
+    """Join the entity column values into the entity string (nulls are empty)."""
+    return ENTITY_SEPARATOR.join(
+        "" if value is None else str(value) for value in values
+    )
+
+
+def _entity_pattern(source, filters):
+    """
+    Get a LIKE pattern matching the entities with some entity column values.
+
+    Parameters
+    ----------
+    source : RollupSource object
+        Source of the rollups.
+    filters : dict
+        Values to require keyed on entity column name. None values are ignored.
+
+    Returns
+    -------
+    str or None
+        LIKE pattern using a backslash as the escape character, None if all
+        entities match.
+
+    Raises
+    ------
+    ValueError
+        If a filter is set on a column that is not an entity column.
+
+    """
+    for col, value in filters.items():
+        if value is not None and col not in source.entity_columns:
+            raise ValueError(
+                "The rollups cannot be filtered on {}, only on {}.".format(
+                    col, source.entity_columns
+                )
+            )
+    parts = []
+    for col in source.entity_columns:
+        value = filters.get(col)
+        if value is None:
+            parts.append("%")
+        else:
+            parts.append(
+                str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+    if all(part == "%" for part in parts):
+        return None
+    return ENTITY_SEPARATOR.join(parts)
+
+
+def _write_rollups(session, source_name, resolution, window_start, window_stop, rows):
+    """Replace the rollups for a source and resolution in a time window."""
+    session.query(MonitoringRollup).filter(
+        MonitoringRollup.source == source_name,
+        MonitoringRollup.resolution == resolution,
+        MonitoringRollup.bucket_start >= window_start,
+        MonitoringRollup.bucket_start < window_stop,
+    ).delete(synchronize_session=False)
+    for start in range(0, len(rows), ROLLUP_INSERT_BATCH_SIZE):
+        session.execute(
+            insert(MonitoringRollup.__table__),
+            rows[start : start + ROLLUP_INSERT_BATCH_SIZE],
+        )
+
+
+def _rollup_row(source_name, resolution, bucket_start, variable, entity, stats):
+    """Make a monitoring_rollup row dict from min, max, mean and count."""
+    min_value, max_value, mean_value, count = stats
+    return {
+        "source": source_name,
+        "resolution": resolution,
+        "bucket_start": int(bucket_start),
+        "variable": variable,
+        "entity": entity,
+        "count": int(count),
+        "min_value": float(min_value),
+        "max_value": float(max_value),
+        "mean_value": float(mean_value),
+    }
+
+
+def _hourly_rollup_rows(session, source_name, source, window_start, window_stop):
+    """Compute the hourly rollup rows from the raw rows in a time window."""
+    resolution = rollup_resolutions["hour"]
+    table_class = source.table_class
+    time_attr = getattr(table_class, source.time_column)
+    entity_attrs = [getattr(table_class, col) for col in source.entity_columns]
+    n_entity = len(entity_attrs)
+    bucket = time_attr - time_attr % resolution
+
+    rows = []
+    if len(source.value_columns) > 0:
+        aggregates = []
+        for col in source.value_columns:
+            attr = getattr(table_class, col)
+            aggregates.extend(
+                [func.min(attr), func.max(attr), func.avg(attr), func.count(attr)]
+            )
+        query = (
+            session.query(bucket, *entity_attrs, *aggregates)
+            .filter(time_attr >= window_start, time_attr < window_stop)
+            .group_by(bucket, *entity_attrs)
+        )
+        for result in query:
+            entity = _entity_str(result[1 : n_entity + 1])
+            for index, variable in enumerate(source.value_columns):
+                stats = result[n_entity + 1 + 4 * index : n_entity + 5 + 4 * index]
+                if stats[3] == 0:
+                    # all the values were null
+                    continue
+                rows.append(
+                    _rollup_row(
+                        source_name, resolution, result[0], variable, entity, stats
+                    )
+                )
+
+    if len(source.derived) > 0:
+        derived_attrs = [
+            getattr(table_class, col) for col, _ in source.derived.values()
+        ]
+        query = (
+            session.query(time_attr, *entity_attrs, *derived_attrs)
+            .filter(time_attr >= window_start, time_attr < window_stop)
+            .execution_options(yield_per=ROLLUP_FETCH_BATCH_SIZE)
+        )
+        # running [min, max, sum, count] keyed on (bucket, variable, entity)
+        running = {}
+        for result in query:
+            bucket_start = result[0] - result[0] % resolution
+            entity = _entity_str(result[1 : n_entity + 1])
+            for index, (variable, (_, function)) in enumerate(source.derived.items()):
+                value = function(result[n_entity + 1 + index])
+                if value is None:
+                    continue
+                key = (bucket_start, variable, entity)
+                if key in running:
+                    stats = running[key]
+                    stats[0] = min(stats[0], value)
+                    stats[1] = max(stats[1], value)
+                    stats[2] += value
+                    stats[3] += 1
+                else:
+                    running[key] = [value, value, value, 1]
+        for (bucket_start, variable, entity), stats in running.items():
+            rows.append(
+                _rollup_row(
+                    source_name,
+                    resolution,
+                    bucket_start,
+                    variable,
+                    entity,
+                    (stats[0], stats[1], stats[2] / stats[3], stats[3]),
+                )
+            )
+
+    return rows
+
+
+def _daily_rollup_rows(session, source_name, window_start, window_stop):
+    """Compute the daily rollup rows from the hourly rollups in a time window."""
+    resolution = rollup_resolutions["day"]
+    bucket = MonitoringRollup.bucket_start - MonitoringRollup.bucket_start % resolution
+    query = (
+        session.query(
+            bucket,
+            MonitoringRollup.variable,
+            MonitoringRollup.entity,
+            func.min(MonitoringRollup.min_value),
+            func.max(MonitoringRollup.max_value),
+            func.sum(MonitoringRollup.mean_value * MonitoringRollup.count),
+            func.sum(MonitoringRollup.count),
+        )
+        .filter(
+            MonitoringRollup.source == source_name,
+            MonitoringRollup.resolution == rollup_resolutions["hour"],
+            MonitoringRollup.bucket_start >= window_start,
+            MonitoringRollup.bucket_start < window_stop,
+        )
+        .group_by(bucket, MonitoringRollup.variable, MonitoringRollup.entity)
+    )
+    rows = []
+    for bucket_start, variable, entity, min_val, max_val, total, count in query:
+        rows.append(
+            _rollup_row(
+                source_name,
+                resolution,
+                bucket_start,
+                variable,
+                entity,
+                (min_val, max_val, float(total) / int(count), count),
+            )
+        )
+    return rows
+
+
+def update_rollups(session, sources=None, starttime=None, stoptime=None):
+    """
+    Update the hourly and daily rollups.
+
+    By default the rollups are updated from the start of the latest hourly
+    bucket already stored for each source (which may have been partial), or
+    from the first raw row if there are none. Buckets are always recomputed
+    from all the rows in them. The session is not committed.
+
+    Parameters
+    ----------
+    session : MCSession object
+        Session to use.
+    sources : list of str, optional
+        Names of the source tables to update, defaults to all the tables in
+        rollup_sources.
+    starttime : astropy Time object, optional
+        Time to recompute the rollups from, e.g. after backfilling raw data.
+    stoptime : astropy Time object, optional
+        Time to update the rollups up to, defaults to now.
+
+    Returns
+    -------
+    dict
+        Number of hourly and daily rollup rows written keyed on source name.
+
+    """
+    if sources is None:
+        sources = list(rollup_sources.keys())
+    for source_name in sources:
+        if source_name not in rollup_sources:
+            raise ValueError(
+                "source must be one of {}. value was: {}".format(
+                    list(rollup_sources.keys()), source_name
+                )
+            )
+    for name, value in [("starttime", starttime), ("stoptime", stoptime)]:
+        if value is not None and not isinstance(value, Time):
+            raise ValueError(
+                "{} must be an astropy time object. value was: {}".format(name, value)
+            )
+
+    hour = rollup_resolutions["hour"]
+    day = rollup_resolutions["day"]
+    if stoptime is None:
+        stoptime = Time.now()
+    stop_gps = floor(stoptime.gps)
+
+    n_written = {}
+    for source_name in sources:
+        source = rollup_sources[source_name]
+        if starttime is not None:
+            start_gps = floor(starttime.gps)
+        else:
+            start_gps = (
+                session.query(func.max(MonitoringRollup.bucket_start))
+                .filter(
+                    MonitoringRollup.source == source_name,
+                    MonitoringRollup.resolution == hour,
+                )
+                .scalar()
+            )
+            if start_gps is None:
+                time_attr = getattr(source.table_class, source.time_column)
+                start_gps = session.query(func.min(time_attr)).scalar()
+        if start_gps is None or start_gps > stop_gps:
+            n_written[source_name] = 0
+            continue
+
+        hour_start = start_gps - start_gps % hour
+        hour_stop = stop_gps - stop_gps % hour + hour
+        hourly_rows = _hourly_rollup_rows(
+            session, source_name, source, hour_start, hour_stop
+        )
+        _write_rollups(session, source_name, hour, hour_start, hour_stop, hourly_rows)
+
+        day_start = start_gps - start_gps % day
+        day_stop = stop_gps - stop_gps % day + day
+        daily_rows = _daily_rollup_rows(session, source_name, day_start, day_stop)
+        _write_rollups(session, source_name, day, day_start, day_stop, daily_rows)
+
+        n_written[source_name] = len(hourly_rows) + len(daily_rows)
+
+    return n_written
+
+
+def _rollup_query(session, source_name, resolution, start_gps, stop_gps, pattern):
+    """Get a query for the rollups of a source in a time range."""
+    query = session.query(MonitoringRollup).filter(
+        MonitoringRollup.source == source_name,
+        MonitoringRollup.resolution == resolution,
+        MonitoringRollup.bucket_start >= start_gps - start_gps % resolution,
+        MonitoringRollup.bucket_start <= stop_gps,
+    )
+    if pattern is not None:
+        query = query.filter(MonitoringRollup.entity.like(pattern, escape="\\"))
+    return query
+
+
+def rollups_cover(session, source_name, first_gps, last_gps):
+    """
+    Check that the hourly rollups of a source have been made over a time range.
+
+    The range is covered if there are hourly rollups for the buckets holding
+    first_gps and last_gps (usually the first and last raw record times). The
+    latest bucket may only be partly rolled up if `update_rollups` ran during it.
+
+    Parameters
+    ----------
+    session : MCSession object
+        Session to use.
+    source_name : str
+        Name of the source table.
+    first_gps : int
+        GPS second of the first raw record in the range.
+    last_gps : int
+        GPS second of the last raw record in the range.
+
+    Returns
+    -------
+    bool
+        True if the rollups cover the range.
+
+    """
+    hour = rollup_resolutions["hour"]
+    first_bucket = first_gps - first_gps % hour
+    last_bucket = last_gps - last_gps % hour
+    min_bucket, max_bucket = (
+        session.query(
+            func.min(MonitoringRollup.bucket_start),
+            func.max(MonitoringRollup.bucket_start),
+        )
+        .filter(
+            MonitoringRollup.source == source_name,
+            MonitoringRollup.resolution == hour,
+            MonitoringRollup.bucket_start >= first_bucket,
+            MonitoringRollup.bucket_start <= last_bucket,
+        )
+        .one()
+    )
+    return min_bucket == first_bucket and max_bucket == last_bucket
+
+
+def get_rollup_arrays(
+    session, source_name, starttime, stoptime, filters=None, max_points=None
+):
+    """
+    Get the rollups for a source as arrays in the layout of the source table.
+
+    Uses the finest resolution with no more than max_points rows (one row per
+    time bucket and entity), or the daily rollups if none fit.
+
+    Parameters
+    ----------
+    session : MCSession object
+        Session to use.
+    source_name : str
+        Name of the source table.
+    starttime : astropy Time object
+        Start of the time range, the bucket containing it is included.
+    stoptime : astropy Time object
+        End of the time range.
+    filters : dict, optional
+        Entity column values to require, keyed on entity column name.
+    max_points : int, optional
+        Maximum number of rows, defaults to using the hourly rollups.
+
+    Returns
+    -------
+    dict of numpy arrays
+        The time column (holding the bucket start times), the entity columns,
+        the mean (named for the variable), "<variable>_min", "<variable>_max"
+        and "<variable>_count" for each variable and the "resolution" in
+        seconds.
+
+    """
+    source = rollup_sources[source_name]
+    pattern = _entity_pattern(source, {} if filters is None else filters)
+    start_gps = floor(starttime.gps)
+    stop_gps = floor(stoptime.gps)
+
+    for resolution in sorted(rollup_resolutions.values()):
+        if max_points is None or resolution == max(rollup_resolutions.values()):
+            break
+        # there is a returned row per bucket and entity with any variable
+        n_rows = (
+            _rollup_query(
+                session, source_name, resolution, start_gps, stop_gps, pattern
+            )
+            .with_entities(MonitoringRollup.bucket_start, MonitoringRollup.entity)
+            .distinct()
+            .count()
+        )
+        if n_rows <= max_points:
+            break
+
+    rollups = (
+        _rollup_query(session, source_name, resolution, start_gps, stop_gps, pattern)
+        .with_entities(
+            MonitoringRollup.bucket_start,
+            MonitoringRollup.entity,
+            MonitoringRollup.variable,
+            MonitoringRollup.count,
+            MonitoringRollup.min_value,
+            MonitoringRollup.max_value,
+            MonitoringRollup.mean_value,
+        )
+        .order_by(MonitoringRollup.bucket_start, MonitoringRollup.entity)
+        .all()
+    )
+
+    row_index = {}
+    for bucket_start, entity, *_ in rollups:
+        row_index.setdefault((bucket_start, entity), len(row_index))
+    n_rows = len(row_index)
+
+    table = source.table_class.__table__
+    arrays = {source.time_column: np.zeros(n_rows, dtype=np.int64)}
+    entity_values = [[] for _ in source.entity_columns]
+    for bucket_start, entity in row_index:
+        arrays[source.time_column][row_index[(bucket_start, entity)]] = bucket_start
+        for values, col, value in zip(
+            entity_values, source.entity_columns, entity.split(ENTITY_SEPARATOR)
+        ):
+            values.append(
+                None if value == "" else table.columns[col].type.python_type(value)
+            )
+    for col, values in zip(source.entity_columns, entity_values):
+        # like _query_to_arrays, columns with nulls are object arrays
+        dtype = table.columns[col].type.python_type if None not in values else object
+        arrays[col] = np.asarray(values, dtype=dtype)
+
+    for variable in source.variables:
+        arrays[variable] = np.full(n_rows, np.nan)
+        arrays[variable + "_min"] = np.full(n_rows, np.nan)
+        arrays[variable + "_max"] = np.full(n_rows, np.nan)
+        arrays[variable + "_count"] = np.zeros(n_rows, dtype=np.int64)
+    for bucket_start, entity, variable, count, min_val, max_val, mean_val in rollups:
+        index = row_index[(bucket_start, entity)]
+        arrays[variable][index] = mean_val
+        arrays[variable + "_min"][index] = min_val
+        arrays[variable + "_max"][index] = max_val
+        arrays[variable + "_count"][index] = count
+    arrays["resolution"] = np.full(n_rows, resolution, dtype=np.int64)
+
+    return arrays
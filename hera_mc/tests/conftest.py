@@ -11,8 +11,9 @@ import warnings
 import pytest
 from astropy.time import Time
 from astropy.utils import iers
+from sqlalchemy import select
 
-from hera_mc import cm_transfer, mc
+from hera_mc import MCDeclarativeBase, cm_transfer, mc
 from hera_mc.data import DATA_PATH
 
 test_db = None
@@ -95,11 +96,14 @@ def mcsession(setup_and_teardown_package):
                 test_trans.rollback()
 
     # delete the hookup cache file
-    from .. import cm_hookup
+    from .. import cm_hookup, geo_handling
 
     hookup = cm_hookup.Hookup(None)
     hookup.delete_cache_file()
 
+    # the rollback can undo changes to the geo tables without a new CM version
+    geo_handling.clear_geo_registry()
+
 
 @pytest.fixture(scope="session")
 def mc_sqlite_session(setup_and_teardown_package):
@@ -122,3 +126,25 @@ def mc_sqlite_session(setup_and_teardown_package):
 
     # return connection to the Engine
     test_conn.close()
+
+
+@pytest.fixture(scope="function", params=["mcsession", "mc_sqlite_session"])
+def backend_session(request):
+    # for tests to run on both the postgres and sqlite testing databases
+    test_session = request.getfixturevalue(request.param)
+    if request.param == "mcsession":
+        yield test_session
+        return
+
+    # The sqlite session is shared across tests, so remove the rows added here. Only
+    # tables that start out empty are cleared to keep the CM tables loaded at setup.
+    empty_tables = [
+        table
+        for table in MCDeclarativeBase.metadata.sorted_tables
+        if test_session.execute(select(table).limit(1)).first() is None
+    ]
+    yield test_session
+
+    for table in reversed(empty_tables):
+        test_session.execute(table.delete())
+    test_session.commit()
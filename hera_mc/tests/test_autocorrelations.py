@@ -5,6 +5,7 @@
 """Testing for `hera_mc.autocorrelations`."""
 
 import datetime
+import os
 from math import floor
 
 import numpy as np
@@ -134,6 +135,75 @@ def test_auto_spectrum_added(mcsession, autocorrs, antnum, spec_type):
     assert len(result) == 1
     result = result[0]
     assert result.isclose(expected)
+    assert isinstance(result.spectrum, np.ndarray)
+    assert result.spectrum.dtype == np.float32
+
+
+def test_auto_spectrum_as_array(backend_session, tmpdir):
+    test_session = backend_session
+    t1 = Time("2016-01-10 01:15:23", scale="utc")
+    expected = np.full((2, 3, 4), np.nan, dtype=np.float32)
+    antpols = [(4, "e"), (4, "n"), (31, "n")]
+    for time_index in range(2):
+        for ant_index, (ant, pol) in enumerate(antpols):
+            if time_index == 1 and ant == 31:
+                # leave a missing spectrum to check the NaN fill
+                continue
+            spectrum = np.arange(4, dtype=np.float32) + 10 * time_index + ant_index
+            expected[time_index, ant_index] = spectrum
+            test_session.add_autocorrelation_spectrum(
+                t1 + TimeDelta(10 * time_index, format="sec"), ant, pol, spectrum
+            )
+
+    result = test_session.get_autocorrelation_spectrum(
+        starttime=t1, stoptime=t1 + TimeDelta(20, format="sec"), as_array=True
+    )
+    np.testing.assert_array_equal(
+        result["time"], int(floor(t1.gps)) + np.array([0, 10])
+    )
+    np.testing.assert_array_equal(result["antenna_number"], [4, 4, 31])
+    np.testing.assert_array_equal(result["antenna_feed_pol"], ["e", "n", "n"])
+    assert result["spectrum"].dtype == np.float32
+    np.testing.assert_array_equal(result["spectrum"], expected)
+
+    result = test_session.get_autocorrelation_spectrum(
+        starttime=t1, stoptime=t1 + TimeDelta(20, format="sec"), return_format="numpy"
+    )
+    assert result["spectrum"].shape == (5, 4)
+    assert result["spectrum"].dtype == np.float32
+
+    result = test_session.get_autocorrelation_spectrum(
+        starttime=t1 - TimeDelta(20, format="sec"),
+        stoptime=t1 - TimeDelta(10, format="sec"),
+        as_array=True,
+    )
+    assert result["spectrum"].shape == (0, 0, 0)
+
+    filename = os.path.join(tmpdir, "test_auto_spectrum.csv")
+    test_session.get_autocorrelation_spectrum(
+        starttime=t1,
+        stoptime=t1 + TimeDelta(20, format="sec"),
+        as_array=True,
+        write_to_file=True,
+        filename=filename,
+    )
+    with open(filename) as fp:
+        lines = fp.readlines()
+    assert len(lines) == 6
+    assert lines[1].strip().endswith("[0.0, 1.0, 2.0, 3.0]")
+
+    with pytest.raises(
+        ValueError, match="as_array cannot be combined with return_format."
+    ):
+        test_session.get_autocorrelation_spectrum(as_array=True, return_format="numpy")
+
+    test_session.add_autocorrelation_spectrum(
+        t1 + TimeDelta(10, format="sec"), 31, "n", np.zeros(5)
+    )
+    with pytest.raises(ValueError, match="The spectra have different numbers"):
+        test_session.get_autocorrelation_spectrum(
+            starttime=t1, stoptime=t1 + TimeDelta(20, format="sec"), as_array=True
+        )
 
 
 @pytest.mark.parametrize(
@@ -322,6 +392,26 @@ def test_add_autos_from_redis_errors(mcsession, auto_dict):
         )
 
 
+@requires_redis
+def test_get_autos_from_redis_antenna_numbers():
+    autos_dict = autocorrelations._get_autos_from_redis(
+        redishost=TEST_DEFAULT_REDIS_HOST
+    )
+    assert "timestamp" in autos_dict
+    antpols = [key for key in autos_dict if key != "timestamp"]
+    assert len(antpols) >= 1
+    ant = int(antpols[0].split(":")[0])
+
+    ant_dict = autocorrelations._get_autos_from_redis(
+        redishost=TEST_DEFAULT_REDIS_HOST, antenna_numbers=[ant]
+    )
+    assert ant_dict["timestamp"] == autos_dict["timestamp"]
+    assert set(ant_dict) - {"timestamp"} <= {f"{ant}:e", f"{ant}:n"}
+    for antpol in set(ant_dict) - {"timestamp"}:
+        assert ant_dict[antpol].dtype == np.float32
+        np.testing.assert_array_equal(ant_dict[antpol], autos_dict[antpol])
+
+
 @requires_redis
 def test_with_redis_add_autos_from_redis_errors(mcsession):
     test_session = mcsession
@@ -4,12 +4,16 @@
 
 """Testing for `hera_mc.cm_transfer`."""
 
+import json
 import os
+import sqlite3
 
 import pytest
+from sqlalchemy import create_engine
 
-from .. import cm_gen_sqlite, cm_hookup, cm_transfer, mc
-from ..cm_partconnect import Connections
+from .. import cm_gen_sqlite, cm_hookup, cm_table_info, cm_transfer, mc
+from ..cm_partconnect import Connections, PartRosetta, Parts
+from ..geo_location import GeoLocation
 from ..mc import AutomappedDB
 
 # Sometimes a connection is closed, which is handled and doesn't produce an error
@@ -22,10 +26,12 @@ def test_classTime():
     pytest.raises(ValueError, cm_transfer.CMVersion.create, None, None)
 
 
-def test_gen_sqlite():
+def test_gen_sqlite(tmp_path):
     test_hash_file = "test_hash_file.json"
     testsqlite = cm_gen_sqlite.SqliteHandling(
-        cm_table_hash_file=test_hash_file, testing=True
+        cm_table_hash_file=test_hash_file,
+        testing=True,
+        hash_cache_file=str(tmp_path / "hash_cache.json"),
     )
     testsqlite.cm_table_list = ["station_type"]
     testsqlite.write_table_hash_dict()
@@ -45,15 +51,95 @@ def test_gen_sqlite():
     this_hash = cm_gen_sqlite.hash_file("nosuchfile")
     assert this_hash is None
     os.remove(os.path.join(testsqlite.cm_csv_path, test_hash_file))
+    # the hash cache is not written to the csv directory
+    assert not any(
+        fn.endswith("_cache.json") for fn in os.listdir(testsqlite.cm_csv_path)
+    )
+
+
+def test_gen_sqlite_hash_cache(tmp_path):
+    csv_path = tmp_path / "csv"
+    csv_path.mkdir()
+    for table in ["parts", "station_type"]:
+        (csv_path / "initialization_data_{}.csv".format(table)).write_text(table)
+    hash_cache_file = str(tmp_path / "hash_cache.json")
+    # entries for other csv directories are kept
+    with open(hash_cache_file, "w") as f:
+        json.dump({"/other/initialization_data_parts.csv": {"hash": "other"}}, f)
+    testsqlite = cm_gen_sqlite.SqliteHandling(
+        cm_csv_path=str(csv_path),
+        cm_table_list=["parts", "station_type"],
+        hash_cache_file=hash_cache_file,
+    )
+    assert testsqlite.changed_tables() == ["parts", "station_type"]
+    testsqlite.write_table_hash_dict()
+    assert os.path.exists(testsqlite.hash_cache_file)
+    assert testsqlite.changed_tables() == []
+
+    # unchanged files are not re-hashed
+    with open(testsqlite.hash_cache_file) as f:
+        hash_cache = json.load(f)
+    assert hash_cache["/other/initialization_data_parts.csv"] == {"hash": "other"}
+    parts_file = str(csv_path / "initialization_data_parts.csv")
+    hash_cache[parts_file]["hash"] = "cached"
+    with open(testsqlite.hash_cache_file, "w") as f:
+        json.dump(hash_cache, f)
+    testsqlite.get_table_hash_dict()
+    assert testsqlite.hash_dict["initialization_data_parts.csv"] == "cached"
+
+    # changed files are
+    (csv_path / "initialization_data_station_type.csv").write_text("changed file")
+    testsqlite.get_table_hash_dict()
+    assert testsqlite.changed_tables() == ["parts", "station_type"]
+    assert testsqlite.hash_dict[
+        "initialization_data_station_type.csv"
+    ] == cm_gen_sqlite.hash_file(str(csv_path / "initialization_data_station_type.csv"))
+
+    # a missing file has no hash
+    os.remove(parts_file)
+    testsqlite.get_table_hash_dict()
+    assert testsqlite.hash_dict["initialization_data_parts.csv"] is None
 
 
 def test_update_sqlite(mcsession):
     testsqlite = cm_gen_sqlite.SqliteHandling(testing=True)
 
-    testsqlite.update_sqlite("test_hera_mc.db")
+    new_sqlite_file = os.path.join(testsqlite.cm_csv_path, "test_hera_mc.db")
+    if os.path.exists(new_sqlite_file):
+        os.remove(new_sqlite_file)
+    updated = testsqlite.update_sqlite("test_hera_mc.db")
+    assert updated == cm_table_info.order_the_tables(None)
+
+    with sqlite3.connect(new_sqlite_file) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        index_names = [
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        ]
+        assert "ix_connections_downstream_part_down_part_rev" in index_names
+
+        # only the requested tables are copied
+        conn.execute("DELETE FROM parts WHERE hpn = 'HH700'")
+        conn.execute("DELETE FROM connections WHERE upstream_part = 'HH700'")
+        conn.execute("ALTER TABLE station_type DROP COLUMN plot_marker")
+    conn.close()
+    # station_type no longer matches the schema so it is recreated and copied
+    updated = testsqlite.update_sqlite("test_hera_mc.db", tables=["parts"])
+    assert updated == ["parts", "station_type"]
+    with sqlite3.connect(new_sqlite_file) as conn:
+        assert conn.execute(
+            "SELECT count(*) FROM parts WHERE hpn = 'HH700'"
+        ).fetchone() == (1,)
+        assert conn.execute(
+            "SELECT count(*) FROM connections WHERE upstream_part = 'HH700'"
+        ).fetchone() == (0,)
+        assert conn.execute("SELECT count(*) FROM station_type").fetchone() == (13,)
+    conn.close()
+    assert testsqlite.update_sqlite("test_hera_mc.db", tables=["connections"]) == [
+        "connections"
+    ]
 
     # connect to this file as a new database, check if it has the same stuff
-    new_sqlite_file = os.path.join(testsqlite.cm_csv_path, "test_hera_mc.db")
     new_sqlite_db = AutomappedDB("sqlite:///" + new_sqlite_file)
     new_sqlite_session = new_sqlite_db.sessionmaker()
 
@@ -89,6 +175,8 @@ def test_update_sqlite(mcsession):
 
     assert psql_pams == sqlite_pams
 
+    new_sqlite_session.close()
+    new_sqlite_db.engine.dispose()
     os.remove(new_sqlite_file)
 
 
@@ -127,15 +215,79 @@ def test_sqlite_postgres_match(mcsession, mc_sqlite_session):
 
 
 def test_db_to_csv():
-    pytest.importorskip("pandas")
     files_written = cm_transfer.package_db_to_csv(tables="parts")
     assert len(files_written) == 1
-    files_written = cm_transfer.package_db_to_csv(tables="all")
+    files_written = cm_transfer.package_db_to_csv(tables="all", max_workers=3)
     assert len(files_written) == 7
     for fw in files_written:
         os.remove(fw)
 
 
+def test_db_to_csv_shared_snapshot(setup_and_teardown_package, tmp_path, monkeypatch):
+    test_db, _ = setup_and_teardown_package
+    write_table_csv = cm_transfer._write_table_csv
+
+    def write_after_change(conn, table, data_filename):
+        # commit a new part on another connection before reading each table
+        with test_db.engine.begin() as other_conn:
+            other_conn.execute(
+                Parts.__table__.insert().values(
+                    hpn="SNAPSHOT_" + table.name,
+                    hpn_rev="A",
+                    hptype="test",
+                    manufacturer_number="X",
+                    start_gpstime=1,
+                )
+            )
+        write_table_csv(conn, table, data_filename)
+
+    monkeypatch.setattr(cm_transfer, "_write_table_csv", write_after_change)
+    try:
+        with mc.MCSession(bind=test_db.engine) as session:
+            files_written = cm_transfer.package_db_to_csv(
+                session=session,
+                tables="parts,connections",
+                output_path=str(tmp_path),
+                max_workers=2,
+            )
+        with open(files_written[0]) as fp:
+            assert "SNAPSHOT_" not in fp.read()
+    finally:
+        with test_db.engine.begin() as conn:
+            conn.execute(Parts.__table__.delete().where(Parts.hpn.like("SNAPSHOT\\_%")))
+
+
+@pytest.mark.parametrize("db_type", ["postgres", "sqlite"])
+def test_db_to_csv_round_trip(mcsession, request, tmp_path, db_type):
+    if db_type == "postgres":
+        session = mcsession
+    else:
+        session = request.getfixturevalue("mc_sqlite_session")
+
+    files_written = cm_transfer.package_db_to_csv(
+        session=session, tables="parts,geo_location", output_path=str(tmp_path)
+    )
+    assert files_written == [
+        os.path.join(str(tmp_path), "initialization_data_parts.csv"),
+        os.path.join(str(tmp_path), "initialization_data_geo_location.csv"),
+    ]
+
+    with open(files_written[0]) as f:
+        lines = f.read().splitlines()
+    assert (
+        lines[0] == "hpn,hpn_rev,hptype,manufacturer_number,start_gpstime,stop_gpstime"
+    )
+    # integer columns with nulls are not written as floats
+    assert ".0" not in lines[1]
+
+    for filename, table_class in zip(files_written, [Parts, GeoLocation]):
+        table = table_class.__table__
+        columns, rows = cm_transfer._read_csv_table(filename, table)
+        assert columns == [col.name for col in table.columns]
+        db_rows = session.execute(table.select()).all()
+        assert sorted(rows, key=str) == sorted((tuple(row) for row in db_rows), key=str)
+
+
 def test_main_validation():
     valid = cm_transfer.db_validation(None, "testing_not_main")
     assert valid
@@ -151,6 +303,69 @@ def test_initialization():
     assert "test_data" in t
 
 
+def test_read_csv_table(tmp_path):
+    csv_file = tmp_path / "initialization_data_part_rosetta.csv"
+    # stop_gptime is not a column (a typo that is in the test data)
+    csv_file.write_text(
+        "hpn,syspn,start_gpstime,stop_gptime,stop_gpstime\n"
+        "SNPTEST1,sys1,1275040818.0,5,\n"
+        "SNPTEST2,sys2,1275040818,,1275040918\n"
+        "SNPTEST3,sys3,1275040818\n"
+        "\n"
+    )
+    columns, rows = cm_transfer._read_csv_table(str(csv_file), PartRosetta.__table__)
+    assert columns == ["hpn", "syspn", "start_gpstime", "stop_gpstime"]
+    assert rows == [
+        ("SNPTEST1", "sys1", 1275040818, None),
+        ("SNPTEST2", "sys2", 1275040818, 1275040918),
+        ("SNPTEST3", "sys3", 1275040818, None),
+    ]
+    assert isinstance(rows[0][2], int)
+
+
+@pytest.mark.parametrize("db_type", ["postgres", "sqlite"])
+def test_bulk_load(mcsession, tmp_path, db_type):
+    columns = ["hpn", "hpn_rev", "hptype", "manufacturer_number", "start_gpstime"]
+    rows = [
+        ("TESTPART{}".format(i), "A", "test", "S/N\t{}".format(i), 1230372018 + i)
+        for i in range(5)
+    ]
+    if db_type == "postgres":
+        session = mcsession
+        engine = None
+    else:
+        engine = create_engine("sqlite:///" + str(tmp_path / "bulk_load_test.db"))
+        Parts.__table__.create(engine)
+        session = mc.MCSession(bind=engine)
+
+    try:
+        cm_transfer._bulk_load(session, Parts.__table__, columns, rows, batch_size=2)
+        cm_transfer._bulk_load(session, Parts.__table__, columns, [])
+        session.commit()
+
+        parts = (
+            session.query(Parts)
+            .filter(Parts.hpn.like("TESTPART%"))
+            .order_by(Parts.hpn)
+            .all()
+        )
+        assert [
+            (
+                part.hpn,
+                part.hpn_rev,
+                part.hptype,
+                part.manufacturer_number,
+                part.start_gpstime,
+            )
+            for part in parts
+        ] == rows
+        assert parts[0].stop_gpstime is None
+    finally:
+        if engine is not None:
+            session.close()
+            engine.dispose()
+
+
 def test_check_if_main(mcsession):
     result = cm_transfer.check_if_main(mcsession)
     assert not result
@@ -27,6 +27,21 @@ def test_log():
     cm_utils.log("testing", args=a)
 
 
+def test_part_key_index():
+    keys = ["HH10:A", "HH1:A", "HH1:B", "HA2:A", "HH123:A", "N01:A"]
+    index = cm_utils.PartKeyIndex(keys)
+    assert len(index) == 6
+    assert index.find("hh1") == ["HH10:A", "HH1:A", "HH1:B", "HH123:A"]
+    assert index.find("HH1", exact_match=True) == ["HH1:A", "HH1:B"]
+    assert index.find(["N", "HA", "HH12"]) == ["HA2:A", "HH123:A", "N01:A"]
+    assert index.find(["HH1", "HH12"]) == ["HH10:A", "HH1:A", "HH1:B", "HH123:A"]
+    assert index.find("ZZ") == []
+    assert index.find("HH", exact_match=True) == []
+    for prefixes in (["HH1"], ["H", "N0"], ["HA2", "Q"]):
+        expected = [k for k in keys if k.split(":")[0].startswith(tuple(prefixes))]
+        assert index.find(prefixes) == expected
+
+
 def test_various():
     a = "a"
     args = argparse.Namespace(a="def_test", unittesting="")
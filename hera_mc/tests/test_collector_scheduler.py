@@ -0,0 +1,231 @@
+# -*- mode: python; coding: utf-8 -*-
+# Copyright 2026 the HERA Collaboration
+# Licensed under the 2-clause BSD license.
+
+"""Testing for `hera_mc.collector_scheduler`."""
+
+import io
+import threading
+import time
+
+import pytest
+from astropy.time import Time, TimeDelta
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from hera_mc import collector_scheduler, mc
+
+
+@pytest.fixture(scope="function")
+def session_factory(mcsession):
+    # Bind the scheduler's sessions to the mcsession connection, with savepoints
+    # for their commits, so everything is rolled back with the mcsession transaction.
+    session_factory = sessionmaker(
+        class_=mc.MCSession,
+        bind=mcsession.bind,
+        join_transaction_mode="create_savepoint",
+    )
+
+    # The scheduler uses sessions from several threads but they share one
+    # connection, so only let one session have a transaction at a time. The lock is
+    # not held while a collector runs without using the database.
+    lock = threading.Lock()
+
+    @event.listens_for(session_factory, "after_transaction_create")
+    def acquire(session, transaction):
+        if transaction.parent is None:
+            lock.acquire()
+
+    @event.listens_for(session_factory, "after_transaction_end")
+    def release(session, transaction):
+        if transaction.parent is None:
+            lock.release()
+
+    return session_factory
+
+
+def test_collector_errors():
+    with pytest.raises(ValueError, match="command must be a string or a callable."):
+        collector_scheduler.Collector(5)
+
+    with pytest.raises(ValueError, match="interval must be positive."):
+        collector_scheduler.Collector("add_snap_status_from_corrcm", interval=0)
+
+    with pytest.raises(ValueError, match="Collector names must be unique."):
+        collector_scheduler.CollectorScheduler(
+            None,
+            [
+                collector_scheduler.Collector("add_snap_status_from_corrcm"),
+                collector_scheduler.Collector("add_snap_status_from_corrcm"),
+            ],
+            "test_collector_daemon",
+            "test_collector_subsystem",
+            session_factory=lambda: None,
+        )
+
+
+def test_collector_scheduler(session_factory, capsys):
+    calls = []
+    release = threading.Event()
+    slow_started = threading.Event()
+
+    def fast(session, value=None):
+        calls.append((value, threading.get_ident()))
+
+    def failing(session):
+        raise RuntimeError("collector failed")
+
+    def slow(session):
+        slow_started.set()
+        release.wait(10)
+
+    fast_coll = collector_scheduler.Collector(fast, interval=10, kwargs={"value": 1})
+    failing_coll = collector_scheduler.Collector(failing, interval=10)
+    slow_coll = collector_scheduler.Collector(slow, interval=10, timeout=1)
+    assert slow_coll.name == "slow"
+
+    starttime = Time.now() - TimeDelta(1, format="sec")
+    scheduler = collector_scheduler.CollectorScheduler(
+        None,
+        [fast_coll, failing_coll, slow_coll],
+        "test_collector_daemon",
+        "test_collector_subsystem",
+        hostname="test_host",
+        session_factory=session_factory,
+    )
+    assert scheduler.max_workers == 3
+    try:
+        scheduler.start(now=0.0)
+        assert scheduler.run_pending(now=0.0) == 10.0
+        fast_coll.future.result()
+        failing_coll.future.result()
+        assert slow_started.wait(10)
+
+        # the slow collector is still running, so it is logged as timed out
+        scheduler.run_pending(now=2.0)
+        assert slow_coll.n_timeouts == 1
+        assert slow_coll.n_runs == 0
+
+        # one slot was missed, the next run is 15 s late and the next slot is at 30 s
+        assert scheduler.run_pending(now=25.0) == 30.0
+        fast_coll.future.result()
+        assert slow_coll.n_skipped == 1
+        assert slow_coll.n_timeouts == 1
+    finally:
+        release.set()
+        scheduler.shutdown()
+
+    assert [call[0] for call in calls] == [1, 1]
+    assert calls[0][1] != threading.get_ident()
+
+    stats = scheduler.stats()
+    assert stats["fast"]["n_runs"] == 2
+    assert stats["fast"]["n_errors"] == 0
+    # the lag includes the (short) wait for a worker thread
+    assert 15.0 <= stats["fast"]["last_lag"] < 16.0
+    assert stats["fast"]["max_lag"] == stats["fast"]["last_lag"]
+    assert stats["failing"]["n_runs"] == 2
+    assert stats["failing"]["n_errors"] == 2
+    assert stats["slow"]["n_runs"] == 1
+    assert stats["slow"]["max_latency"] > 0
+
+    captured = capsys.readouterr()
+    assert "error calling command failing" in captured.err
+    assert "slow has not finished after" in captured.err
+
+    report = io.StringIO()
+    scheduler.report_stats(file=report)
+    lines = report.getvalue().splitlines()
+    assert len(lines) == 3
+    assert "fast: runs=2 errors=0 timeouts=0 skipped=0" in lines[0]
+
+    with session_factory() as session:
+        status = session.get_daemon_status(
+            starttime=starttime,
+            stoptime=Time.now() + TimeDelta(1, format="sec"),
+            daemon_name="test_collector_daemon",
+        )
+        assert len(status) == 1
+        assert status[0].hostname == "test_host"
+
+        errors = session.get_subsystem_error(
+            starttime=starttime,
+            stoptime=Time.now() + TimeDelta(1, format="sec"),
+            subsystem="test_collector_subsystem",
+        )
+        messages = [error.log for error in errors]
+        assert len(messages) == 3
+        assert sum("collector failed" in message for message in messages) == 2
+        assert sum("slow has not finished" in message for message in messages) == 1
+
+
+def test_collector_scheduler_queued(session_factory):
+    release = threading.Event()
+    first_started = threading.Event()
+
+    def first(session):
+        first_started.set()
+        release.wait(10)
+
+    def second(session):
+        pass
+
+    first_coll = collector_scheduler.Collector(first, interval=10, timeout=1)
+    second_coll = collector_scheduler.Collector(second, interval=10, timeout=1)
+    scheduler = collector_scheduler.CollectorScheduler(
+        None,
+        [first_coll, second_coll],
+        "test_collector_daemon",
+        "test_collector_subsystem",
+        max_workers=1,
+        session_factory=session_factory,
+    )
+    try:
+        scheduler.start(now=0.0)
+        scheduler.run_pending(now=0.0)
+        assert first_started.wait(10)
+
+        # the second run is waiting for the only worker, so it has not started
+        # and is not timed out
+        scheduler.run_pending(now=5.0)
+        assert second_coll.run_start is None
+        assert second_coll.n_timeouts == 0
+        assert first_coll.n_timeouts == 1
+
+        time.sleep(0.2)
+        release.set()
+        second_coll.future.result()
+    finally:
+        release.set()
+        scheduler.shutdown()
+
+    assert second_coll.n_runs == 1
+    assert second_coll.n_timeouts == 0
+    # the wait for the worker is part of the lag
+    assert second_coll.last_lag >= 0.2
+    assert first_coll.last_lag < 0.2
+
+
+def test_collector_scheduler_run(session_factory, capsys):
+    def stop(session, scheduler=None):
+        # stop on the second run, after the first report
+        if scheduler.collectors[0].n_runs >= 1:
+            scheduler.stop()
+
+    coll = collector_scheduler.Collector(stop, interval=0.1)
+    scheduler = collector_scheduler.CollectorScheduler(
+        None,
+        [coll],
+        "test_collector_daemon",
+        "test_collector_subsystem",
+        session_factory=session_factory,
+        report_interval=0.05,
+    )
+    coll.kwargs["scheduler"] = scheduler
+    scheduler.run()
+
+    assert scheduler.executor is None
+    assert coll.n_runs == 2
+    assert coll.n_errors == 0
+    captured = capsys.readouterr()
+    assert "stop: runs=" in captured.out
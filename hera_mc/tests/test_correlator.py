@@ -23,7 +23,7 @@ import yaml
 from astropy.time import Time, TimeDelta
 
 import hera_mc.correlator as corr
-from hera_mc import cm_partconnect, mc
+from hera_mc import cm_partconnect, cm_sysutils, mc
 from hera_mc.data import DATA_PATH
 
 from ..tests import (
@@ -527,6 +527,22 @@ def test_add_correlator_component_event_time(mcsession):
     assert comp_event_result[1].isclose(comp_event_expected2)
 
 
+def test_get_redis_session_shared_pool():
+    # creating the pool and client does not connect, so no redis is needed
+    rsession1 = corr._get_redis_session("test_redis_host")
+    rsession2 = corr._get_redis_session("test_redis_host")
+    assert rsession1.connection_pool is rsession2.connection_pool
+    assert rsession1.connection_pool.connection_kwargs["decode_responses"]
+
+    rsession3 = corr._get_redis_session("test_redis_host", decode_responses=False)
+    assert rsession3.connection_pool is not rsession1.connection_pool
+    assert not rsession3.connection_pool.connection_kwargs["decode_responses"]
+
+    rsession4 = corr._get_redis_session("test_redis_host2")
+    assert rsession4.connection_pool is not rsession1.connection_pool
+    assert rsession4.connection_pool.connection_kwargs["host"] == "test_redis_host2"
+
+
 @requires_redis
 @pytest.mark.parametrize(
     "input_dict,event,time",
@@ -568,6 +584,16 @@ def test_get_catcher_start_stop_time_from_redis(input_dict, event, time):
     assert outdict == expdict
 
 
+def test_parse_f_engine_sync_time():
+    assert corr._parse_f_engine_sync_time("1654884281000") == Time(
+        1654884281, format="unix"
+    )
+    with pytest.raises(
+        ValueError, match="The corr:feng_sync_time key was not found in redis."
+    ):
+        corr._parse_f_engine_sync_time(None)
+
+
 @requires_redis
 @pytest.mark.parametrize("catcher_same", (True, False))
 def test_get_catcher_start_stop_time_from_redis_with_timeouts(mcsession, catcher_same):
@@ -2151,6 +2177,55 @@ def test_add_snap_status_from_corrcm(mcsession, snapstatus):
     assert len(result_input) == 12
 
 
+def test_add_snap_status_from_corrcm_cm_snapshot(mcsession, snapstatus):
+    test_session = mcsession
+    snapshot_obj_list = test_session.add_snap_status_from_corrcm(
+        snap_status_dict=snapstatus, testing=True
+    )
+    fallback_obj_list = test_session.add_snap_status_from_corrcm(
+        snap_status_dict=snapstatus, testing=True, use_cm_snapshot=False
+    )
+    assert len(snapshot_obj_list) == len(fallback_obj_list) == 14
+    for snapshot_obj, fallback_obj in zip(snapshot_obj_list, fallback_obj_list):
+        assert snapshot_obj.isclose(fallback_obj)
+
+
+def test_snap_cm_info(mcsession):
+    cm_snapshot = cm_sysutils.SnapCMInfo(mcsession)
+
+    assert cm_snapshot.get_snap_serial_from_hostname("heraNode700Snap0") == "SNPA000700"
+    assert cm_snapshot.get_snap_serial_from_hostname("blah") is None
+    assert cm_snapshot.get_snap_hostname_from_serial("SNPA000700") == (
+        "heraNode700Snap0"
+    )
+    assert cm_snapshot.get_node_snap_from_serial("SNPD000703") == (701, 3)
+    assert cm_snapshot.get_node_snap_from_hostname("blah") == (None, None)
+    assert mcsession._get_node_snap_from_snap_hostname(
+        "heraNode700Snap0", "now", cm_snapshot=cm_snapshot
+    ) == mcsession._get_node_snap_from_snap_hostname("heraNode700Snap0", "now")
+
+    for channel in [None, 2, [0, 5]]:
+        assert mcsession._get_antennas_for_snap(
+            "heraNode700Snap0", snap_channel_number=channel, cm_snapshot=cm_snapshot
+        ) == mcsession._get_antennas_for_snap(
+            "heraNode700Snap0", snap_channel_number=channel
+        )
+    assert mcsession._get_antennas_for_snap(
+        "blah", cm_snapshot=cm_snapshot
+    ) == mcsession._get_antennas_for_snap("blah")
+
+    with pytest.warns(
+        UserWarning,
+        match="No active connections returned for snap serial foo. "
+        "Setting node and snap location numbers to None",
+    ):
+        node, snap_loc_num = mcsession._get_node_snap_from_serial(
+            "foo", cm_snapshot=cm_snapshot
+        )
+    assert node is None
+    assert snap_loc_num is None
+
+
 def test_add_snap_status_from_corrcm_with_nones(mcsession, snapstatus_none):
     test_session = mcsession
     snap_status_obj_list = test_session.add_snap_status_from_corrcm(
@@ -2422,6 +2497,18 @@ def test_get_node_snap_from_serial_multiple_revs(mcsession):
     assert node is None
     assert snap_loc_num is None
 
+    cm_snapshot = cm_sysutils.SnapCMInfo(mcsession)
+    with pytest.warns(
+        UserWarning,
+        match="There is more that one active revision for snap serial SNPD000703. "
+        "Setting node and snap location numbers to None",
+    ):
+        node, snap_loc_num = mcsession._get_node_snap_from_serial(
+            "SNPD000703", cm_snapshot=cm_snapshot
+        )
+    assert node is None
+    assert snap_loc_num is None
+
 
 def test_get_node_snap_from_serial_multiple_times_diffloc(mcsession):
     """Test multiple times with change in location."""
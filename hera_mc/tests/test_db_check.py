@@ -6,12 +6,18 @@ from collections import namedtuple
 
 import pytest
 import sqlalchemy
-from sqlalchemy import Column, ForeignKey, Integer, String, text
+from sqlalchemy import Column, ForeignKey, Integer, String, create_engine, text
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import declarative_base, declared_attr, relationship, sessionmaker
 
 from .. import mc
-from ..db_check import check_connection, is_valid_database
+from ..db_check import (
+    check_connection,
+    check_database_schema,
+    get_alembic_revision,
+    get_schema_fingerprint,
+    is_valid_database,
+)
 
 # Sometimes a connection is closed, which is handled and doesn't produce an error
 # or even a warning under normal testing. But for the warnings test where we
@@ -74,6 +80,9 @@ def test_argparser():
     ap = mc.get_mc_argument_parser()
     assert ap.description is None
 
+    assert ap.parse_args([]).deep_schema_check is False
+    assert ap.parse_args(["--deep-schema-check"]).deep_schema_check is True
+
 
 def test_validity_pass():
     """
@@ -246,3 +255,75 @@ def test_check_connection(tmpdir):
         RuntimeError, match="Could not establish valid connection to database."
     ):
         mc.connect_to_mc_db(this_args)
+
+
+def test_schema_fingerprint():
+    Base, _ = gen_test_model()
+    Base2, _ = gen_test_model()
+    RelationBase, _, _ = gen_relation_models()
+
+    assert get_schema_fingerprint(Base) == get_schema_fingerprint(Base2)
+    assert get_schema_fingerprint(Base) != get_schema_fingerprint(RelationBase)
+    assert get_schema_fingerprint(None) == get_schema_fingerprint(mc.MCDeclarativeBase)
+
+
+def test_schema_check_cache(tmp_path):
+    engine = create_engine("sqlite:///" + str(tmp_path / "schema_test.db"))
+    cache_file = str(tmp_path / "schema_cache.json")
+    Base, ValidTestModel = gen_test_model()
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as session:
+        # without an alembic revision the full check is done and nothing is cached
+        assert get_alembic_revision(session) is None
+        assert check_database_schema(Base, session, cache_file=cache_file)
+        assert not (tmp_path / "schema_cache.json").exists()
+
+        session.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32))"))
+        session.execute(text("INSERT INTO alembic_version VALUES ('abc')"))
+        session.commit()
+        assert get_alembic_revision(session) == "abc"
+
+        assert check_database_schema(Base, session, cache_file=cache_file)
+        with open(cache_file) as f:
+            cache = json.load(f)
+        assert list(cache.values()) == [
+            {"fingerprint": get_schema_fingerprint(Base), "alembic_revision": "abc"}
+        ]
+
+        # nothing has changed according to the cache, so the check is skipped
+        ValidTestModel.__table__.drop(engine)
+        assert check_database_schema(Base, session, cache_file=cache_file)
+        assert check_database_schema(Base, session) is False
+
+        # a deep check finds the problem and clears the cache entry
+        assert (
+            check_database_schema(Base, session, cache_file=cache_file, deep_check=True)
+            is False
+        )
+        with open(cache_file) as f:
+            assert json.load(f) == {}
+        assert check_database_schema(Base, session, cache_file=cache_file) is False
+
+        # a new alembic revision causes a full check
+        ValidTestModel.__table__.create(engine)
+        assert check_database_schema(Base, session, cache_file=cache_file)
+        ValidTestModel.__table__.drop(engine)
+        session.execute(text("UPDATE alembic_version SET version_num = 'def'"))
+        session.commit()
+        assert check_database_schema(Base, session, cache_file=cache_file) is False
+
+        # so do changes to the declared models
+        RelationBase, _, _ = gen_relation_models()
+        RelationBase.metadata.create_all(engine)
+        assert check_database_schema(RelationBase, session, cache_file=cache_file)
+        RelationBase.metadata.drop_all(engine)
+        assert check_database_schema(Base, session, cache_file=cache_file) is False
+
+        # an unreadable cache file is ignored
+        with open(cache_file, "w") as f:
+            f.write("not json")
+        assert check_database_schema(Base, session, cache_file=cache_file) is False
+
+    engine.dispose()
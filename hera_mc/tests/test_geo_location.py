@@ -3,10 +3,19 @@
 # Licensed under the 2-clause BSD license.
 
 """Testing for `hera_mc.geo_location and geo_handling`."""
+import numpy as np
 import pytest
 from astropy.time import Time
-
-from .. import cm_active, cm_partconnect, geo_handling, geo_location, geo_sysdef
+from sqlalchemy import event
+
+from .. import (
+    cm_active,
+    cm_partconnect,
+    cm_transfer,
+    geo_handling,
+    geo_location,
+    geo_sysdef,
+)
 
 # Sometimes a connection is closed, which is handled and doesn't produce an error
 # or even a warning under normal testing. But for the warnings test where we
@@ -120,6 +129,98 @@ def test_geo_location(mcsession):
         )
 
 
+def test_get_location_columns(geo_handle):
+    import cartopy.crs as ccrs
+
+    uvutils = geo_handling._import_uvutils()
+    names = ["HH703", "hh701", "HH_not_a_station", "HH702"]
+    located = geo_handle.get_location(names, "now")
+    assert [loc.station_name for loc in located] == ["HH703", "HH701", "HH702"]
+
+    columns = geo_handle.get_location_columns(names, "now")
+    assert columns["station_name"].tolist() == ["HH703", "HH701", "HH702"]
+    for key in ["easting", "northing", "elevation", "lon", "lat", "X", "Y", "Z"]:
+        np.testing.assert_allclose(
+            columns[key], [getattr(loc, key) for loc in located], rtol=0, atol=1e-9
+        )
+
+    # the same as transforming the points one at a time
+    loc = located[1]
+    lon, lat = ccrs.Geodetic().transform_point(
+        loc.easting, loc.northing - geo_handle.lat_corr["J"], ccrs.UTM(34)
+    )
+    assert lon == pytest.approx(loc.lon, abs=1e-12)
+    assert lat == pytest.approx(loc.lat, abs=1e-12)
+    np.testing.assert_allclose(
+        uvutils.XYZ_from_LatLonAlt(np.radians(lat), np.radians(lon), loc.elevation),
+        [loc.X, loc.Y, loc.Z],
+        rtol=0,
+        atol=1e-6,
+    )
+
+    columns = geo_handle.get_location_columns(["HH_not_a_station"], "now")
+    assert columns["station_name"].size == 0
+    assert columns["X"].size == 0
+    assert geo_handle.get_location("HH701", "now")[0].station_name == "HH701"
+
+
+def test_geo_registry(mcsession):
+    geo_handling.clear_geo_registry()
+    geo_handle = geo_handling.Handling(mcsession)
+    cofa = geo_handle.cofa()[0]
+    assert geo_handling.get_geo_registry_stats() == {
+        "hits": 0,
+        "misses": 2,
+        "invalidations": 0,
+        "entries": 1,
+    }
+
+    # a new object (e.g. for the next observation) does not read the geo tables
+    statements = []
+
+    def log_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(mcsession.bind, "before_cursor_execute", log_statement)
+    try:
+        geo_handle2 = geo_handling.Handling(mcsession)
+        cofa2 = geo_handle2.cofa()[0]
+    finally:
+        event.remove(mcsession.bind, "before_cursor_execute", log_statement)
+    assert len(statements) == 1
+    assert "cm_version" in statements[0]
+    assert geo_handling.get_geo_registry_stats()["hits"] == 2
+    assert cofa2.isclose(cofa)
+    assert cofa2 is not cofa
+    assert cofa2.lat == cofa.lat
+    assert cofa2.X == cofa.X
+    assert geo_handle2.station_types == geo_handle.station_types
+    # the objects get their own copies
+    geo_handle2.station_types["cofa"]["Stations"].add("foo")
+    assert "foo" not in geo_handle.station_types["cofa"]["Stations"]
+    assert (
+        "foo" not in geo_handling.Handling(mcsession).station_types["cofa"]["Stations"]
+    )
+
+    # the registry is not used if it is turned off
+    geo_handling.Handling(mcsession, use_registry=False).cofa()
+    assert geo_handling.get_geo_registry_stats()["hits"] == 3
+
+    # a new CM version invalidates the registry
+    mcsession.add(cm_transfer.CMVersion.create(Time.now(), "new_hash"))
+    mcsession.commit()
+    geo_handling.Handling(mcsession).cofa()
+    stats = geo_handling.get_geo_registry_stats()
+    assert stats["invalidations"] == 1
+    assert stats["hits"] == 3
+
+    # and so does updating the geo_location table
+    geo_location.update(mcsession, [["HH704", "elevation", 1100.0]])
+    assert geo_handling.get_geo_registry_stats()["entries"] == 0
+
+    geo_handling.clear_geo_registry()
+
+
 def test_station_types(geo_handle):
     geo_handle.get_station_types()
     assert geo_handle.station_types["cofa"]["Prefix"] == "COFA"
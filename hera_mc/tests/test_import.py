@@ -0,0 +1,99 @@
+# -*- mode: python; coding: utf-8 -*-
+# Copyright 2026 the HERA Collaboration
+# Licensed under the 2-clause BSD license.
+
+"""Testing for the lazy imports in `hera_mc`."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+import hera_mc
+
+# modules that are slow to import and should only be imported when they are used
+heavy_modules = [
+    "cartopy",
+    "hera_corr_cm",
+    "matplotlib",
+    "pandas",
+    "pyuvdata",
+    "redis",
+    "setuptools_scm",
+]
+
+
+def _run_import(statement):
+    """
+    Time an import statement in a new interpreter.
+
+    Returns the import time in seconds, the set of imported modules and the number
+    of tables registered on MCDeclarativeBase.
+    """
+    code = (
+        "import json, sys, time\n"
+        "t0 = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - t0\n"
+        "n_tables = len(sys.modules['hera_mc'].MCDeclarativeBase.metadata.tables)\n"
+        "print(json.dumps([elapsed, list(sys.modules), n_tables]))\n"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    elapsed, modules, n_tables = json.loads(output.strip().splitlines()[-1])
+    return elapsed, set(modules), n_tables
+
+
+@pytest.mark.parametrize(
+    "statement",
+    ["import hera_mc", "from hera_mc import mc", "from hera_mc import cm_utils"],
+)
+def test_import_benchmark(statement):
+    elapsed, modules, _ = _run_import(statement)
+    # reported with `pytest -s` to track the import time
+    print(f"{statement}: {elapsed:.3f} s")
+
+    for module in heavy_modules:
+        assert module not in modules, f"{statement} imports {module}"
+
+    if statement == "import hera_mc":
+        assert [name for name in modules if name.startswith("hera_mc.")] == []
+
+
+def test_lazy_submodules():
+    assert "cm_utils" in dir(hera_mc)
+    assert hera_mc.cm_utils.__name__ == "hera_mc.cm_utils"
+
+    with pytest.raises(AttributeError, match="has no attribute 'foo'"):
+        hera_mc.foo
+
+
+def test_version():
+    assert hera_mc.__version__ == hera_mc.get_version_str()
+    assert isinstance(hera_mc.get_version_str(dev=True), str)
+
+
+def test_table_registration():
+    _, _, n_tables = _run_import("import hera_mc")
+    assert n_tables == 0
+
+    _, _, n_tables_registered = _run_import(
+        "import hera_mc\nhera_mc._import_table_modules()"
+    )
+    assert n_tables_registered > 0
+
+    # connecting to a database registers all the tables
+    _, _, n_tables_db = _run_import(
+        "from hera_mc import mc\nmc.connect_to_mc_testing_db()"
+    )
+    assert n_tables_db == n_tables_registered
+
+
+@pytest.mark.parametrize(
+    "module", ["cm_active", "cm_partconnect", "geo_location", "mc_session", "node"]
+)
+def test_import_submodule_first(module):
+    # without the package importing everything up front, these must not depend on
+    # another module being imported first (e.g. to break an import cycle)
+    _, modules, _ = _run_import(f"import hera_mc.{module}")
+    assert f"hera_mc.{module}" in modules
@@ -472,6 +472,18 @@ def test_add_lib_file(mcsession, file, tmpdir):
     result_obsid = test_session.get_lib_files(obsid=file.file_columns["obsid"])
     assert len(result_obsid) == 2
 
+    # the non time-filtered queries honor return_format
+    result_arrays = test_session.get_lib_files(
+        obsid=file.file_columns["obsid"], return_format="numpy"
+    )
+    assert sorted(result_arrays["filename"]) == sorted(
+        [file.file_columns["filename"], new_file]
+    )
+    result_arrays = test_session.get_lib_files(filename=new_file, return_format="numpy")
+    assert list(result_arrays["filename"]) == [new_file]
+    with pytest.raises(ValueError, match="return_format must be one of"):
+        test_session.get_lib_files(filename=new_file, return_format="foo")
+
     filename = os.path.join(tmpdir, "test_lib_file_record_file.csv")
     test_session.get_lib_files(
         obsid=file.file_columns["obsid"], write_to_file=True, write_filename=filename
@@ -488,6 +488,191 @@ def test_create_sensor_readings(mcsession, sensor):
     assert result_most_recent == result
 
 
+def test_node_sensor_readings_latest_per(backend_session, tmpdir):
+    test_session = backend_session
+    t1 = Time("2016-01-10 01:15:23", scale="utc")
+    for node_num, offset in [(1, 0), (1, 10), (1, 20), (2, 5), (3, 30)]:
+        test_session.add_node_sensor_readings(
+            t1 + TimeDelta(offset, format="sec"), node_num, 30.0, 31.0, 32.0, 33.0, 34.0
+        )
+
+    result = test_session.get_node_sensor_readings(latest_per="node")
+    assert [(obj.node, obj.time) for obj in result] == [
+        (1, int(floor(t1.gps)) + 20),
+        (2, int(floor(t1.gps)) + 5),
+        (3, int(floor(t1.gps)) + 30),
+    ]
+
+    result = test_session.get_node_sensor_readings(
+        starttime=t1 + TimeDelta(25, format="sec"), latest_per=["node"]
+    )
+    assert [(obj.node, obj.time) for obj in result] == [
+        (1, int(floor(t1.gps)) + 20),
+        (2, int(floor(t1.gps)) + 5),
+    ]
+
+    result = test_session.get_node_sensor_readings(nodeID=1, latest_per="node")
+    assert len(result) == 1
+    assert result[0].time == int(floor(t1.gps)) + 20
+
+    filename = os.path.join(tmpdir, "test_node_sensor_latest_per.csv")
+    test_session.get_node_sensor_readings(
+        latest_per="node", write_to_file=True, filename=filename
+    )
+    with open(filename) as fp:
+        assert len(fp.readlines()) == 4
+
+    with pytest.raises(
+        ValueError, match="most_recent cannot be False if latest_per is set."
+    ):
+        test_session.get_node_sensor_readings(
+            most_recent=False, starttime=t1, latest_per="node"
+        )
+
+
+def test_node_sensor_readings_return_format(backend_session, sensor):
+    test_session = backend_session
+    sensor_obj_list = node.create_sensor_readings(node_list=None, sensor_dict=sensor)
+    for obj in sensor_obj_list:
+        test_session.add(obj)
+    test_session.commit()
+
+    t1 = Time(sensor[1]["timestamp"], format="unix")
+    time_range = {
+        "starttime": t1 - TimeDelta(3.0, format="sec"),
+        "stoptime": t1 + TimeDelta(5.0, format="sec"),
+    }
+    expected = test_session.get_node_sensor_readings(**time_range)
+    column_names = [col.name for col in node.NodeSensor.__table__.columns]
+
+    result = test_session.get_node_sensor_readings(return_format="numpy", **time_range)
+    assert list(result.keys()) == column_names
+    assert result["node"].dtype == np.int64
+    np.testing.assert_array_equal(result["node"], [obj.node for obj in expected])
+    np.testing.assert_array_equal(result["time"], [obj.time for obj in expected])
+    assert result["humidity"].dtype == np.float64
+    np.testing.assert_allclose(result["humidity"], [32.5, 40.0, np.nan])
+
+    result = test_session.get_node_sensor_readings(
+        nodeID=4, return_format="numpy", **time_range
+    )
+    assert all(arr.size == 0 for arr in result.values())
+
+    result = test_session.get_node_sensor_readings(
+        latest_per="node", return_format="numpy"
+    )
+    np.testing.assert_array_equal(result["node"], [1, 2, 3])
+
+    pytest.importorskip("pandas")
+    result = test_session.get_node_sensor_readings(return_format="pandas", **time_range)
+    assert list(result.columns) == column_names
+    np.testing.assert_array_equal(result["node"], [obj.node for obj in expected])
+    np.testing.assert_allclose(result["humidity"], [32.5, 40.0, np.nan])
+
+    with pytest.raises(ValueError, match="return_format must be one of"):
+        test_session.get_node_sensor_readings(return_format="arrays")
+
+
+def test_write_node_sensor_readings_streaming(backend_session, sensor, tmpdir, capsys):
+    test_session = backend_session
+    sensor_obj_list = node.create_sensor_readings(node_list=None, sensor_dict=sensor)
+    for obj in sensor_obj_list:
+        test_session.add(obj)
+    test_session.commit()
+
+    t1 = Time(sensor[1]["timestamp"], format="unix")
+    time_range = {
+        "starttime": t1 - TimeDelta(3.0, format="sec"),
+        "stoptime": t1 + TimeDelta(5.0, format="sec"),
+    }
+    expected = test_session.get_node_sensor_readings(**time_range)
+    assert len(expected) == 3
+
+    test_session.export_chunk_size = 2
+    test_session.export_progress = True
+    filename = os.path.join(tmpdir, "test_node_sensor_stream.csv")
+    test_session.get_node_sensor_readings(
+        write_to_file=True, filename=filename, **time_range
+    )
+    captured = capsys.readouterr()
+    assert "2 rows written" in captured.out
+    assert "3 rows written" in captured.out
+
+    column_names = [col.name for col in node.NodeSensor.__table__.columns]
+    with open(filename) as fp:
+        lines = fp.read().splitlines()
+    assert lines[0] == ", ".join(column_names)
+    assert lines[1:] == [
+        ", ".join(str(getattr(obj, col)) for col in column_names) for obj in expected
+    ]
+
+    pq = pytest.importorskip("pyarrow.parquet")
+    filename = os.path.join(tmpdir, "test_node_sensor_stream.parquet")
+    test_session.get_node_sensor_readings(
+        write_to_file=True, filename=filename, **time_range
+    )
+    table = pq.read_table(filename)
+    assert table.column_names == column_names
+    assert table.to_pylist() == [
+        {col: getattr(obj, col) for col in column_names} for obj in expected
+    ]
+
+    # empty results still give a file with the schema
+    test_session.get_node_sensor_readings(
+        starttime=t1 + TimeDelta(200.0, format="sec"),
+        write_to_file=True,
+        filename=filename,
+    )
+    table = pq.read_table(filename)
+    assert table.num_rows == 0
+    assert table.column_names == column_names
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 500])
+def test_insert_sensor_readings_ignoring_duplicates(mcsession, sensor, chunk_size):
+    test_session = mcsession
+
+    sensor_obj_list = node.create_sensor_readings(node_list=None, sensor_dict=sensor)
+    # include duplicates in the same batch
+    test_session._insert_ignoring_duplicates(
+        node.NodeSensor, sensor_obj_list + sensor_obj_list, chunk_size=chunk_size
+    )
+    test_session.commit()
+
+    t1 = Time(sensor[1]["timestamp"], format="unix")
+    result = test_session.get_node_sensor_readings(
+        starttime=t1 - TimeDelta(3.0, format="sec"),
+        stoptime=t1 + TimeDelta(5.0, format="sec"),
+    )
+    assert len(result) == 3
+    assert result[1].humidity == 40.0
+
+    # updating should use the last record for each primary key
+    new_sensor_obj_list = node.create_sensor_readings(
+        node_list=None, sensor_dict=sensor
+    )
+    new_sensor_obj_list[1].humidity = 45.0
+    test_session._insert_ignoring_duplicates(
+        node.NodeSensor,
+        sensor_obj_list + new_sensor_obj_list,
+        update=True,
+        chunk_size=chunk_size,
+    )
+    test_session.commit()
+
+    result = test_session.get_node_sensor_readings(
+        starttime=t1 - TimeDelta(3.0, format="sec"),
+        stoptime=t1 + TimeDelta(5.0, format="sec"),
+    )
+    assert len(result) == 3
+    assert [obj.humidity for obj in result] == [32.5, 45.0, None]
+
+    with pytest.raises(ValueError, match="chunk_size must be a positive integer."):
+        test_session._insert_ignoring_duplicates(
+            node.NodeSensor, sensor_obj_list, chunk_size=0
+        )
+
+
 def test_sensor_reading_errors(mcsession, sensor):
     test_session = mcsession
     top_sensor_temp = sensor[1]["temp_top"]
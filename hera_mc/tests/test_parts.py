@@ -8,7 +8,8 @@ from collections import OrderedDict, namedtuple
 
 import numpy as np
 import pytest
-from astropy.time import Time
+from astropy.time import Time, TimeDelta
+from sqlalchemy import event
 
 from hera_mc import (
     cm_active,
@@ -111,6 +112,84 @@ def test_apriori(mcsession):
     assert active.apriori["HH700:A"].status == "not_connected"
 
 
+def test_active_cache(parts):
+    cm_active.clear_active_cache()
+    active = cm_active.ActiveData(parts.test_session, use_cache=True)
+    active.load_parts()
+    active.load_connections()
+    assert cm_active.get_active_cache_stats() == {
+        "hits": 0,
+        "misses": 2,
+        "invalidations": 0,
+        "entries": 2,
+    }
+
+    active2 = cm_active.ActiveData(parts.test_session, use_cache=True)
+    active2.load_parts()
+    active2.load_connections()
+    assert cm_active.get_active_cache_stats()["hits"] == 2
+    assert active2.parts.keys() == active.parts.keys()
+    assert active2.connections["up"].keys() == active.connections["up"].keys()
+    # the containers are copied so they can be modified safely
+    assert active2.parts is not active.parts
+    del active2.parts["TEST_PART:Q"]
+    assert "TEST_PART:Q" in active.parts
+
+    # the cache is not used unless asked for
+    active3 = cm_active.ActiveData(parts.test_session)
+    active3.load_parts()
+    assert cm_active.get_active_cache_stats()["hits"] == 2
+
+    # a new cm version invalidates the cache (offset so that it can't collide
+    # with the version added when the test database was initialized)
+    parts.cm_handle.add_cm_version(
+        Time.now() + TimeDelta(60, format="sec"), "Test-git-hash"
+    )
+    parts.test_session.commit()
+    active4 = cm_active.ActiveData(parts.test_session, use_cache=True)
+    active4.load_parts()
+    assert cm_active.get_active_cache_stats() == {
+        "hits": 2,
+        "misses": 3,
+        "invalidations": 1,
+        "entries": 1,
+    }
+
+    cm_active.clear_active_cache()
+    assert cm_active.get_active_cache_stats()["entries"] == 0
+
+
+def test_active_cache_bounded(parts):
+    cm_active.clear_active_cache()
+    start = Time("2019-07-01 00:30:00", scale="utc").gps
+    n_buckets = 2 * cm_active.ACTIVE_CACHE_MAX_BUCKETS + 3
+    for i in range(n_buckets):
+        active = cm_active.ActiveData(
+            parts.test_session,
+            at_date=start + i * cm_active.ACTIVE_CACHE_BUCKET_SEC,
+            float_format="gps",
+            use_cache=True,
+        )
+        active.load_parts()
+        active.load_connections()
+        active.load_apriori()
+        stats = cm_active.get_active_cache_stats()
+        assert stats["entries"] <= 3 * cm_active.ACTIVE_CACHE_MAX_BUCKETS
+    assert stats["misses"] == 3 * n_buckets
+    assert stats["entries"] == 3 * cm_active.ACTIVE_CACHE_MAX_BUCKETS
+
+    # the most recent buckets are still served from the cache
+    active = cm_active.ActiveData(
+        parts.test_session,
+        at_date=start + (n_buckets - 1) * cm_active.ACTIVE_CACHE_BUCKET_SEC,
+        float_format="gps",
+        use_cache=True,
+    )
+    active.load_parts()
+    assert cm_active.get_active_cache_stats()["hits"] == 1
+    cm_active.clear_active_cache()
+
+
 @pytest.mark.parametrize(
     ("val", "msg"),
     [
@@ -125,6 +204,57 @@ def test_duplicate_errors(mcsession, val, msg):
         active.load_connections()
 
 
+def test_duplicate_report_all(mcsession, monkeypatch, capsys):
+    active = cm_active.ActiveData(mcsession)
+    active.load_connections()
+    n_active = sum(len(conns) for conns in active.connections["up"].values())
+
+    # every up port is reported in one error
+    active = cm_active.ActiveData(mcsession)
+    active.pytest_param = "up"
+    with pytest.raises(ValueError, match="Duplicate active port") as excinfo:
+        active.load_connections()
+    assert len(str(excinfo.value).splitlines()) == n_active
+
+    monkeypatch.setattr(cm_active, "IGNORE_DUPLICATE_ACTIVE_PART", True)
+    active = cm_active.ActiveData(mcsession)
+    active.pytest_param = "up"
+    active.load_connections()
+    assert active.connections == {"up": {}, "down": {}}
+    captured = capsys.readouterr()
+    assert len(captured.out.splitlines()) == n_active
+
+
+def test_connection_record(mcsession):
+    active = cm_active.ActiveData(mcsession)
+    active.load_connections()
+    record = active.connections["up"]["HH700:A"]["GROUND"]
+    assert isinstance(record, cm_partconnect.ConnectionRecord)
+    assert not hasattr(record, "__dict__")
+
+    conn = (
+        mcsession.query(cm_partconnect.Connections)
+        .filter(
+            (cm_partconnect.Connections.upstream_part == record.upstream_part)
+            & (cm_partconnect.Connections.up_part_rev == record.up_part_rev)
+            & (
+                cm_partconnect.Connections.upstream_output_port
+                == record.upstream_output_port
+            )
+            & (cm_partconnect.Connections.start_gpstime == record.start_gpstime)
+        )
+        .one()
+    )
+    assert record == conn
+    assert conn == record
+    assert record != cm_partconnect.get_null_connection()
+    assert repr(record) == repr(conn)
+    assert record._to_dict() == conn._to_dict()
+    assert record.stop_gpstime == conn.stop_gpstime
+    record.gps2Time()
+    assert record.start_date.gps == record.start_gpstime
+
+
 def test_rosetta(mcsession, capsys):
     active = cm_active.ActiveData(mcsession)
     at_date = Time("2020-07-01 01:00:00", scale="utc")
@@ -417,6 +547,9 @@ def test_active_revisions_mixed_start_time(parts):
     # vals = list(active.parts.values())
     # print(vals[0])
     # print(vals[1])
+    assert list(active.part_index.find("TEST_PART")) == [
+        k for k in active.parts if k.startswith("TEST_PART")
+    ]
     revs = active.revs("TEST_PART")
 
     assert revs[0].hpn == "TEST_PART"
@@ -569,6 +702,41 @@ def test_get_revisions_of_type(parts, capsys):
     assert rev[0].hpn == "TEST"
 
 
+def test_get_revisions_of_type_bulk(parts):
+    session = parts.test_session
+    hpns = ["HH700", "hh701", parts.test_part, "TEST", "not_a_part", None]
+    at_date = Time("2020-07-01 01:00:00", scale="utc")
+    for rq in ["LAST", "ACTIVE", "ALL", "NONE", "A", "Q"]:
+        statements = []
+
+        def log_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(session.bind, "before_cursor_execute", log_statement)
+        try:
+            revisions = cm_revisions.get_revisions_of_type_bulk(
+                hpns, rq, at_date, session=session
+            )
+        finally:
+            event.remove(session.bind, "before_cursor_execute", log_statement)
+        assert len(statements) == 1
+        assert list(revisions.keys()) == hpns[:-1]
+        for hpn in hpns[:-1]:
+            expected = cm_revisions.get_revisions_of_type(
+                hpn, rq, at_date, session=session
+            )
+            assert [vars(rev) for rev in revisions[hpn]] == [
+                vars(rev) for rev in expected
+            ]
+        assert revisions["not_a_part"] == []
+        if rq == "LAST":
+            assert revisions["hh701"][0].hpn == "hh701"
+
+    assert cm_revisions.get_revisions_of_type_bulk([], "LAST", session=session) == {}
+    with pytest.raises(ValueError, match="FULL revisions called"):
+        cm_revisions.get_revisions_of_type_bulk(hpns, "FULL", session=session)
+
+
 def test_datetime(parts):
     dt = cm_utils.get_astropytime("2017-01-01", 0.0)
     gps_direct = int(Time("2017-01-01 00:00:00", scale="utc").gps)
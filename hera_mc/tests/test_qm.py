@@ -88,6 +88,8 @@ def test_AntMetrics(mcsession, initialize_obs, tmpdir, pol_x, pol_y):
     assert len(r) == 4
     r = test_session.get_ant_metric(ant=0)
     assert len(r) == 2
+    r_arrays = test_session.get_ant_metric(ant=0, return_format="numpy")
+    assert list(r_arrays["ant"]) == [0, 0]
     for ri in r:
         assert ri.ant == 0
     r = test_session.get_ant_metric(pol=pol_x)
@@ -0,0 +1,282 @@
+# -*- mode: python; coding: utf-8 -*-
+# Copyright 2026 the HERA Collaboration
+# Licensed under the 2-clause BSD license.
+
+"""Testing for `hera_mc.rollup`."""
+
+import numpy as np
+import pytest
+from astropy.time import Time
+from sqlalchemy import event
+
+from .. import node, rollup
+from ..autocorrelations import HeraAutoSpectrum
+from ..daemon_status import DaemonStatus
+
+# Sometimes a connection is closed, which is handled and doesn't produce an error
+# or even a warning under normal testing. But for the warnings test where we
+# pass `-W error`, the warning causes an error so we filter it out here.
+pytestmark = pytest.mark.filterwarnings("ignore:connection:ResourceWarning:psycopg")
+
+# two hours before the start of a (gps) day
+START_GPS = 1_299_974_400 - 7200
+READING_INTERVAL = 600
+
+
+def _add_readings(session, start_gps, n_readings):
+    """Add node sensor readings for nodes 1 and 2, the value is the reading index."""
+    for index in range(n_readings):
+        for node_num in [1, 2]:
+            value = float(index + (start_gps - START_GPS) // READING_INTERVAL)
+            session.add(
+                node.NodeSensor(
+                    time=start_gps + index * READING_INTERVAL,
+                    node=node_num,
+                    top_sensor_temp=value,
+                    middle_sensor_temp=value * node_num,
+                    bottom_sensor_temp=None,
+                    humidity_sensor_temp=value,
+                    humidity=value,
+                )
+            )
+    session.commit()
+
+
+def test_update_rollups(backend_session):
+    test_session = backend_session
+    # 4 hours of readings, 6 per hour
+    _add_readings(test_session, START_GPS, 24)
+    stoptime = Time(START_GPS + 4 * 3600 - 1, format="gps")
+    n_written = test_session.update_monitoring_rollups(
+        sources=["node_sensor"], stoptime=stoptime
+    )
+    # 4 hours and 2 days for 2 nodes and 4 variables (bottom_sensor_temp is null)
+    assert n_written == {"node_sensor": 4 * 2 * 4 + 2 * 2 * 4}
+
+    hourly = test_session.get_monitoring_rollup(
+        "node_sensor",
+        starttime=Time(START_GPS, format="gps"),
+        stoptime=stoptime,
+        variable="middle_sensor_temp",
+        entity="2",
+    )
+    assert [obj.bucket_start for obj in hourly] == [
+        START_GPS + hour * 3600 for hour in range(4)
+    ]
+    assert hourly[1].count == 6
+    assert hourly[1].min_value == 12.0
+    assert hourly[1].max_value == 22.0
+    assert hourly[1].mean_value == pytest.approx(17.0)
+
+    daily = test_session.get_monitoring_rollup(
+        "node_sensor",
+        resolution="day",
+        starttime=Time(START_GPS - 86400, format="gps"),
+        stoptime=stoptime,
+        variable="top_sensor_temp",
+        entity="1",
+    )
+    assert [obj.bucket_start for obj in daily] == [
+        START_GPS + 7200 - 86400,
+        START_GPS + 7200,
+    ]
+    assert [obj.count for obj in daily] == [12, 12]
+    assert daily[0].mean_value == pytest.approx(5.5)
+    assert daily[1].min_value == 12.0
+    assert daily[1].max_value == 23.0
+
+    # an incremental update recomputes from the last hourly bucket
+    _add_readings(test_session, START_GPS + 24 * READING_INTERVAL, 3)
+    stoptime = Time(START_GPS + 5 * 3600 - 1, format="gps")
+    n_written = test_session.update_monitoring_rollups(
+        sources=["node_sensor"], stoptime=stoptime
+    )
+    assert n_written == {"node_sensor": 2 * 2 * 4 + 2 * 4}
+    daily = test_session.get_monitoring_rollup(
+        "node_sensor", resolution="day", variable="top_sensor_temp", entity="1"
+    )
+    assert daily[0].bucket_start == START_GPS + 7200
+    assert daily[0].count == 15
+    assert daily[0].mean_value == pytest.approx(np.mean(np.arange(12, 27)))
+    assert (
+        test_session.query(rollup.MonitoringRollup)
+        .filter(rollup.MonitoringRollup.resolution == 3600)
+        .count()
+        == 5 * 2 * 4
+    )
+
+    # nothing to do for tables without data
+    assert test_session.update_monitoring_rollups(
+        sources=["snap_status"], stoptime=stoptime
+    ) == {"snap_status": 0}
+
+    with pytest.raises(ValueError, match="source must be one of"):
+        test_session.update_monitoring_rollups(sources=["foo"])
+    with pytest.raises(ValueError, match="stoptime must be an astropy time"):
+        test_session.update_monitoring_rollups(stoptime=5)
+    with pytest.raises(ValueError, match="source must be one of"):
+        test_session.get_monitoring_rollup("foo")
+    with pytest.raises(ValueError, match="resolution must be one of"):
+        test_session.get_monitoring_rollup("node_sensor", resolution="week")
+
+
+def test_max_points(backend_session):
+    test_session = backend_session
+    _add_readings(test_session, START_GPS, 24)
+    stoptime = Time(START_GPS + 4 * 3600 - 1, format="gps")
+    test_session.update_monitoring_rollups(stoptime=stoptime)
+    time_range = {"starttime": Time(START_GPS, format="gps"), "stoptime": stoptime}
+
+    # the raw records fit, they are counted no further than max_points + 1
+    statements = []
+
+    def record_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_session.bind, "before_cursor_execute", record_statement)
+    try:
+        result = test_session.get_node_sensor_readings(
+            return_format="numpy", max_points=48, **time_range
+        )
+    finally:
+        event.remove(test_session.bind, "before_cursor_execute", record_statement)
+    count_statements = [x for x in statements if "count(" in x.lower()]
+    assert len(count_statements) == 1
+    assert "LIMIT" in count_statements[0].upper()
+    assert list(result.keys()) == [
+        col.name for col in node.NodeSensor.__table__.columns
+    ]
+    assert result["time"].size == 48
+
+    # hourly rollups, one row per hour and node
+    result = test_session.get_node_sensor_readings(
+        return_format="numpy", max_points=47, **time_range
+    )
+    np.testing.assert_array_equal(result["resolution"], 3600)
+    np.testing.assert_array_equal(
+        result["time"], np.repeat(START_GPS + 3600 * np.arange(4), 2)
+    )
+    np.testing.assert_array_equal(result["node"], [1, 2] * 4)
+    assert result["node"].dtype == np.int64
+    np.testing.assert_allclose(result["top_sensor_temp"][:2], 2.5)
+    np.testing.assert_array_equal(result["top_sensor_temp_min"][:2], 0.0)
+    np.testing.assert_array_equal(result["top_sensor_temp_max"][:2], 5.0)
+    np.testing.assert_array_equal(result["top_sensor_temp_count"], 6)
+    assert np.all(np.isnan(result["bottom_sensor_temp"]))
+    np.testing.assert_array_equal(result["bottom_sensor_temp_count"], 0)
+
+    result = test_session.get_node_sensor_readings(
+        nodeID=2, return_format="numpy", max_points=4, **time_range
+    )
+    np.testing.assert_array_equal(result["resolution"], 3600)
+    np.testing.assert_array_equal(result["node"], [2] * 4)
+
+    # daily rollups
+    result = test_session.get_node_sensor_readings(
+        return_format="numpy", max_points=4, **time_range
+    )
+    np.testing.assert_array_equal(result["resolution"], 86400)
+    np.testing.assert_array_equal(result["node"], [1, 2, 1, 2])
+    np.testing.assert_allclose(result["middle_sensor_temp"], [5.5, 11, 17.5, 35])
+
+    # daily rollups are used even if they do not fit
+    result = test_session.get_node_sensor_readings(
+        return_format="numpy", max_points=1, **time_range
+    )
+    assert result["time"].size == 4
+
+    # a node without values for the first variable counts towards max_points
+    for index in range(24):
+        test_session.add(
+            node.NodeSensor(
+                time=START_GPS + index * READING_INTERVAL,
+                node=3,
+                middle_sensor_temp=1.0,
+            )
+        )
+    test_session.commit()
+    test_session.update_monitoring_rollups(**time_range)
+    result = test_session.get_node_sensor_readings(
+        return_format="numpy", max_points=8, **time_range
+    )
+    np.testing.assert_array_equal(result["resolution"], 86400)
+    np.testing.assert_array_equal(result["node"], [1, 2, 3] * 2)
+
+    # raw records after the latest rollup are returned with a warning
+    _add_readings(test_session, START_GPS + 4 * 3600, 6)
+    time_range["stoptime"] = Time(START_GPS + 5 * 3600 - 1, format="gps")
+    with pytest.warns(UserWarning, match="rollups do not cover"):
+        result = test_session.get_node_sensor_readings(
+            return_format="numpy", max_points=8, **time_range
+        )
+    assert "resolution" not in result
+    assert result["time"].size == 24 * 3 + 12
+
+    pytest.importorskip("pandas")
+    result = test_session.get_node_sensor_readings(
+        return_format="pandas",
+        max_points=10,
+        starttime=time_range["starttime"],
+        stoptime=stoptime,
+    )
+    assert len(result) == 6
+    assert "humidity_max" in result.columns
+
+    with pytest.raises(ValueError, match="max_points requires return_format"):
+        test_session.get_node_sensor_readings(max_points=10, **time_range)
+
+    with pytest.raises(ValueError, match="There are no rollups for the daemon_status"):
+        test_session._time_filter(
+            DaemonStatus, "time", return_format="numpy", max_points=10, **time_range
+        )
+
+    with pytest.raises(ValueError, match="The rollups cannot be filtered on"):
+        rollup._entity_pattern(rollup.rollup_sources["node_sensor"], {"hostname": "a"})
+
+
+def test_entity_pattern():
+    source = rollup.rollup_sources["antenna_status"]
+    assert rollup._entity_pattern(source, {}) is None
+    assert rollup._entity_pattern(source, {"antenna_number": None}) is None
+    assert rollup._entity_pattern(source, {"antenna_number": 12}) == "12:%"
+    assert rollup._entity_pattern(source, {"antenna_feed_pol": "e"}) == "%:e"
+    assert (
+        rollup._entity_pattern(
+            rollup.rollup_sources["snap_status"], {"hostname": "heraNode1_Snap0"}
+        )
+        == "heraNode1\\_Snap0:%"
+    )
+    assert rollup._entity_str(["heraNode1Snap0", None]) == "heraNode1Snap0:"
+
+
+def test_spectrum_rollups(backend_session):
+    test_session = backend_session
+    for index in range(3):
+        spectrum = np.arange(4, dtype=np.float32) + index
+        spectrum[0] = np.nan
+        for feed in ["e", "n"]:
+            test_session.add(
+                HeraAutoSpectrum(
+                    time=START_GPS + index * READING_INTERVAL,
+                    antenna_number=7,
+                    antenna_feed_pol=feed,
+                    spectrum=spectrum if feed == "e" else np.full(4, np.nan),
+                )
+            )
+    test_session.commit()
+
+    stoptime = Time(START_GPS + 3600, format="gps")
+    n_written = test_session.update_monitoring_rollups(
+        sources=["hera_auto_spectrum"], stoptime=stoptime
+    )
+    # the n feed spectra are all NaN, so there are no rollups for them
+    assert n_written == {"hera_auto_spectrum": 2}
+
+    result = test_session.get_monitoring_rollup(
+        "hera_auto_spectrum", variable="spectrum_mean", entity="7:e"
+    )
+    assert len(result) == 1
+    assert result[0].count == 3
+    assert result[0].min_value == 2.0
+    assert result[0].max_value == 4.0
+    assert result[0].mean_value == pytest.approx(3.0)
@@ -477,6 +477,12 @@ def test_add_rtp_task_process_event(
     result_obsid = result_obsid[0]
     assert result.isclose(expected)
 
+    # without a time filter the return_format is honored too
+    result_arrays = get_method(
+        **{obsid_name: data_obj.event_columns[obsid_name]}, return_format="numpy"
+    )
+    assert list(result_arrays[obsid_name]) == [data_obj.event_columns[obsid_name]]
+
     new_obsid_time = data_obj.event_columns["time"] + TimeDelta(3 * 60, format="sec")
     new_obsid = utils.calculate_obsid(new_obsid_time)
     test_session.add_obs(
@@ -80,6 +80,9 @@ def test_add_subsystem_error(mcsession, subsys):
     assert len(result) == 1
     result = result[0]
 
+    # the ids come from a sequence, which is not reset when other tests that add
+    # subsystem errors are rolled back
+    expected.id = result.id
     assert result.isclose(expected)
 
     test_session.add_subsystem_error(
@@ -103,7 +106,7 @@ def test_add_subsystem_error(mcsession, subsys):
 
     assert len(result_mult) == 2
     ids = [res.id for res in result_mult]
-    assert ids == [1, 2]
+    assert ids == [expected.id, expected.id + 1]
     subsystems = [res.subsystem for res in result_mult]
     assert subsystems == ["librarian", "rtp"]
 
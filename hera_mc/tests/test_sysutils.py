@@ -4,23 +4,27 @@
 
 """Testing for hera_mc.cm_sysutils and hookup."""
 
+import os
 from argparse import Namespace
 
 import numpy as np
 import pytest
 import redis
+from astropy.time import Time
 
 import hera_mc
 
 from .. import (
     cm_active,
     cm_dossier,
+    cm_handling,
     cm_hookup,
     cm_partconnect,
     cm_redis_corr,
     cm_revisions,
     cm_sysdef,
     cm_sysutils,
+    cm_transfer,
     cm_utils,
     node,
     watch_dog,
@@ -199,6 +203,13 @@ def test_other_hookup(sys_handle, mcsession, capsys):
     hookup.write_hookup_cache_to_file(log_msg="For testing.")
     hu = hookup.get_hookup("HH", "all", at_date="now", exact_match=True, use_cache=True)
     assert len(hu) == 0
+    # the cache file keys are indexed once per read of the file
+    index = hookup.cached_hookup_index
+    assert len(index) == len(hookup.cached_hookup_dict)
+    hu = hookup.get_hookup("HH70", "all", at_date="now", use_cache=True)
+    assert len(hu) > 0
+    assert sorted(hu.keys()) == sorted(index.find("HH70"))
+    assert all(key.startswith("HH70") for key in hu)
     hookup.hookup_type = None
     test_ret = hookup.hookup_cache_file_OK(
         {"hookup_type": "parts_test", "at_date_gps": 1269541796}
@@ -233,12 +244,45 @@ def test_other_hookup(sys_handle, mcsession, capsys):
     x = hookup.get_hookup_from_db("N91", "N", "now")
     assert len(x) == 0
 
+    # the cache files are keyed on the CM version, so one is needed to write them
+    mcsession.query(cm_transfer.CMVersion).delete()
+    with pytest.raises(ValueError, match="No CM version at"):
+        hookup.write_hookup_cache_to_file(log_msg="For testing.")
+
 
 def test_hookup_convenience():
     hookup = cm_hookup.get_hookup("HH", testing=True)
     assert "HH700:A" in hookup.keys()
 
 
+def test_signal_path_graph(mcsession, capsys):
+    hookup = cm_hookup.Hookup(mcsession)
+    hu = hookup.get_hookup_from_db(["HH", "N700"], "all", at_date="now")
+    assert "HH700:A" in hu.keys()
+    assert isinstance(hookup.signal_path, cm_hookup.SignalPathGraph)
+    # The compiled walk must agree with the uncompiled one for every active part.
+    n_compared = 0
+    for key, part in hookup.active.parts.items():
+        try:
+            hookup.hookup_type = hookup.sysdef.find_hookup_type(part.hptype, None)
+        except ValueError:
+            continue
+        hookup.sysdef.setup(part=part, pol="all", hookup_type=hookup.hookup_type)
+        for port_pol in hookup.sysdef.ppkeys:
+            compiled = hookup.signal_path.follow(
+                key,
+                port_pol,
+                hookup.hookup_type,
+                hookup.sysdef.single_pol_labeled_parts[hookup.hookup_type],
+            )
+            uncompiled = hookup._follow_hookup_stream(part.hpn, part.hpn_rev, port_pol)
+            assert compiled == uncompiled
+            n_compared += 1
+    assert n_compared > 0
+    assert hookup.signal_path.port_options("up", 0, "not-a-type", "E") == []
+    capsys.readouterr()
+
+
 def test_hookup_notes(mcsession, capsys):
     hookup = cm_hookup.Hookup(mcsession)
     hu = hookup.get_hookup(["HH"])
@@ -460,7 +504,73 @@ def test_sysutil_node(capsys, mcsession):
 def test_hookup_cache_file_info(sys_handle, mcsession):
     hookup = cm_hookup.Hookup(mcsession)
     cfi = hookup.hookup_cache_file_info()
-    assert "json does not exist" in cfi
+    assert "does not exist" in cfi
+
+
+def test_hookup_cache_file(sys_handle, mcsession, tmp_path, capsys):
+    hookup = cm_hookup.Hookup(mcsession)
+    hookup.hookup_cache_dir = str(tmp_path)
+    hookup.write_hookup_cache_to_file(log_msg="For testing.")
+    old_cache_file = hookup.hookup_cache_file
+    assert os.path.basename(old_cache_file).startswith("hookup_cache_4_")
+    from_db = hookup.get_hookup_from_db(
+        hookup.hookup_list_to_cache, "all", at_date="now"
+    )
+
+    # entries are only decoded when accessed
+    cache = cm_hookup.HookupCacheFile(old_cache_file)
+    assert sorted(cache.keys()) == sorted(from_db.keys())
+    assert "HH700:A" in cache
+    assert len(cache._entries) == 0
+    assert cache["HH700:A"]._to_dict() == from_db["HH700:A"]._to_dict()
+    assert list(cache._entries.keys()) == ["HH700:A"]
+    cache.close()
+    with cm_hookup.HookupCacheFile(old_cache_file) as cache:
+        assert "HH700:A" in cache
+    assert cache._mmap.closed
+
+    hu = hookup.get_hookup("HH700", "all", at_date="now", use_cache=True)
+    assert list(hu.keys()) == ["HH700:A"]
+    assert len(hookup.cached_hookup_dict._entries) == 1
+    # reading the cache again closes the previously read file
+    previous_cache = hookup.cached_hookup_dict
+    hu = hookup.get_hookup("HH700", "all", at_date="now", use_cache=True)
+    assert previous_cache._mmap.closed
+    assert not hookup.cached_hookup_dict._mmap.closed
+    assert list(hu.keys()) == ["HH700:A"]
+    captured = capsys.readouterr()
+    assert "<<<Cache IS current" in captured.out
+    cfi = hookup.hookup_cache_file_info()
+    assert "Cache CM git hash" in cfi
+    assert "Number of ant-pols hooked up is" in cfi
+
+    # a new cm version uses a new file, the old one is kept for earlier dates
+    before_update = Time.now()
+    after_update = Time(before_update.gps + 2, format="gps")
+    cm_handling.Handling(mcsession).add_cm_version(
+        Time(before_update.gps + 1, format="gps"), "new-hash"
+    )
+    mcsession.commit()
+    assert hookup.get_hookup_cache_file(before_update) == old_cache_file
+    new_cache_file = hookup.get_hookup_cache_file(after_update)
+    assert new_cache_file.endswith("hookup_cache_4_new-hash.bin")
+    assert not os.path.exists(new_cache_file)
+    hu = hookup.get_hookup("HH700", "all", at_date=after_update, use_cache=True)
+    assert list(hu.keys()) == ["HH700:A"]
+    hookup.hookup_type = "parts_hera"
+    hookup.at_date = after_update
+    with cm_hookup.HookupCacheFile(old_cache_file) as old_cache:
+        assert not hookup.hookup_cache_file_OK(old_cache.header)
+    pytest.raises(FileNotFoundError, hookup.read_hookup_cache_from_file, after_update)
+    pytest.raises(FileNotFoundError, hookup.read_hookup_cache_from_file, "2000-01-01")
+
+    bad_file = tmp_path / "bad.bin"
+    bad_file.write_bytes(b"not a cache file")
+    with pytest.raises(ValueError, match="is not a hookup cache file"):
+        cm_hookup.HookupCacheFile(str(bad_file))
+
+    hookup.delete_cache_file()
+    assert not os.path.exists(old_cache_file)
 
 
 def test_correlator_info(sys_handle):
@@ -3,14 +3,16 @@
 # Licensed under the 2-clause BSD license.
 
 """Testing for `hera_mc.weather`."""
+import asyncio
 import os
+from collections import namedtuple
 from math import floor
 
 import numpy as np
 import pytest
 from astropy.time import Time, TimeDelta
 
-from .. import weather
+from .. import mc_session, weather
 from . import onsite
 
 # Sometimes a connection is closed, which is handled and doesn't produce an error
@@ -19,6 +21,9 @@ from . import onsite
 pytestmark = pytest.mark.filterwarnings("ignore:connection:ResourceWarning:psycopg")
 
 
+Sample = namedtuple("Sample", ["sample_time", "value_time", "value", "status"])
+
+
 # could be parameterized
 def test_reduce_time_vals():
     times = np.array(range(125)) + 31.24
@@ -74,6 +79,253 @@ def test_reduce_time_vals():
     )
 
 
+@pytest.mark.parametrize("strategy", weather.reduction_strategies)
+@pytest.mark.parametrize("period", [3, 10, 60])
+def test_time_val_reducer(strategy, period):
+    rng = np.random.default_rng(5)
+    times = np.cumsum(rng.uniform(0.5, 2.0, 300)) + 31.24
+    values = rng.normal(size=300)
+    exp_times, exp_vals = weather._reduce_time_vals(
+        times, values, period, strategy=strategy
+    )
+
+    # split into chunks at random points, including empty chunks and chunks that
+    # start and stop within a bin
+    splits = np.sort(rng.integers(0, 300, 12))
+    reducer = weather.TimeValReducer(period, strategy=strategy)
+    results = [
+        reducer.add(times[start:stop], values[start:stop])
+        for start, stop in zip(np.append(0, splits), np.append(splits, 300))
+    ]
+    results.append(reducer.finish())
+    red_times = np.concatenate([result[0] for result in results])
+    red_vals = np.concatenate([result[1] for result in results])
+    np.testing.assert_allclose(red_times, exp_times)
+    np.testing.assert_allclose(red_vals, exp_vals)
+    assert reducer.n_bins == exp_times.size
+
+    # stop part way and resume with a new reducer
+    reducer = weather.TimeValReducer(period, strategy=strategy)
+    first_times = reducer.add(times[:150], values[:150])[0]
+    resume_time = reducer.resume_time
+    assert resume_time == first_times[-1] + period
+    reducer = weather.TimeValReducer(period, strategy=strategy, resume_time=resume_time)
+    results = [reducer.add(times[100:], values[100:]), reducer.finish()]
+    red_times = np.concatenate([first_times] + [result[0] for result in results])
+    np.testing.assert_allclose(red_times, exp_times)
+    assert weather.TimeValReducer(period).resume_time is None
+
+
+def test_time_val_reducer_edges():
+    # readings that are not later than the previous one are dropped, also across
+    # chunks (e.g. overlapping windows)
+    reducer = weather.TimeValReducer(10, strategy="sum")
+    times, vals = reducer.add([10, 12, 11, 15], [1.0, 2.0, 5.0, 3.0])
+    assert times.size == 0
+    times, vals = reducer.add([15, 18, 21, 35], [7.0, 4.0, 1.0, 1.0])
+    np.testing.assert_array_equal(times, [10, 20])
+    np.testing.assert_array_equal(vals, [10.0, 1.0])
+    assert reducer.finish()[0].size == 0
+
+    # a single bin gives nothing, like _reduce_time_vals
+    reducer = weather.TimeValReducer(60)
+    reducer.add([61, 62], [1.0, 2.0])
+    assert reducer.add([], [])[0].size == 0
+    assert reducer.finish()[0].size == 0
+    assert weather._reduce_time_vals(np.array([61, 62]), np.array([1.0, 2.0]), 60) == (
+        None,
+        None,
+    )
+
+    with pytest.raises(ValueError, match="period must be an integer"):
+        weather.TimeValReducer(1.5)
+    with pytest.raises(ValueError, match="unknown reduction strategy"):
+        weather.TimeValReducer(10, strategy="foo")
+
+
+def test_history_arrays():
+    OldSample = namedtuple("OldSample", ["sample_time", "value", "status"])
+    history = [
+        Sample(10.5, 10.0, "1.5", "nominal"),
+        Sample(11.5, 11.0, "nan", "nominal"),
+        Sample(12.5, 12.0, "2.5", "error"),
+        Sample(13.5, 13.0, 3.5, "nominal"),
+    ]
+    times, vals = weather._history_arrays(history)
+    np.testing.assert_array_equal(times, [10.0, 13.0])
+    np.testing.assert_array_equal(vals, [1.5, 3.5])
+
+    times, vals = weather._history_arrays([OldSample(10.5, 1.0, "nominal")])
+    np.testing.assert_array_equal(times, [10.5])
+
+    times, vals = weather._history_arrays([])
+    assert times.size == 0
+    assert vals.size == 0
+
+    t1 = Time("2016-01-10 01:15:23", scale="utc")
+    objs = weather._weather_objects(
+        "wind_speed", np.array([t1.unix, t1.unix + 60]), np.array([1, 2])
+    )
+    assert objs[0].isclose(weather.WeatherData.create(t1, "wind_speed", 1.0))
+    assert objs[1].time == floor(t1.gps) + 60
+    assert isinstance(objs[1].value, float)
+    assert weather._weather_objects("wind_speed", np.zeros(0), np.zeros(0)) == []
+
+
+def test_add_from_sensor_bulk(mcsession, monkeypatch):
+    test_session = mcsession
+    t1 = Time("2016-01-10 01:15:23", scale="utc")
+    reducer = weather.TimeValReducer(60, strategy="mean")
+    times, vals = reducer.add(t1.unix + np.arange(0, 600, 10), np.arange(60.0))
+    objs = weather._weather_objects("humidity", times, vals)
+    assert len(objs) == 9
+
+    monkeypatch.setattr(mc_session, "create_from_sensors", lambda *args, **kwargs: objs)
+    test_session.add_weather_data_from_sensors(t1, t1 + TimeDelta(600, format="sec"))
+    # adding the same data again (e.g. overlapping backfills) is not an error
+    test_session.add_weather_data_from_sensors(t1, t1 + TimeDelta(600, format="sec"))
+
+    result = test_session.get_weather_data(
+        starttime=t1, stoptime=t1 + TimeDelta(600, format="sec"), variable="humidity"
+    )
+    assert len(result) == 9
+    assert result[0].value == pytest.approx(np.mean(np.arange(4, 10)))
+
+
+class StandInPortalClient:
+    """
+    Stand-in for KATPortalClient serving synthetic sensor histories.
+
+    There is a reading every 10 seconds (3 seconds after multiples of 10 s), the
+    value is a function of the time.
+    """
+
+    def __init__(self, fail_after=None, delay=0.0):
+        self.fail_after = fail_after
+        self.delay = delay
+        self.requests = []
+        self.n_in_flight = 0
+        self.max_in_flight = 0
+
+    async def sensors_histories(
+        self, filters, start_time_sec, end_time_sec, timeout_sec=0
+    ):
+        self.requests.append((tuple(filters), start_time_sec, end_time_sec))
+        if self.fail_after is not None and len(self.requests) > self.fail_after:
+            raise TimeoutError("request timed out")
+        self.n_in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.n_in_flight)
+        await asyncio.sleep(self.delay)
+        self.n_in_flight -= 1
+
+        times = np.arange(np.ceil((start_time_sec - 3) / 10) * 10 + 3, end_time_sec, 10)
+        return {
+            name: [
+                Sample(time + 0.1, time, str(np.sin(time / 100.0)), "nominal")
+                for time in times.tolist()
+            ]
+            for name in filters
+        }
+
+
+def _expected_weather(variable, starttime, stoptime):
+    client = StandInPortalClient()
+    history = asyncio.run(
+        client.sensors_histories(
+            [weather.weather_sensor_dict[variable]["sensor_name"]],
+            starttime.unix,
+            stoptime.unix,
+        )
+    )
+    times, vals = weather._reduce_time_vals(
+        *weather._history_arrays(list(history.values())[0]),
+        weather.weather_sensor_dict[variable]["period"],
+        strategy=weather.weather_sensor_dict[variable]["reduction"],
+    )
+    return weather._weather_objects(variable, times, vals)
+
+
+def _obj_tuples(objs):
+    return sorted((obj.variable, obj.time, obj.value) for obj in objs)
+
+
+def test_create_from_sensors_windows():
+    t1 = Time("2019-11-10 01:15:23", scale="utc")
+    t2 = t1 + TimeDelta(2 * 3600 + 7, format="sec")
+    variables = ["wind_speed", "wind_gust", "temperature", "rain"]
+
+    client = StandInPortalClient(delay=0.01)
+    result = weather.create_from_sensors(
+        t1, t2, variables, portal_client=client, window_sec=600, max_concurrent=3
+    )
+    expected = [obj for var in variables for obj in _expected_weather(var, t1, t2)]
+    assert len(result) == len(expected)
+    assert _obj_tuples(result) == _obj_tuples(expected)
+
+    # 13 windows per sensor, one sensor per request
+    assert len(client.requests) == 13 * len(variables)
+    assert {len(request[0]) for request in client.requests} == {1}
+    assert client.max_in_flight == 3
+
+    with pytest.raises(ValueError, match="starttime must be an astropy Time object"):
+        weather.create_from_sensors(5, t2, portal_client=client)
+    with pytest.raises(ValueError, match="stoptime must be an astropy Time object"):
+        weather.create_from_sensors(t1, 5, portal_client=client)
+    with pytest.raises(ValueError, match="variable must be a key"):
+        weather.create_from_sensors(t1, t2, "foo", portal_client=client)
+
+
+def test_backfill_weather(mcsession):
+    test_session = mcsession
+    t1 = Time("2019-11-10 01:15:23", scale="utc")
+    t2 = t1 + TimeDelta(3 * 3600, format="sec")
+    variables = ["wind_speed", "temperature"]
+    expected = [obj for var in variables for obj in _expected_weather(var, t1, t2)]
+
+    def get_weather():
+        return test_session.get_weather_data(
+            starttime=t1 - TimeDelta(3600, format="sec"),
+            stoptime=t2 + TimeDelta(3600, format="sec"),
+        )
+
+    # the job is killed after 5 windows have been requested
+    client = StandInPortalClient(fail_after=5)
+    with pytest.raises(TimeoutError, match="request timed out"):
+        test_session.backfill_weather_data(
+            t1, t2, variables, window_sec=900, max_concurrent=2, portal_client=client
+        )
+    n_partial = len(get_weather())
+    assert 0 < n_partial < len(expected)
+    checkpoints = test_session.query(weather.WeatherBackfill).all()
+    assert len(checkpoints) == 2
+    assert sum(checkpoint.n_records for checkpoint in checkpoints) == n_partial
+    for checkpoint in checkpoints:
+        assert checkpoint.starttime == floor(t1.gps)
+        assert checkpoint.resume_time is None or (
+            checkpoint.starttime < checkpoint.resume_time < checkpoint.stoptime
+        )
+
+    # resume, the result is the same as if it had not been stopped
+    client = StandInPortalClient()
+    n_records = test_session.backfill_weather_data(
+        t1, t2, variables, window_sec=900, portal_client=client
+    )
+    assert sum(n_records.values()) == len(expected) - n_partial
+    # fewer than 12 windows per sensor are requested
+    assert len(client.requests) < 12 * 2
+    assert _obj_tuples(get_weather()) == _obj_tuples(expected)
+    for checkpoint in test_session.query(weather.WeatherBackfill).all():
+        assert checkpoint.resume_time == checkpoint.stoptime
+        assert checkpoint.last_updated is not None
+
+    # nothing left to do
+    client = StandInPortalClient()
+    assert test_session.backfill_weather_data(
+        t1, t2, variables, portal_client=client
+    ) == {"wind_speed": 0, "temperature": 0}
+    assert client.requests == []
+
+
 def test_add_weather(mcsession):
     test_session = mcsession
     t1 = Time("2016-01-10 01:15:23", scale="utc")
@@ -3,7 +3,9 @@
 # Licensed under the 2-clause BSD license.
 
 """Handle weather data sourced from meerkat's katportalclient."""
-from math import floor, isnan
+import asyncio
+from collections import deque
+from math import floor
 
 import numpy as np
 from astropy.time import Time
@@ -18,19 +20,19 @@ no_tornado_message = (
 
 tornado_present = True
 try:
-    import tornado
-    from tornado.gen import coroutine as tornado_coroutine
+    import tornado  # noqa: F401 (katportalclient is built on tornado)
 except ImportError as error:
-
-    def tornado_coroutine(func):
-        """Spoof this function to avoid name errors with the minimum dependencies."""
-        pass
-
     tornado_present = False
     tornado_error = error
 
 
 katportal_url = "http://portal.mkat.karoo.kat.ac.za/api/client"
+# length of the time windows requested from katportal in seconds
+DEFAULT_WINDOW_SEC = 3600
+# maximum number of concurrent requests to katportal
+DEFAULT_MAX_CONCURRENT = 4
+# timeout for each katportal request in seconds
+DEFAULT_TIMEOUT_SEC = 120
 
 # These are the weather measurements that can be added to the M&C database.
 # To add a sensor, add a similar entry in this dict (paying particular attention
@@ -94,6 +96,46 @@ weather_sensor_dict = {
 }
 
 
+reduction_strategies = ["decimate", "max", "mean", "sum"]
+
+
+def _bin_reduce(vals, inds, strategy):
+    """
+    Reduce the values in bins.
+
+    Parameters
+    ----------
+    vals : array of float
+        Reading values.
+    inds : array of int
+        Index of the first value in each bin, increasing. The last bin runs to the
+        end of vals.
+    strategy : {'decimate', 'max', 'mean', 'sum'}
+        Strategy for data reduction.
+
+    Returns
+    -------
+    array of float
+        The reduced value for each bin.
+
+    """
+    if strategy == "decimate":
+        return vals[inds]
+    if strategy == "max":
+        return np.maximum.reduceat(vals, inds)
+    sums = np.add.reduceat(vals, inds)
+    if strategy == "sum":
+        return sums
+    return sums / np.diff(np.append(inds, vals.size))
+
+
+def _check_reduction(period, strategy):
+    if not isinstance(period, (int, np.integer)):
+        raise ValueError("period must be an integer")
+    if strategy not in reduction_strategies:
+        raise ValueError("unknown reduction strategy")
+
+
 def _reduce_time_vals(times, vals, period, strategy="decimate"):
     """
     Reduce the number of values.
@@ -110,8 +152,7 @@ def _reduce_time_vals(times, vals, period, strategy="decimate"):
         Strategy for data reduction.
 
     """
-    if not isinstance(period, (int, np.int_)):
-        raise ValueError("period must be an integer")
+    _check_reduction(period, strategy)
 
     # the // operator is a floored divide.
     times_keep, inds = np.unique((times // period) * period, return_index=True)
@@ -121,32 +162,153 @@ def _reduce_time_vals(times, vals, period, strategy="decimate"):
 
     if len(inds) < 2:
         return None, None
-    if strategy == "decimate":
-        vals_keep = vals[inds]  # Could keep with len(inds) == 1, but oh well
-    elif strategy == "max":
-        vals_keep = []
-        times_keep = times_keep[:-1]
-        for count in range(len(inds) - 1):
-            vals_keep.append(np.max(vals[inds[count] : inds[count + 1]]))
-        vals_keep = np.array(vals_keep)
-    elif strategy == "mean":
-        vals_keep = []
+    vals_keep = _bin_reduce(np.asarray(vals), inds, strategy)
+    if strategy != "decimate":
+        # the last bin may not be complete
         times_keep = times_keep[:-1]
-        for count in range(len(inds) - 1):
-            vals_keep.append(np.mean(vals[inds[count] : inds[count + 1]]))
-        vals_keep = np.array(vals_keep)
-    elif strategy == "sum":
-        vals_keep = []
-        times_keep = times_keep[:-1]
-        for count in range(len(inds) - 1):
-            vals_keep.append(np.sum(vals[inds[count] : inds[count + 1]]))
-        vals_keep = np.array(vals_keep)
-    else:
-        raise ValueError("unknown reduction strategy")
+        vals_keep = vals_keep[:-1]
 
     return times_keep, vals_keep
 
 
+class TimeValReducer:
+    """
+    Reduce sensor readings that arrive in chunks.
+
+    Adding the readings chunk by chunk (in time order) and then calling `finish`
+    gives the same reduced values as passing all the readings to `_reduce_time_vals`,
+    so a long history can be fetched and reduced in windows. The readings in the last
+    bin of each chunk are held back until a later reading shows that the bin is
+    complete. Readings that are not later than the previous reading are dropped.
+
+    Parameters
+    ----------
+    period : int
+        Final period of reduced values in seconds.
+    strategy : {'decimate', 'max', 'mean', 'sum'}
+        Strategy for data reduction.
+    resume_time : float, optional
+        Unix start time of a bin to resume an earlier reduction from, which is the
+        `resume_time` of the earlier reducer when it stopped. Readings before it are
+        dropped and its bin is not treated as a partial first bin.
+
+    """
+
+    def __init__(self, period, strategy="decimate", resume_time=None):
+        _check_reduction(period, strategy)
+        self.period = period
+        self.strategy = strategy
+        self.last_time = None
+        self.n_bins = 0
+        self._started = False
+        self._resumed = resume_time is not None
+        if self._resumed:
+            self._started = True
+            # keep readings at or after the resume time
+            self.last_time = np.nextafter(float(resume_time), -np.inf)
+        self._times = np.zeros(0)
+        self._vals = np.zeros(0)
+
+    @property
+    def resume_time(self):
+        """
+        Unix time to resume the reduction from if it is stopped now.
+
+        This is the start of the bin that is held back, None if no bins have been
+        returned yet (so the reduction has to start from the beginning).
+        """
+        if (self.n_bins == 0 and not self._resumed) or self._times.size == 0:
+            return None
+        return float((self._times[0] // self.period) * self.period)
+
+    def add(self, times, vals):
+        """
+        Add a chunk of readings.
+
+        Parameters
+        ----------
+        times : array of float
+            Unix times of the readings.
+        vals : array of float
+            Reading values.
+
+        Returns
+        -------
+        times : array of float
+            Start times of the bins completed by this chunk.
+        vals : array of float
+            Reduced values of the bins completed by this chunk.
+
+        """
+        times = np.asarray(times, dtype=float)
+        vals = np.asarray(vals, dtype=float)
+        if times.size:
+            # keep the readings later than all the ones before them
+            previous = -np.inf if self.last_time is None else self.last_time
+            running_max = np.maximum.accumulate(np.append(previous, times))
+            keep = times > running_max[:-1]
+            times = times[keep]
+            vals = vals[keep]
+            self.last_time = running_max[-1]
+        times = np.concatenate((self._times, times))
+        vals = np.concatenate((self._vals, vals))
+        self._times = times
+        self._vals = vals
+        if times.size == 0:
+            return times, vals
+
+        # the // operator is a floored divide.
+        times_keep, inds = np.unique(
+            (times // self.period) * self.period, return_index=True
+        )
+        if not self._started:
+            # wait for a second bin, the first one is dropped if it is not complete
+            if times_keep.size < 2:
+                return np.zeros(0), np.zeros(0)
+            self._started = True
+            if times_keep[0] < times[0]:
+                times_keep = times_keep[1:]
+                inds = inds[1:]
+
+        # hold back the last bin
+        self._times = times[inds[-1] :]
+        self._vals = vals[inds[-1] :]
+        if inds.size < 2:
+            return np.zeros(0), np.zeros(0)
+        vals_keep = _bin_reduce(vals[: inds[-1]], inds[:-1], self.strategy)
+        self.n_bins += vals_keep.size
+        return times_keep[:-1], vals_keep
+
+    def finish(self):
+        """
+        Reduce the readings that were held back.
+
+        Only decimated values are returned for the last bin, which may not be
+        complete, matching `_reduce_time_vals`.
+
+        Returns
+        -------
+        times : array of float
+            Start time of the last bin if it is returned.
+        vals : array of float
+            Reduced value of the last bin if it is returned.
+
+        """
+        times = np.zeros(0)
+        vals = np.zeros(0)
+        if (
+            self.strategy == "decimate"
+            and (self.n_bins > 0 or self._resumed)
+            and self._times.size
+        ):
+            times = (self._times[:1] // self.period) * self.period
+            vals = self._vals[:1]
+            self.n_bins += 1
+        self._times = np.zeros(0)
+        self._vals = np.zeros(0)
+        return times, vals
+
+
 class WeatherData(MCDeclarativeBase):
     """
     Definition of weather table.
@@ -198,102 +360,286 @@ class WeatherData(MCDeclarativeBase):
         return cls(time=weather_time, variable=variable, value=value)
 
 
-@tornado_coroutine
-def _helper_create_from_sensors(starttime, stoptime, variables=None):
+class WeatherBackfill(MCDeclarativeBase):
     """
-    Create a list of weather objects from sensor data using tornado server.
+    Definition of weather_backfill table.
+
+    Records the progress of a weather backfill (see `backfill_from_sensors`) so
+    that it can resume where it stopped.
+
+    Attributes
+    ----------
+    variable : String Column
+        Name of weather variable. One of the keys in weather_sensor_dict.
+        Part of the primary key.
+    starttime : BigInteger Column
+        GPS start time of the backfill, floored. Part of the primary key.
+    stoptime : BigInteger Column
+        GPS stop time of the backfill, floored. Part of the primary key.
+    resume_time : BigInteger Column
+        GPS time to resume the backfill from (the start of the first reduction bin
+        that has not been added), equal to stoptime when the backfill is done.
+        Null if no data have been added yet.
+    n_records : BigInteger Column
+        Number of weather records added by the backfill.
+    last_updated : BigInteger Column
+        GPS time of the last update, floored.
+
+    """
+
+    __tablename__ = "weather_backfill"
+    variable = Column(String, primary_key=True)
+    starttime = Column(BigInteger, primary_key=True, autoincrement=False)
+    stoptime = Column(BigInteger, primary_key=True, autoincrement=False)
+    resume_time = Column(BigInteger)
+    n_records = Column(BigInteger, nullable=False)
+    last_updated = Column(BigInteger)
+
+
+def _history_arrays(history):
+    """
+    Get the times and values of the usable readings in a katportal sensor history.
 
     Parameters
     ----------
-    starttime : astropy Time object
-        Time to start getting history.
-    stoptime : astropy Time object
-        Time to stop getting history.
-    variable : str
-        Variable to get history for. Must be a key in weather_sensor_dict,
-        defaults to all keys in weather_sensor_dict.
+    history : list of namedtuple
+        Sensor samples from katportal's `sensors_histories`.
 
     Returns
     -------
-    A list of WeatherData objects (only accessible via a yield call)
+    times : array of float
+        Unix times of the readings.
+    vals : array of float
+        Reading values.
 
     """
-    from katportalclient import KATPortalClient
+    # status is usually nominal, but can indicate sensor errors.
+    # Since we can't do anything about those and the data might be bad, ignore them.
+    # The value_time is the sensor timestamp, while the sample_time is when the
+    # recording system got it. The value_time isn't always present, so test for it.
+    readings = [
+        (
+            item.value_time if "value_time" in item._fields else item.sample_time,
+            float(item.value),
+        )
+        for item in history
+        if item.status == "nominal"
+    ]
+    readings = np.array(readings, dtype=float).reshape(-1, 2)
+    # skip it if nan is supplied
+    readings = readings[~np.isnan(readings[:, 1])]
+    return readings[:, 0], readings[:, 1]
+
+
+def _weather_objects(variable, times, vals):
+    """
+    Make weather objects from reduced readings.
 
-    if not isinstance(starttime, Time):
-        raise ValueError("starttime must be an astropy Time object")
+    Parameters
+    ----------
+    variable : str
+        Must be a key in weather_sensor_dict.
+    times : array of float
+        Unix times of the reduced readings.
+    vals : array of float
+        Reduced reading values.
 
-    if not isinstance(stoptime, Time):
-        raise ValueError("stoptime must be an astropy Time object")
+    Returns
+    -------
+    list of WeatherData objects
 
+    """
+    if len(times) == 0:
+        return []
+    # convert all the times at once, making a Time object per reading is slow
+    gps_times = np.floor(Time(times, format="unix").gps).astype(np.int64)
+    return [
+        WeatherData(time=time, variable=variable, value=value)
+        for time, value in zip(
+            gps_times.tolist(), np.asarray(vals, dtype=float).tolist()
+        )
+    ]
+
+
+def _check_variables(variables):
+    """Get the list of weather variables, checking that they are known."""
     if variables is None:
-        variables = weather_sensor_dict.keys()
-    elif not isinstance(variables, (list, tuple)):
+        return list(weather_sensor_dict.keys())
+    if not isinstance(variables, (list, tuple)):
         variables = [variables]
-
-    sensor_names = []
-    sensor_var_dict = {}
     for var in variables:
         if var not in weather_sensor_dict.keys():
             raise ValueError("variable must be a key in weather_sensor_dict")
-        sensor_names.append(weather_sensor_dict[var]["sensor_name"])
-        sensor_var_dict[weather_sensor_dict[var]["sensor_name"]] = var
+    return list(variables)
 
-    portal_client = KATPortalClient(katportal_url, on_update_callback=None)
 
-    histories = yield portal_client.sensors_histories(
-        sensor_names, starttime.unix, stoptime.unix, timeout_sec=120
-    )
+def _check_time_range(starttime, stoptime):
+    if not isinstance(starttime, Time):
+        raise ValueError("starttime must be an astropy Time object")
 
-    weather_obj_list = []
-    for sensor_name, history in histories.items():
-        variable = sensor_var_dict[sensor_name]
-        sensor_times = [0.0]
-        sensor_data = []
-        for item in history:
-            # status is usually nominal, but can indicate sensor errors.
-            # Since we can't do anything about those and the data might be bad, ignore them
-            if item.status != "nominal":
-                continue
-            # skip it if nan is supplied
-            if isnan(float(item.value)):
-                continue
-
-            # the value_time is the sensor timestamp, while the other is
-            # when the recording system got it. The value_time isn't always
-            # present, so test for it
-            if "value_time" in item._fields:
-                timestamp = item.value_time
-            else:
-                timestamp = item.sample_time
-            if timestamp > sensor_times[-1]:
-                sensor_times.append(timestamp)
-                sensor_data.append(float(item.value))
-        del sensor_times[0]
-        if len(sensor_data):
-            reduction = weather_sensor_dict[variable]["reduction"]
-            period = weather_sensor_dict[variable]["period"]
-
-            times_use, values_use = _reduce_time_vals(
-                np.array(sensor_times),
-                np.array(sensor_data),
-                period,
-                strategy=reduction,
-            )
-            if times_use is not None:
-                for count, timestamp in enumerate(times_use.tolist()):
-                    time_obj = Time(timestamp, format="unix")
-                    weather_obj_list.append(
-                        WeatherData.create(time_obj, variable, values_use[count])
-                    )
+    if not isinstance(stoptime, Time):
+        raise ValueError("stoptime must be an astropy Time object")
 
-    raise tornado.gen.Return(weather_obj_list)
 
+def _get_portal_client(portal_client):
+    """Get a katportal client if one is not supplied."""
+    if portal_client is not None:
+        return portal_client
+    if not tornado_present:
+        raise ImportError(no_tornado_message) from tornado_error
 
-def create_from_sensors(starttime, stoptime, variables=None):
+    from katportalclient import KATPortalClient
+
+    return KATPortalClient(katportal_url, on_update_callback=None)
+
+
+async def _fetch_window(
+    portal_client, sensor_name, start, stop, semaphore, timeout_sec
+):
+    """Get the history of a sensor in one time window from katportal."""
+    async with semaphore:
+        histories = await portal_client.sensors_histories(
+            [sensor_name], start, stop, timeout_sec=timeout_sec
+        )
+    return histories.get(sensor_name, [])
+
+
+async def _reduce_sensor_windows(
+    portal_client,
+    variable,
+    start,
+    stop,
+    reducer,
+    semaphore,
+    window_sec=DEFAULT_WINDOW_SEC,
+    prefetch=DEFAULT_MAX_CONCURRENT,
+    timeout_sec=DEFAULT_TIMEOUT_SEC,
+):
+    """
+    Fetch and reduce the history of a weather sensor window by window.
+
+    Up to `prefetch` windows are fetched concurrently (limited overall by the
+    semaphore), but they are reduced in time order so the reducer can carry the
+    incomplete bins over to the next window.
+
+    Parameters
+    ----------
+    portal_client : KATPortalClient
+        Client (or an object with the same `sensors_histories` coroutine) to get the
+        sensor histories from.
+    variable : str
+        Must be a key in weather_sensor_dict.
+    start, stop : float
+        Unix times to get the history for.
+    reducer : TimeValReducer
+        Reducer for the readings.
+    semaphore : asyncio.Semaphore
+        Semaphore limiting the number of concurrent requests to katportal.
+    window_sec : float
+        Length of the windows in seconds.
+    prefetch : int
+        Number of windows to fetch ahead.
+    timeout_sec : float
+        Timeout for each katportal request in seconds.
+
+    Yields
+    ------
+    window_stop : float
+        Unix stop time of the window.
+    weather_objs : list of WeatherData objects
+        Weather objects for the bins completed in the window. Held back bins are
+        added after the last window.
+
+    """
+    sensor_name = weather_sensor_dict[variable]["sensor_name"]
+    window_starts = iter(np.arange(start, stop, window_sec).tolist())
+    pending = deque()
+
+    def schedule():
+        while len(pending) < prefetch:
+            window_start = next(window_starts, None)
+            if window_start is None:
+                return
+            window_stop = min(window_start + window_sec, stop)
+            fetch = _fetch_window(
+                portal_client,
+                sensor_name,
+                window_start,
+                window_stop,
+                semaphore,
+                timeout_sec,
+            )
+            pending.append((window_stop, asyncio.ensure_future(fetch)))
+
+    try:
+        schedule()
+        while pending:
+            window_stop, task = pending.popleft()
+            history = await task
+            schedule()
+            times, vals = reducer.add(*_history_arrays(history))
+            weather_objs = _weather_objects(variable, times, vals)
+            if not pending:
+                weather_objs.extend(_weather_objects(variable, *reducer.finish()))
+            yield window_stop, weather_objs
+    finally:
+        # don't leave requests running if there was an error
+        for _, task in pending:
+            task.cancel()
+
+
+async def _create_from_sensors(
+    starttime,
+    stoptime,
+    variables=None,
+    portal_client=None,
+    window_sec=DEFAULT_WINDOW_SEC,
+    max_concurrent=DEFAULT_MAX_CONCURRENT,
+    timeout_sec=DEFAULT_TIMEOUT_SEC,
+):
+    """Get the weather objects for all the variables concurrently."""
+    portal_client = _get_portal_client(portal_client)
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def create_variable(variable):
+        reducer = TimeValReducer(
+            weather_sensor_dict[variable]["period"],
+            strategy=weather_sensor_dict[variable]["reduction"],
+        )
+        weather_obj_list = []
+        async for _, weather_objs in _reduce_sensor_windows(
+            portal_client,
+            variable,
+            starttime.unix,
+            stoptime.unix,
+            reducer,
+            semaphore,
+            window_sec=window_sec,
+            prefetch=max_concurrent,
+            timeout_sec=timeout_sec,
+        ):
+            weather_obj_list.extend(weather_objs)
+        return weather_obj_list
+
+    results = await asyncio.gather(*[create_variable(var) for var in variables])
+    return [obj for weather_obj_list in results for obj in weather_obj_list]
+
+
+def create_from_sensors(
+    starttime,
+    stoptime,
+    variables=None,
+    portal_client=None,
+    window_sec=DEFAULT_WINDOW_SEC,
+    max_concurrent=DEFAULT_MAX_CONCURRENT,
+    timeout_sec=DEFAULT_TIMEOUT_SEC,
+):
     """
     Return a list of weather objects from sensor data.
 
+    The sensor histories are fetched from katportal in time windows, several
+    windows and sensors at a time.
+
     Parameters
     ----------
     starttime : astropy Time object
@@ -303,16 +649,173 @@ def create_from_sensors(starttime, stoptime, variables=None):
     variable : str
         Variable to get history for. Must be a key in weather_sensor_dict,
         defaults to all keys in weather_sensor_dict.
+    portal_client : KATPortalClient, optional
+        Client to get the sensor histories from, defaults to a client for the
+        MeerKAT portal. Any object with a `sensors_histories` coroutine with the
+        same signature can be used (e.g. for testing).
+    window_sec : float
+        Length of the time windows to request in seconds.
+    max_concurrent : int
+        Maximum number of concurrent requests to katportal.
+    timeout_sec : float
+        Timeout for each request in seconds.
 
     Returns
     -------
     A list of WeatherData objects
 
     """
-    if not tornado_present:
-        raise ImportError(no_tornado_message) from tornado_error
+    _check_time_range(starttime, stoptime)
+    variables = _check_variables(variables)
+
+    return asyncio.run(
+        _create_from_sensors(
+            starttime,
+            stoptime,
+            variables=variables,
+            portal_client=portal_client,
+            window_sec=window_sec,
+            max_concurrent=max_concurrent,
+            timeout_sec=timeout_sec,
+        )
+    )
 
-    io_loop = tornado.ioloop.IOLoop.current()
-    return io_loop.run_sync(
-        lambda: _helper_create_from_sensors(starttime, stoptime, variables=variables)
+
+def _get_backfill_checkpoint(session, variable, start_gps, stop_gps):
+    """Get the checkpoint of a backfill, making a new one if there is none."""
+    checkpoint = session.get(WeatherBackfill, (variable, start_gps, stop_gps))
+    if checkpoint is None:
+        checkpoint = WeatherBackfill(
+            variable=variable, starttime=start_gps, stoptime=stop_gps, n_records=0
+        )
+        session.add(checkpoint)
+    return checkpoint
+
+
+async def _backfill_from_sensors(
+    session,
+    starttime,
+    stoptime,
+    variables,
+    portal_client=None,
+    window_sec=DEFAULT_WINDOW_SEC,
+    max_concurrent=DEFAULT_MAX_CONCURRENT,
+    timeout_sec=DEFAULT_TIMEOUT_SEC,
+):
+    """Backfill all the variables concurrently."""
+    portal_client = _get_portal_client(portal_client)
+    semaphore = asyncio.Semaphore(max_concurrent)
+    start_gps = int(floor(starttime.gps))
+    stop_gps = int(floor(stoptime.gps))
+
+    async def backfill_variable(variable):
+        checkpoint = _get_backfill_checkpoint(session, variable, start_gps, stop_gps)
+        start = starttime.unix
+        resume_time = None
+        if checkpoint.resume_time is not None:
+            if checkpoint.resume_time >= stop_gps:
+                # already done
+                return 0
+            # the resume times are bin starts, which are whole unix seconds
+            resume_time = round(Time(checkpoint.resume_time, format="gps").unix)
+            start = resume_time
+        reducer = TimeValReducer(
+            weather_sensor_dict[variable]["period"],
+            strategy=weather_sensor_dict[variable]["reduction"],
+            resume_time=resume_time,
+        )
+
+        n_records = 0
+        async for window_stop, weather_objs in _reduce_sensor_windows(
+            portal_client,
+            variable,
+            start,
+            stoptime.unix,
+            reducer,
+            semaphore,
+            window_sec=window_sec,
+            prefetch=max_concurrent,
+            timeout_sec=timeout_sec,
+        ):
+            # The records and the checkpoint are committed together without
+            # yielding to the other variables, so they are always consistent.
+            session._insert_ignoring_duplicates(WeatherData, weather_objs)
+            n_records += len(weather_objs)
+            checkpoint.n_records += len(weather_objs)
+            if window_stop >= stoptime.unix:
+                checkpoint.resume_time = stop_gps
+            elif reducer.resume_time is not None:
+                checkpoint.resume_time = round(
+                    Time(reducer.resume_time, format="unix").gps
+                )
+            checkpoint.last_updated = int(floor(Time.now().gps))
+            session.commit()
+        return n_records
+
+    results = await asyncio.gather(*[backfill_variable(var) for var in variables])
+    return dict(zip(variables, results))
+
+
+def backfill_from_sensors(
+    session,
+    starttime,
+    stoptime,
+    variables=None,
+    portal_client=None,
+    window_sec=DEFAULT_WINDOW_SEC,
+    max_concurrent=DEFAULT_MAX_CONCURRENT,
+    timeout_sec=DEFAULT_TIMEOUT_SEC,
+):
+    """
+    Add weather data for a long time range from katportal to the database.
+
+    The sensor histories are fetched in time windows, several windows and sensors
+    at a time, reduced and inserted window by window. The progress for each
+    variable is recorded in the weather_backfill table after each window, so if the
+    backfill is stopped, running it again with the same time range resumes where it
+    stopped (and finished variables are skipped).
+
+    Parameters
+    ----------
+    session : MCSession
+        Session to write the records and checkpoints with, it is committed after
+        each window.
+    starttime : astropy Time object
+        Time to start getting history.
+    stoptime : astropy Time object
+        Time to stop getting history.
+    variables : str or list of str
+        Variable(s) to get history for. Must be keys in weather_sensor_dict,
+        defaults to all keys in weather_sensor_dict.
+    portal_client : KATPortalClient, optional
+        Client to get the sensor histories from, defaults to a client for the
+        MeerKAT portal. Any object with a `sensors_histories` coroutine with the
+        same signature can be used (e.g. for testing).
+    window_sec : float
+        Length of the time windows to request in seconds.
+    max_concurrent : int
+        Maximum number of concurrent requests to katportal.
+    timeout_sec : float
+        Timeout for each request in seconds.
+
+    Returns
+    -------
+    dict
+        Number of records added for each variable by this call.
+
+    """
+    _check_time_range(starttime, stoptime)
+    variables = _check_variables(variables)
+
+    return asyncio.run(
+        _backfill_from_sensors(
+            session,
+            starttime,
+            stoptime,
+            variables,
+            portal_client=portal_client,
+            window_sec=window_sec,
+            max_concurrent=max_concurrent,
+            timeout_sec=timeout_sec,
+        )
     )
@@ -24,9 +24,18 @@ parser.add_argument(
 parser.add_argument(
     "--cm_csv_path", help="Available if you want to redirect 'go' dir.", default=None
 )
+parser.add_argument(
+    "--max-workers",
+    dest="max_workers",
+    type=int,
+    help="Number of tables to write in parallel.",
+    default=1,
+)
 args = parser.parse_args()
 
-files_written = cm_transfer.package_db_to_csv(tables=args.tables)
+files_written = cm_transfer.package_db_to_csv(
+    tables=args.tables, max_workers=args.max_workers
+)
 
 if args.go:
     db = mc.connect_to_mc_db(args)
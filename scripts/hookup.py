@@ -148,4 +148,4 @@ if __name__ == "__main__":
                     "-------------------------------------------------------------------------"
                 )
             if args.write_cache_file:
-                hookup.write_cache_file(args.cache_log)
+                hookup.write_hookup_cache_to_file(args.cache_log)
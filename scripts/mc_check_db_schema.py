@@ -10,7 +10,8 @@ parser = mc.get_mc_argument_parser()
 args = parser.parse_args()
 
 try:
-    db = mc.connect_to_mc_db(args)
+    # always do the full check rather than relying on the schema cache
+    db = mc.connect_to_mc_db(args, deep_check=True)
 except RuntimeError as e:
     raise SystemExit(str(e)) from e
 
@@ -0,0 +1,63 @@
+#! /usr/bin/env python
+# -*- mode: python; coding: utf-8 -*-
+# Copyright 2026 the HERA Collaboration
+# Licensed under the 2-clause BSD license.
+
+"""Keep the hourly and daily rollups of the monitoring tables up to date.
+
+Each update only recomputes the buckets since the last update, so it is cheap
+to run often enough that the current hour and day are close to complete.
+
+"""
+
+from hera_mc import mc
+from hera_mc.collector_scheduler import Collector, CollectorScheduler
+from hera_mc.rollup import rollup_sources
+
+parser = mc.get_mc_argument_parser()
+parser.add_argument(
+    "--interval",
+    type=float,
+    default=600,
+    help="How often to update the rollups (in seconds).",
+)
+parser.add_argument(
+    "--sources",
+    type=str,
+    default=None,
+    help="Comma separated list of tables to update the rollups for, defaults to "
+    "all of: " + ", ".join(rollup_sources),
+)
+parser.add_argument(
+    "--report-interval",
+    type=float,
+    default=None,
+    help="Print collector latency and lag statistics this often (in seconds).",
+)
+args = parser.parse_args()
+db = mc.connect_to_mc_db(args)
+
+if args.sources is None:
+    sources = list(rollup_sources)
+else:
+    sources = args.sources.split(",")
+
+# one collector per table so a slow table does not hold up the others
+collectors = [
+    Collector(
+        "update_monitoring_rollups",
+        interval=args.interval,
+        name="rollup_" + source,
+        kwargs={"sources": [source]},
+    )
+    for source in sources
+]
+
+scheduler = CollectorScheduler(
+    db,
+    collectors,
+    daemon_name="mc_update_rollups",
+    subsystem_name="mc_rollups",
+    report_interval=args.report_interval,
+)
+scheduler.run()
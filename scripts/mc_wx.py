@@ -8,7 +8,7 @@ import sys
 
 from astropy.time import Time
 
-from hera_mc import cm_utils, mc
+from hera_mc import cm_utils, mc, weather
 
 if __name__ == "__main__":
     parser = mc.get_mc_argument_parser()
@@ -36,6 +36,27 @@ if __name__ == "__main__":
         help="Flag to actually write to database.",
         action="store_true",
     )
+    parser.add_argument(
+        "--backfill",
+        help="Flag to add the data to the database in time windows, committing and "
+        "recording the progress after each window so that the same command resumes "
+        "where it stopped if it is interrupted. Use for long time ranges.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--window-sec",
+        dest="window_sec",
+        type=float,
+        default=weather.DEFAULT_WINDOW_SEC,
+        help="Length of the time windows requested from katportal in seconds.",
+    )
+    parser.add_argument(
+        "--max-concurrent",
+        dest="max_concurrent",
+        type=int,
+        default=weather.DEFAULT_MAX_CONCURRENT,
+        help="Maximum number of concurrent requests to katportal.",
+    )
     parser.add_argument(
         "-l",
         "--last-period",
@@ -59,7 +80,7 @@ if __name__ == "__main__":
         start_time = cm_utils.get_astropytime(args.start_date, args.start_time)
         stop_time = cm_utils.get_astropytime(args.stop_date, args.stop_time)
 
-    if args.add_to_db:
+    if args.add_to_db or args.backfill:
         if not isinstance(start_time, Time) or not isinstance(stop_time, Time):
             print(
                 "Need valid start/stop times - or can specify last-period.",
@@ -69,12 +90,27 @@ if __name__ == "__main__":
 
         db = mc.connect_to_mc_db(args)
         session = db.sessionmaker()
-        session.add_weather_data_from_sensors(start_time, stop_time, variables)
-        session.commit()
+        if args.backfill:
+            n_records = session.backfill_weather_data(
+                start_time,
+                stop_time,
+                variables,
+                window_sec=args.window_sec,
+                max_concurrent=args.max_concurrent,
+            )
+            for variable, n_added in n_records.items():
+                print(f"{variable}: {n_added} records added")
+        else:
+            session.add_weather_data_from_sensors(start_time, stop_time, variables)
+            session.commit()
     else:
-        from hera_mc import weather
-
-        wx = weather.create_from_sensors(start_time, stop_time, variables)
+        wx = weather.create_from_sensors(
+            start_time,
+            stop_time,
+            variables,
+            window_sec=args.window_sec,
+            max_concurrent=args.max_concurrent,
+        )
         for w in wx:
             units = weather.weather_sensor_dict[w.variable]["units"]
             print(
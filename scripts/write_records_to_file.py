@@ -3,7 +3,7 @@
 # Copyright 2018 the HERA Collaboration
 # Licensed under the 2-clause BSD license.
 
-"""script to write M&C records to a CSV file"""
+"""script to write M&C records to a CSV or Parquet file"""
 
 from astropy.time import Time, TimeDelta
 
@@ -185,7 +185,7 @@ valid_tables = {
 
 if __name__ == "__main__":
     parser = mc.get_mc_argument_parser()
-    parser.description = """Write M&C records to a CSV file"""
+    parser.description = """Write M&C records to a CSV or Parquet file"""
     parser.add_argument("table", help="table to get info from")
 
     filter_args = {}
@@ -204,7 +204,23 @@ if __name__ == "__main__":
             default=None,
         )
 
-    parser.add_argument("--filename", help="filename to save data to")
+    parser.add_argument(
+        "--filename",
+        help="filename to save data to, use a '.parquet' extension to write a "
+        "Parquet file (requires pyarrow)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        dest="chunk_size",
+        type=int,
+        default=None,
+        help="number of rows to fetch and write at a time",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="print the number of rows written and the rate",
+    )
     parser.add_argument(
         "--start-date", dest="start_date", help="Start date YYYY/MM/DD", default=None
     )
@@ -239,6 +255,9 @@ if __name__ == "__main__":
 
     db = mc.connect_to_mc_db(args)
     session = db.sessionmaker()
+    session.export_progress = args.progress
+    if args.chunk_size is not None:
+        session.export_chunk_size = args.chunk_size
 
     for arg_name, table_list in filter_args.items():
         if getattr(args, arg_name) is not None and table not in table_list:
@@ -13,6 +13,10 @@ args = ap.parse_args()
 
 sqlu = cm_gen_sqlite.SqliteHandling()
 
-if args.force or sqlu.different_table_hash_dict():
+if args.force:
     sqlu.update_sqlite()
     sqlu.write_table_hash_dict()
+elif sqlu.different_table_hash_dict():
+    # only copy the tables whose csv files changed
+    sqlu.update_sqlite(tables=sqlu.changed_tables())
+    sqlu.write_table_hash_dict()
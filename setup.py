@@ -51,6 +51,7 @@ setup_args = {
             "matplotlib>=3.6",
             "pandas>=1.4",
             "psutil>=5.9",
+            "pyarrow>=10.0",
             "python-dateutil>=2.8.2",
             "tabulate>=0.8.10",
             "tornado>=6.2",
@@ -59,6 +60,7 @@ setup_args = {
             "h5py>=3.4.0",
             "pandas>=1.4",
             "psutil>=5.9",
+            "pyarrow>=10.0",
             "python-dateutil>=2.8.2",
             "tabulate>=0.8.10",
             "tornado>=6.2",